@@ -0,0 +1,48 @@
+"""Measures manifest parsing throughput for 1..N workers.
+
+Usage: python -m benchmarks.bench_parallel_parse [--packages 5000] [--max-jobs N]
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_workspace
+from rosdepviz.parallel import default_jobs, parse_manifests
+from rosdepviz.workspace import gather_package_xml_files
+
+
+def job_counts(max_jobs):
+    counts = []
+    jobs = 1
+    while jobs < max_jobs:
+        counts.append(jobs)
+        jobs *= 2
+    counts.append(max_jobs)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packages", type=int, default=5000)
+    parser.add_argument("--max-jobs", type=int, default=default_jobs())
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        generate_workspace(root, packages=args.packages)
+        paths = gather_package_xml_files(root)
+        baseline = None
+        print(f"{len(paths)} manifests")
+        print(f"{'jobs':>4}  {'best (s)':>9}  {'speedup':>7}")
+        for jobs in job_counts(args.max_jobs):
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                parse_manifests(paths, jobs=jobs)
+                best = min(best, time.perf_counter() - start)
+            baseline = baseline or best
+            print(f"{jobs:>4}  {best:>9.3f}  {baseline / best:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
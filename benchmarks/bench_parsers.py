@@ -0,0 +1,161 @@
+"""Compares manifest parsing strategies on realistic REP-140/149 manifests.
+
+Usage: python -m benchmarks.bench_parsers [--manifests 2000] [--repeat 5]
+
+`tree` is rosdepviz.manifest.parse_manifest, which builds the tree in C and
+then walks the children of <package> once. The other two are reference
+points returning the same typed records: a findall per dependency tag merged
+back into document order, and an iterparse-based streaming extractor that
+stops at <export> and clears elements as it goes.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_workspace
+from rosdepviz.manifest import DEPENDENCY_TAGS, TAG_TYPES, element_tree, parse_manifest, parse_package_xml
+
+ET = element_tree()
+
+# Shape of a manifest produced by catkin_create_pkg (REP 140): mostly comments.
+CATKIN_CREATE_PKG_MANIFEST = """<?xml version="1.0"?>
+<package format="2">
+  <name>{name}</name>
+  <version>0.0.0</version>
+  <description>The {name} package</description>
+
+  <!-- One maintainer tag required, multiple allowed, one person per tag -->
+  <!-- Example:  -->
+  <!-- <maintainer email="jane.doe@example.com">Jane Doe</maintainer> -->
+  <maintainer email="user@todo.todo">user</maintainer>
+
+  <!-- One license tag required, multiple allowed, one license per tag -->
+  <!-- Commonly used license strings: -->
+  <!--   BSD, MIT, Boost Software License, GPLv2, GPLv3, LGPLv2.1, LGPLv3 -->
+  <license>TODO</license>
+
+  <!-- Url tags are optional, but multiple are allowed, one per tag -->
+  <!-- Optional attribute type can be: website, bugtracker, or repository -->
+  <!-- <url type="website">http://wiki.ros.org/{name}</url> -->
+
+  <!-- The *depend tags are used to specify dependencies -->
+  <!-- Dependencies can be catkin packages or system dependencies -->
+  <!-- Examples: -->
+  <!-- Use depend as a shortcut for packages that are both build and exec dependencies -->
+  <!--   <depend>roscpp</depend> -->
+  <!-- Use build_depend for packages you need at compile time: -->
+  <!--   <build_depend>message_generation</build_depend> -->
+  <!-- Use exec_depend for packages you need at runtime: -->
+  <!--   <exec_depend>message_runtime</exec_depend> -->
+  <!-- Use test_depend for packages you need only for testing: -->
+  <!--   <test_depend>gtest</test_depend> -->
+  <buildtool_depend>catkin</buildtool_depend>
+{deps}
+
+  <!-- The export tag contains other, unspecified, tags -->
+  <export>
+    <!-- Other tools can request additional information be placed here -->
+
+  </export>
+</package>
+"""
+
+
+def parse_manifest_findall(package_xml_path):
+    """Reference extractor: one findall per dependency tag, sorted back into document order."""
+    root = ET.parse(package_xml_path).getroot()
+    name_elem = root.find("name")
+    name = name_elem.text.strip() if name_elem is not None and name_elem.text else None
+    position = {id(child): i for i, child in enumerate(root)}
+    found = []
+    for tag in DEPENDENCY_TAGS:
+        for elem in root.findall(tag):
+            if elem.text and elem.text.strip():
+                found.append((position[id(elem)], (elem.text.strip(), TAG_TYPES[tag], elem.get("condition"))))
+    return name, [record for _, record in sorted(found)]
+
+
+def parse_manifest_iterparse(package_xml_path):
+    """Reference streaming extractor: iterparse, stop at <export>, clear as we go."""
+    name = None
+    records = []
+    depth = 0
+    root = None
+    with open(package_xml_path, "rb") as f:
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 1:
+                    root = elem
+                elif depth == 2 and elem.tag == "export":
+                    break
+                continue
+            depth -= 1
+            if depth == 1:
+                text = elem.text.strip() if elem.text else ""
+                if elem.tag == "name":
+                    name = name or text
+                elif elem.tag in TAG_TYPES and text:
+                    records.append((text, TAG_TYPES[elem.tag], elem.get("condition")))
+                root.clear()
+    return name, records
+
+
+PARSERS = [
+    ("tree", parse_manifest),
+    ("findall", parse_manifest_findall),
+    ("iterparse", parse_manifest_iterparse),
+]
+
+
+def write_catkin_create_pkg_manifests(root, paths):
+    rewritten = []
+    for path in paths:
+        name, deps = parse_package_xml(path)
+        new_path = os.path.join(root, "catkin_create_pkg", name, "package.xml")
+        os.makedirs(os.path.dirname(new_path), exist_ok=True)
+        dep_lines = "\n".join(f"  <depend>{dep}</depend>" for dep in deps)
+        with open(new_path, "w") as f:
+            f.write(CATKIN_CREATE_PKG_MANIFEST.format(name=name, deps=dep_lines))
+        rewritten.append(new_path)
+    return rewritten
+
+
+def time_parser(parser, paths, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            parser(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--manifests", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        rep149 = generate_workspace(os.path.join(root, "rep149"), packages=args.manifests, fan_out=8)
+        corpora = [("REP-149 (format 2/3)", rep149),
+                   ("REP-140 catkin_create_pkg", write_catkin_create_pkg_manifests(root, rep149))]
+
+        for label, paths in corpora:
+            for path in paths:
+                expected = parse_manifest(path)
+                assert all(p(path) == expected for _, p in PARSERS), path
+
+            print(f"{label}: {len(paths)} manifests, best of {args.repeat}")
+            baseline = None
+            for parser_name, parse in PARSERS:
+                elapsed = time_parser(parse, paths, args.repeat)
+                baseline = baseline or elapsed
+                print(f"  {parser_name:<9} {elapsed:.3f}s  {elapsed / len(paths) * 1e6:6.1f} us/manifest"
+                      f"  {baseline / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Times the main rosdepviz code paths on a synthetic workspace and writes the results as JSON.
+
+Usage: python -m benchmarks.bench_suite [--packages 2000] [--depth 12] [--cycle-density 0.01]
+       [--repeat 5] [--scenario NAME ...] [--output results.json] [--compare baseline.json]
+
+Scenarios:
+  cold_scan              scan and parse every manifest, writing a fresh manifest cache
+  warm_scan              scan again, answering every manifest from that cache
+  graph_build            build the DependencyGraph (forward and reverse arrays) of the index
+  reverse_map            build the dependent -> dependencies dict of WorkspaceIndex
+  reachability           compute the transitive closures of the graph
+  build_dependency_tree  rosdepviz.cli.build_dependency_tree for --sample packages
+  subgraph               forward and reverse DependencyGraph.subgraph for --sample packages
+  dot_generation         tree_to_dot, and the graphviz Digraph source if graphviz is installed,
+                         for the trees of --sample packages
+
+Each scenario is run --repeat times; "best_s" is what --compare checks.
+Results from different machines or workspace shapes are not comparable:
+the shape and platform are recorded with the timings.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import add_shape_arguments, generate_workspace, shape_of
+from rosdepviz import cli
+from rosdepviz.cache import ManifestCache
+from rosdepviz.cycles import find_cycles
+from rosdepviz.export import tree_to_dot
+from rosdepviz.graph import DependencyGraph
+from rosdepviz.reachability import ReachabilityIndex
+from rosdepviz.workspace import WorkspaceIndex
+
+RESULTS_SCHEMA_VERSION = 1
+
+
+class Workload:
+    """The synthetic workspace and the objects the scenarios start from."""
+
+    def __init__(self, root, cache_dir, jobs, sample):
+        self.root = root
+        self.cache_dir = cache_dir
+        self.jobs = jobs
+        self.index = self.scan(rebuild=True)
+        self.graph = self.index.graph
+        # The packages with the most dependencies, where the per-package operations cost the most
+        reachability = self.index.reachability
+        names = self.graph.internal_names()
+        self.sample = sorted(names, key=lambda name: (-reachability.count_dependencies(name), name))[:sample]
+        self.trees = {name: cli.build_dependency_tree(name, index=self.index) for name in self.sample}
+
+    def scan(self, rebuild=False):
+        cache = ManifestCache.for_workspace(self.root, self.cache_dir, rebuild=rebuild)
+        return WorkspaceIndex.scan(self.root, cache=cache, jobs=self.jobs)
+
+
+def cold_scan(workload):
+    workload.scan(rebuild=True)
+
+
+def warm_scan(workload):
+    workload.scan()
+
+
+def graph_build(workload):
+    DependencyGraph.from_index(workload.index)
+
+
+def reverse_map(workload):
+    workload.index.build_reverse_dependencies()
+
+
+def reachability(workload):
+    ReachabilityIndex(workload.graph)
+
+
+def build_dependency_tree(workload):
+    for name in workload.sample:
+        cli.build_dependency_tree(name, index=workload.index)
+
+
+def subgraph(workload):
+    for name in workload.sample:
+        workload.graph.subgraph(name)
+        workload.graph.subgraph(name, reverse=True)
+
+
+def dot_generation(workload):
+    graphviz = cli.load_graphviz()
+    for name, tree in workload.trees.items():
+        tree_to_dot(tree, name)
+        if graphviz is not None:
+            cli.build_digraph(tree or {name: []}).source
+
+
+SCENARIOS = {scenario.__name__: scenario for scenario in (
+    cold_scan, warm_scan, graph_build, reverse_map, reachability, build_dependency_tree, subgraph, dot_generation)}
+
+
+def time_scenario(scenario, workload, repeat):
+    """Returns the wall-clock seconds of `repeat` runs of `scenario`."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scenario(workload)
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def run_suite(shape, names, repeat=5, jobs=1, sample=50, log=sys.stderr):
+    """Generates a workspace of `shape` (generate_workspace keywords), runs the `names` scenarios and returns the results."""
+    with tempfile.TemporaryDirectory() as root:
+        src_dir = os.path.join(root, "src")
+        start = time.perf_counter()
+        generate_workspace(src_dir, **shape)
+        print(f"Generated {shape['packages']} packages in {time.perf_counter() - start:.2f} s", file=log)
+        workload = Workload(src_dir, os.path.join(root, "cache"), jobs, sample)
+        results = {
+            "schema": RESULTS_SCHEMA_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "shape": dict(shape, jobs=jobs, sample=len(workload.sample)),
+            "workspace": {
+                "packages": workload.graph.internal_count,
+                "external_packages": len(workload.graph) - workload.graph.internal_count,
+                "edges": workload.graph.edge_count,
+                "cycles": len(find_cycles(workload.index.reachability)),
+                "dirs_visited": workload.index.scan_stats.dirs_visited,
+            },
+            "scenarios": {},
+        }
+        for name in names:
+            runs = time_scenario(SCENARIOS[name], workload, repeat)
+            results["scenarios"][name] = {"best_s": min(runs), "median_s": statistics.median(runs), "runs": runs}
+            print(f"  {name:<22} best {min(runs) * 1000:9.2f} ms  median {statistics.median(runs) * 1000:9.2f} ms",
+                  file=log)
+    return results
+
+
+def compare(results, baseline, max_regression):
+    """Prints the ratio of every scenario to `baseline` and returns the names slower than `max_regression` times it."""
+    if baseline.get("shape") != results["shape"]:
+        print("Warning: the baseline was measured on a differently shaped workspace.")
+    regressions = []
+    print(f"{'scenario':<22} {'baseline':>11} {'now':>11} {'ratio':>6}")
+    for name, timing in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        ratio = timing["best_s"] / before["best_s"] if before["best_s"] else float("inf")
+        flag = "  REGRESSION" if ratio > max_regression else ""
+        print(f"{name:<22} {before['best_s'] * 1000:8.2f} ms {timing['best_s'] * 1000:8.2f} ms {ratio:5.2f}x{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_shape_arguments(parser)
+    parser.set_defaults(packages=2000, depth=12, cycle_density=0.01, nesting=2, ignored=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=1, help="manifest parsing workers of the scan scenarios")
+    parser.add_argument("--sample", type=int, default=50,
+                        help="packages the per-package scenarios run for (the ones with the most dependencies)")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), default=None,
+                        help="run only this scenario (may be repeated; default: all)")
+    parser.add_argument("--output", metavar="FILE", help="write the JSON results to FILE instead of stdout")
+    parser.add_argument("--compare", metavar="FILE", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--max-regression", type=float, default=1.25, metavar="RATIO",
+                        help="with --compare, exit with status 1 if a scenario is this much slower (default: 1.25)")
+    args = parser.parse_args(argv)
+
+    results = run_suite(shape_of(args), args.scenario or list(SCENARIOS), args.repeat, args.jobs, args.sample)
+    text = json.dumps(results, indent=2) + "\n"
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    elif not args.compare:
+        sys.stdout.write(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print(f"{len(regressions)} scenario(s) regressed by more than {args.max_regression:g}x: "
+                  f"{', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
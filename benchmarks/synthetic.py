@@ -0,0 +1,174 @@
+"""Synthetic ROS workspaces for benchmarking rosdepviz.
+
+Usage: python -m benchmarks.synthetic DIR [--packages 1000] [--fan-out 4] [--depth N]
+       [--cycle-density 0.01] [--nesting 2] [--ignored 100]
+
+Writes a workspace to DIR, e.g. to profile the CLI or the GUI against it.
+"""
+import argparse
+import os
+import random
+
+MANIFEST_TEMPLATE = """<?xml version="1.0"?>
+<?xml-model href="http://download.ros.org/schema/package_format2.xsd" schematypens="http://www.w3.org/2001/XMLSchema"?>
+<package format="2">
+  <name>{name}</name>
+  <version>1.0.0</version>
+  <description>Synthetic package {name} generated for benchmarking.</description>
+  <maintainer email="maintainer@example.com">Maintainer</maintainer>
+  <license>BSD</license>
+  <url type="website">https://example.com/{name}</url>
+
+  <buildtool_depend>catkin</buildtool_depend>
+{deps}
+  <export>
+    <metapackage/>
+  </export>
+</package>
+"""
+
+EXTERNAL_DEPS = ["roscpp", "rospy", "std_msgs", "geometry_msgs", "sensor_msgs", "tf2_ros"]
+
+# Directories a scan must not enter (see rosdepviz.scanner), with the path of the
+# stray package.xml placed below each one; the last one is skipped for its marker.
+IGNORED_LOCATIONS = (
+    ("build", "{name}"),
+    ("devel", "share/{name}"),
+    ("install", "share/{name}"),
+    ("third_party", "{name}"),
+)
+IGNORE_MARKER = ("third_party", "COLCON_IGNORE")
+
+
+def package_name(i):
+    return f"pkg_{i:05d}"
+
+
+def render_manifest(name, deps):
+    lines = []
+    for i, dep in enumerate(deps):
+        tag = ("depend", "build_depend", "exec_depend")[i % 3]
+        lines.append(f"  <{tag}>{dep}</{tag}>")
+    return MANIFEST_TEMPLATE.format(name=name, deps="\n".join(lines))
+
+
+def package_dir(root, i, group_size, nesting):
+    """Returns the directory of package `i`: `nesting` levels of groups of `group_size`."""
+    parts = [f"stack_{i // group_size ** nesting:03d}"]
+    for level in range(nesting - 1, 0, -1):
+        parts.append(f"group_{i // group_size ** level % group_size:03d}")
+    return os.path.join(root, *parts, package_name(i))
+
+
+def dependency_lists(packages, fan_out, depth, cycle_density, rng):
+    """Returns the internal dependencies (indexes) of every package.
+
+    Without `depth`, a package depends on up to `fan_out` earlier packages.
+    With it, packages are split into `depth` layers and depend on the layer
+    right below theirs plus earlier layers, so the longest chain is `depth`
+    packages. A `cycle_density` fraction of the packages then gets a back edge
+    from a package a few dependencies below it, closing a cycle.
+    """
+    depth = min(depth, packages) if depth else None
+    deps = []
+    for i in range(packages):
+        if depth is None:
+            deps.append(rng.sample(range(i), min(i, fan_out)))
+            continue
+        layer = i * depth // packages
+        layer_start = -(-layer * packages // depth)  # First package of this layer
+        if layer == 0:
+            deps.append([])
+            continue
+        below_start = -(-(layer - 1) * packages // depth)
+        chosen = [rng.randrange(below_start, layer_start)]
+        candidates = [j for j in rng.sample(range(layer_start), min(layer_start, fan_out)) if j not in chosen]
+        deps.append(chosen + candidates[:fan_out - 1])
+
+    for i in range(packages if cycle_density else 0):
+        if not deps[i] or rng.random() >= cycle_density:
+            continue
+        node = i
+        for _ in range(rng.randint(1, 3)):
+            if not deps[node]:
+                break
+            node = rng.choice(deps[node])
+        if node != i and i not in deps[node]:
+            deps[node].append(i)
+    return deps
+
+
+def write_ignored_manifests(root, count, rng):
+    """Writes `count` stray manifests where scans must not look: build spaces and an ignored directory."""
+    for number in range(count):
+        directory, template = IGNORED_LOCATIONS[number % len(IGNORED_LOCATIONS)]
+        name = package_name(number)  # Same names as real packages: a scan entering them would notice
+        path = os.path.join(root, directory, template.format(name=name), "package.xml")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(render_manifest(name, [rng.choice(EXTERNAL_DEPS)]))
+    if count:
+        with open(os.path.join(root, *IGNORE_MARKER), "w"):
+            pass
+
+
+def generate_workspace(root, packages=1000, fan_out=4, group_size=50, seed=0, depth=None, cycle_density=0.0,
+                       nesting=1, ignored=0):
+    """Writes `packages` manifests below `root` and returns the list of paths.
+
+    Packages are grouped into `nesting` levels of directories of `group_size`;
+    every package depends on up to `fan_out` earlier packages (see
+    dependency_lists for `depth` and `cycle_density`) plus one external
+    dependency, so the graph is shaped like a layered ROS stack. `ignored`
+    extra manifests are written in build spaces and an ignored directory; they
+    are not part of the returned list.
+    """
+    rng = random.Random(seed)
+    internal = dependency_lists(packages, fan_out, depth, cycle_density, rng)
+    paths = []
+    for i in range(packages):
+        name = package_name(i)
+        deps = [package_name(j) for j in internal[i]]
+        deps.append(rng.choice(EXTERNAL_DEPS))
+        pkg_dir = package_dir(root, i, group_size, nesting)
+        os.makedirs(pkg_dir, exist_ok=True)
+        path = os.path.join(pkg_dir, "package.xml")
+        with open(path, "w") as f:
+            f.write(render_manifest(name, deps))
+        paths.append(path)
+    write_ignored_manifests(root, ignored, rng)
+    return paths
+
+
+def add_shape_arguments(parser):
+    """Adds the generate_workspace parameters as command-line options."""
+    parser.add_argument("--packages", type=int, default=1000)
+    parser.add_argument("--fan-out", type=int, default=4, help="internal dependencies per package")
+    parser.add_argument("--depth", type=int, default=None, help="layers of the dependency graph (default: unbounded)")
+    parser.add_argument("--cycle-density", type=float, default=0.0,
+                        help="fraction of packages closing a dependency cycle")
+    parser.add_argument("--group-size", type=int, default=50, help="packages per directory")
+    parser.add_argument("--nesting", type=int, default=1, help="directory levels above each package")
+    parser.add_argument("--ignored", type=int, default=0,
+                        help="stray manifests in build/install spaces and a COLCON_IGNORE directory")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def shape_of(args):
+    """Returns the generate_workspace keyword arguments of the add_shape_arguments options."""
+    return {"packages": args.packages, "fan_out": args.fan_out, "depth": args.depth,
+            "cycle_density": args.cycle_density, "group_size": args.group_size, "nesting": args.nesting,
+            "ignored": args.ignored, "seed": args.seed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", metavar="DIR")
+    add_shape_arguments(parser)
+    args = parser.parse_args(argv)
+    paths = generate_workspace(args.root, **shape_of(args))
+    print(f"Wrote {len(paths)} packages and {args.ignored} ignored manifests to {args.root}")
+
+
+if __name__ == "__main__":
+    main()
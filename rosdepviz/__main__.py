@@ -0,0 +1,5 @@
+import sys
+
+from rosdepviz.commands import main
+
+sys.exit(main())
@@ -0,0 +1,85 @@
+import bisect
+import os
+import sys
+
+
+class PackageOwners:
+    """Maps files to the workspace package whose directory contains them.
+
+    Package directories never nest (the scanner stops at the first
+    package.xml), so after sorting them, the owner of a path can only be the
+    last directory that sorts before it: one bisect per lookup.
+    """
+
+    __slots__ = ("roots", "names")
+
+    def __init__(self, packages):
+        """`packages` maps name -> package.xml path, like WorkspaceIndex.packages."""
+        entries = sorted((os.path.join(os.path.realpath(os.path.dirname(package_xml)), ""), name)
+                         for name, package_xml in packages.items())
+        self.roots = [root for root, _ in entries]  # package directories, with a trailing separator
+        self.names = [name for _, name in entries]
+
+    def owner_of(self, path):
+        """Returns the name of the package containing `path`, or None if it is outside every package."""
+        path = os.path.join(os.path.realpath(path), "")
+        position = bisect.bisect_right(self.roots, path) - 1
+        if position >= 0 and path.startswith(self.roots[position]):
+            return self.names[position]
+        return None
+
+
+class AffectedPackages:
+    """Packages touched by a change and every workspace package that depends on them.
+
+    Both lists are in topological order: a package comes after the packages
+    it depends on, so they can be built and tested in that order.
+    """
+
+    __slots__ = ("changed", "affected", "unowned")
+
+    def __init__(self, changed, affected, unowned):
+        self.changed = changed  # packages owning at least one changed path
+        self.affected = affected  # changed packages and their transitive dependents
+        self.unowned = unowned  # changed paths outside every package
+
+    def to_dict(self):
+        return {"changed": self.changed, "affected": self.affected, "unowned": self.unowned}
+
+
+def read_changed_paths(path):
+    """Reads changed paths, one per line, from a file or stdin for "-" (e.g. `git diff --name-only`)."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip()]
+
+
+def topological_order(reachability, names):
+    """Returns `names` ordered so that dependencies come first; cycle members are sorted by name."""
+    graph = reachability.graph
+    component_of = reachability.component_of
+    # Components are numbered dependencies first
+    return sorted(set(names), key=lambda name: (component_of[graph.id_of(name)], name))
+
+
+def find_affected(index, paths, base_dir="."):
+    """Returns the AffectedPackages of a WorkspaceIndex for changed `paths`, relative to `base_dir`."""
+    owners = PackageOwners(index.packages)
+    changed = set()
+    unowned = []
+    for path in paths:
+        owner = owners.owner_of(os.path.join(base_dir, path))
+        if owner is None:
+            unowned.append(path)
+        else:
+            changed.add(owner)
+
+    reachability = index.reachability
+    affected = set(changed)
+    for name in changed:
+        affected.update(reachability.dependents_of(name))
+    return AffectedPackages(topological_order(reachability, changed), topological_order(reachability, affected),
+                            unowned)
@@ -0,0 +1,100 @@
+import sys
+import time
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class BatchItem:
+    """One package of a batch run, with the time spent building and rendering it."""
+
+    __slots__ = ("package", "tree", "outputs", "build_seconds", "render_seconds", "error")
+
+    def __init__(self, package):
+        self.package = package
+        self.tree = None
+        self.outputs = []
+        self.build_seconds = 0.0
+        self.render_seconds = 0.0
+        self.error = None
+
+    def __repr__(self):
+        return f"BatchItem({self.package!r}, outputs={self.outputs!r}, error={self.error!r})"
+
+
+def read_package_list(path):
+    """Reads package names from a file (or stdin for "-"), one per line; blank lines and # comments are skipped."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    names = []
+    for line in lines:
+        name = line.split("#", 1)[0].strip()
+        if name:
+            names.append(name)
+    return names
+
+
+def build_batch(names, build_tree):
+    """Builds the tree of every package in `names` with `build_tree(name)`.
+
+    Trees come from the shared in-memory graph, so this is done up front
+    on the calling thread; only rendering is handed to the worker pool.
+    Duplicate names are dropped.
+    """
+    items = []
+    seen = set()
+    for name in names:
+        if name in seen:
+            continue
+        seen.add(name)
+        item = BatchItem(name)
+        start = time.perf_counter()
+        try:
+            item.tree = build_tree(name)
+        except Exception as e:
+            item.error = str(e)
+        item.build_seconds = time.perf_counter() - start
+        items.append(item)
+    return items
+
+
+def iter_render_batch(items, render, workers=1):
+    """Calls `render(item)` for every built item on a pool of `workers` threads.
+
+    `render` returns the list of files it wrote. Rendering is dominated
+    by the Graphviz subprocess, so threads are enough to keep several
+    layouts running at once. Items are yielded as they finish, failed
+    ones with their error set; items that failed to build are yielded
+    first without being rendered.
+    """
+    pending = []
+    for item in items:
+        if item.error is None:
+            pending.append(item)
+        else:
+            yield item
+
+    def run(item):
+        start = time.perf_counter()
+        try:
+            item.outputs = render(item)
+        except Exception as e:
+            item.error = str(e) or e.__class__.__name__
+        item.render_seconds = time.perf_counter() - start
+        return item
+
+    if workers <= 1:
+        for item in pending:
+            yield run(item)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run, item) for item in pending]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
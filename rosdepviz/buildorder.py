@@ -0,0 +1,98 @@
+class BuildPlan:
+    """Workspace packages grouped into build waves.
+
+    Every package in a wave only depends on packages from earlier waves, so
+    a wave can be built in parallel once the previous ones are done. The
+    members of a dependency cycle cannot be ordered; they share a wave and
+    are listed in `cycles`. External packages are assumed to be installed
+    and are not scheduled.
+    """
+
+    __slots__ = ("waves", "cycles", "critical_path")
+
+    def __init__(self, waves, cycles, critical_path):
+        self.waves = waves  # [[package names]], in build order
+        self.cycles = cycles  # [[package names]] that depend on each other
+        self.critical_path = critical_path  # longest dependency chain, first built first
+
+    def __len__(self):
+        return sum(len(wave) for wave in self.waves)
+
+    def order(self):
+        """Returns one valid topological order: the waves, concatenated."""
+        return [name for wave in self.waves for name in wave]
+
+    def widths(self):
+        return [len(wave) for wave in self.waves]
+
+    def parallelism(self):
+        """Average number of packages that can build at once: packages per wave."""
+        return len(self) / len(self.waves) if self.waves else 0.0
+
+    def to_dict(self):
+        return {
+            "packages": len(self),
+            "waves": self.waves,
+            "widths": self.widths(),
+            "critical_path": self.critical_path,
+            "cycles": self.cycles,
+        }
+
+
+def compute_build_plan(reachability, names=None):
+    """Computes the build waves of the workspace, or only of `names` and their dependencies.
+
+    Uses the condensation of the reachability index: components come
+    dependencies first, so one pass assigns each component the wave after
+    its deepest dependency and remembers that dependency for the critical path.
+    """
+    graph = reachability.graph
+    components = reachability.components
+    component_of = reachability.component_of
+
+    if names is None:
+        wanted = None
+    else:
+        wanted = set()
+        for name in names:
+            wanted.add(name)
+            wanted.update(reachability.dependencies_of(name, internal_only=True))
+
+    level = [-1] * len(components)
+    deepest = [None] * len(components)  # dependency component on the longest chain
+    waves = []
+    cycles = []
+    for comp_id, members in enumerate(components):
+        members = [node for node in members if graph.is_internal(node)]
+        if not members or (wanted is not None and graph.name_of(members[0]) not in wanted):
+            continue
+        comp_level = 0
+        cyclic = len(members) > 1
+        for node in members:
+            for target in graph.successors(node):
+                target_comp = component_of[target]
+                if target_comp == comp_id:
+                    cyclic = True
+                elif level[target_comp] + 1 > comp_level:
+                    comp_level = level[target_comp] + 1
+                    deepest[comp_id] = target_comp
+        level[comp_id] = comp_level
+        if comp_level == len(waves):
+            waves.append([])
+        waves[comp_level].extend(graph.name_of(node) for node in members)
+        if cyclic:
+            cycles.append(sorted(graph.name_of(node) for node in members))
+
+    critical_path = []
+    if waves:
+        # Any component on the last wave ends a longest chain
+        comp_id = max(range(len(components)), key=lambda c: (level[c], -c))
+        while comp_id is not None:
+            critical_path.append(graph.name_of(min(components[comp_id])))
+            comp_id = deepest[comp_id]
+        critical_path.reverse()
+
+    for wave in waves:
+        wave.sort()
+    cycles.sort()
+    return BuildPlan(waves, cycles, critical_path)
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import tempfile
+
+# Bump whenever the layout of a cache entry changes; older files are discarded.
+CACHE_SCHEMA_VERSION = 2
+
+
+def default_cache_dir():
+    """Returns the directory rosdepviz keeps its caches in ($XDG_CACHE_HOME/rosdepviz)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "rosdepviz")
+
+
+def workspace_cache_path(src_dir, cache_dir=None):
+    """Returns the manifest cache file used for the workspace rooted at `src_dir`."""
+    workspace_hash = hashlib.sha1(os.path.abspath(src_dir).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir or default_cache_dir(), f"manifests-{workspace_hash}.json")
+
+
+def stat_signature(stat_result):
+    """Returns the part of a stat result that decides whether a manifest changed."""
+    return [stat_result.st_mtime_ns, stat_result.st_size]
+
+
+class ManifestCache:
+    """Parsed package.xml contents keyed by path and stat signature.
+
+    Entries are only trusted while the manifest's mtime and size are unchanged,
+    so warm loads stat every manifest but only re-parse the ones that changed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # package.xml path -> {"sig": [mtime_ns, size], "name": str, "deps": [[dep, type mask, condition]]}
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+
+    @classmethod
+    def for_workspace(cls, src_dir, cache_dir=None, rebuild=False):
+        """Opens the cache for `src_dir`; `rebuild` ignores whatever is on disk."""
+        cache = cls(workspace_cache_path(src_dir, cache_dir))
+        if not rebuild:
+            cache.load()
+        return cache
+
+    def load(self):
+        """Loads entries from disk, silently starting empty on a missing or stale file."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("schema") != CACHE_SCHEMA_VERSION:
+            return
+        entries = data.get("entries")
+        if isinstance(entries, dict):
+            self.entries = entries
+
+    def lookup(self, package_xml_path, stat_result):
+        """Returns the cached (name, dependency records) for an unchanged manifest, else None."""
+        entry = self.entries.get(package_xml_path)
+        if entry is None or entry.get("sig") != stat_signature(stat_result):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.get("name"), [tuple(record) for record in entry.get("deps", [])]
+
+    def store(self, package_xml_path, stat_result, name, records):
+        """Records the parse_manifest result of a manifest with its stat signature."""
+        self.entries[package_xml_path] = {
+            "sig": stat_signature(stat_result),
+            "name": name,
+            "deps": [list(record) for record in records],
+        }
+        self._dirty = True
+
+    def prune(self, live_paths):
+        """Drops entries for manifests that no longer exist in the workspace."""
+        live_paths = set(live_paths)
+        for path in [p for p in self.entries if p not in live_paths]:
+            del self.entries[path]
+            self._dirty = True
+
+    def save(self):
+        """Atomically writes the cache to disk if anything changed."""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".manifests-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"schema": CACHE_SCHEMA_VERSION, "entries": self.entries}, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as exc:
+            print(f"Warning: could not write manifest cache {self.path}: {exc}")
+            return
+        self._dirty = False
@@ -1,17 +1,26 @@
+import argparse
+import json
 import os
 import sys
-
-try:
-    import defusedxml.ElementTree as ET
-except Exception:
-    import xml.etree.ElementTree as ET  # fallback when defusedxml not available
+import time
 
 from collections import defaultdict
 
-try:
-    import graphviz
-except Exception:
-    graphviz = None
+from rosdepviz.manifest import DEFAULT_TYPES
+from rosdepviz.manifest import parse_package_xml  # noqa: F401 (re-exported)
+from rosdepviz.affected import find_affected, read_changed_paths
+from rosdepviz.batch import build_batch, iter_render_batch, read_package_list
+from rosdepviz.buildorder import compute_build_plan
+from rosdepviz.cache import ManifestCache
+from rosdepviz.cycles import declaration_line, find_cycles
+from rosdepviz.export import GRAPH_FORMATS, GRAPH_WRITERS, select_nodes, tree_to_dot, tree_to_json, tree_to_text
+from rosdepviz.overlay import LayeredIndex, build_layers, prefix_path_install_spaces
+from rosdepviz.options import add_workspace_arguments, condition_environment, non_negative_int, positive_int
+from rosdepviz.parallel import default_jobs
+from rosdepviz.render import RenderCache, render_to_file
+from rosdepviz.scanner import DEFAULT_EXCLUDES
+from rosdepviz.transform import SFDP_NODE_THRESHOLD, choose_engine, simplify
+from rosdepviz.workspace import WorkspaceIndex
 
 
 # Calculate the default ROS_SRC_DIR relative to the script's location
@@ -19,76 +28,82 @@ script_dir = os.path.dirname(__file__)
 # Set ROS_SRC_DIR to the current directory
 ROS_SRC_DIR = os.path.abspath(".")
 
+_workspace_index = None
 
-def parse_package_xml(package_xml_path):
-    """Parses a package.xml file and returns the package name and its dependencies."""
-    try:
-        tree = ET.parse(package_xml_path)
-        root = tree.getroot()
+# The graphviz module, imported by load_graphviz() when a graph is first drawn:
+# it takes longer to import than most commands take to run.
+_NOT_IMPORTED = object()
+graphviz = _NOT_IMPORTED
 
-        name = root.find("name").text if root.find("name") is not None else None
+TREE_FORMATS = ("text", "json", "dot")
+TREE_FORMAT_EXTENSIONS = {"text": "txt", "json": "json", "dot": "dot"}
+
+
+def get_workspace_index(refresh=False, cache=None, jobs=1, exclude=DEFAULT_EXCLUDES, types=DEFAULT_TYPES,
+                        environment=None):
+    """Returns the WorkspaceIndex for ROS_SRC_DIR, scanning it on first use."""
+    global _workspace_index
+    src_dir = os.path.abspath(ROS_SRC_DIR)
+    if refresh or _workspace_index is None or _workspace_index.src_dir != src_dir:
+        _workspace_index = WorkspaceIndex.scan(src_dir, cache=cache, jobs=jobs, exclude=exclude, types=types,
+                                               environment=environment)
+    else:
+        _workspace_index.set_types(types)
+    return _workspace_index
 
-        dependencies = set()
-        for dep_type in ["build_depend", "exec_depend", "depend"]:
-            for dep in root.findall(dep_type):
-                if dep.text:
-                    dependencies.add(dep.text)
-        return name, list(dependencies)
-    except Exception as e:
-        print(f"Error parsing {package_xml_path}: {e}")
-        return None, []
 
+def find_package_xml(package_name, index=None):
+    """Returns the package.xml path for a given package name within ROS_SRC_DIR."""
+    if index is None:
+        index = get_workspace_index()
+    return index.find_package_xml(package_name)
 
-def find_package_xml(package_name):
-    """Searches for a package.xml file for a given package name within ROS_SRC_DIR."""
-    for root, _, files in os.walk(ROS_SRC_DIR):
-        if "package.xml" in files:
-            package_xml_path = os.path.join(root, "package.xml")
-            name, _ = parse_package_xml(package_xml_path)
-            if name == package_name:
-                return package_xml_path
-    return None
 
+def load_graphviz():
+    """Returns the graphviz module, importing it on first use, or None if it is not installed."""
+    global graphviz
+    if graphviz is _NOT_IMPORTED:
+        try:
+            import graphviz as module
+        except Exception:
+            module = None
+        graphviz = module
+    return graphviz
 
-def build_dependency_tree(start_package_name):
+
+def build_dependency_tree(start_package_name, index=None, max_depth=None, include_external=False):
     """
-    Recursively builds the dependency tree for a given package.
+    Builds the dependency tree for a given package.
     Returns a dictionary where keys are package names and values are lists of their dependencies.
     """
-    dependency_tree = defaultdict(list)
-    visited = set()
-
-    queue = [start_package_name]
-
-    while queue:
-        current_package = queue.pop(0)
-        if current_package in visited:  # Only process each package once
-            continue
+    if index is None:
+        index = get_workspace_index()
+    # Unless asked for, only dependencies that are also found within ROS_SRC_DIR are included.
+    # This filters out system dependencies like std_msgs, roscpp etc.
+    _, edges = index.graph.subgraph(start_package_name, include_external=include_external, max_depth=max_depth)
+    return defaultdict(list, edges)
 
-        visited.add(current_package)
 
-        package_xml_path = find_package_xml(current_package)
-        if package_xml_path:
-            name, deps = parse_package_xml(package_xml_path)
-            if name:  # Ensure name is not None
-                for dep in deps:
-                    # Only add dependencies that are also found within ROS_SRC_DIR
-                    # This filters out system dependencies like std_msgs, roscpp etc.
-                    if find_package_xml(dep):
-                        dependency_tree[name].append(dep)
-                        if dep not in visited:  # Add to queue only if not visited
-                            queue.append(dep)
-        # else:
-        # print(f"Warning: package.xml not found for '{current_package}' within {ROS_SRC_DIR}")
-        # pass # This is expected for system dependencies
+def build_reverse_dependency_tree(start_package_name, index=None, max_depth=None):
+    """
+    Builds the tree of workspace packages that depend on a given package, directly or transitively.
+    Returns a dictionary where keys are package names and values are lists of their dependents.
+    """
+    if index is None:
+        index = get_workspace_index()
+    _, edges = index.graph.subgraph(start_package_name, reverse=True, include_external=False,
+                                    max_depth=max_depth)
+    return defaultdict(list, edges)
 
-    return dependency_tree
 
+def build_digraph(dependency_tree, engine="dot", node_attributes=None):
+    """Builds a graphviz Digraph from the dependency tree, highlighting leaf nodes.
 
-def generate_dot_graph(dependency_tree, output_file="dependency_tree.dot"):
-    """Generates a DOT language graph from the dependency tree, highlighting leaf nodes."""
+    `node_attributes(name)` may return the attributes of nodes that stand for
+    several packages (see rosdepviz.transform), or None for a plain package.
+    """
     # Create a new Digraph using the graphviz library
-    dot = graphviz.Digraph(comment='Dependency Tree')
+    dot = load_graphviz().Digraph(comment='Dependency Tree', engine=engine)
     dot.attr(rankdir='LR')  # Left to Right layout
     dot.attr('node', shape='box')  # Default box shape for nodes
 
@@ -105,7 +120,10 @@ def generate_dot_graph(dependency_tree, output_file="dependency_tree.dot"):
 
     # Add nodes with styling
     for package in all_packages_in_graph:
-        if package in leaf_nodes:
+        attributes = node_attributes(package) if node_attributes else None
+        if attributes:
+            dot.node(package, **attributes)
+        elif package in leaf_nodes:
             dot.node(package, style='filled', fillcolor='lightgreen')
         else:
             dot.node(package)
@@ -114,6 +132,17 @@ def generate_dot_graph(dependency_tree, output_file="dependency_tree.dot"):
     for package, dependencies in dependency_tree.items():
         for dep in dependencies:
             dot.edge(package, dep)
+    return dot
+
+
+def generate_dot_graph(dependency_tree, output_file="dependency_tree.dot", render_cache=None,
+                       engine="dot", node_attributes=None):
+    """Generates a DOT language graph from the dependency tree, highlighting leaf nodes.
+
+    With a `render_cache`, a graph that was rendered before is copied out of
+    the cache instead of being laid out again.
+    """
+    dot = build_digraph(dependency_tree, engine=engine, node_attributes=node_attributes)
 
     # Save the DOT file and render to PNG
     try:
@@ -126,27 +155,479 @@ def generate_dot_graph(dependency_tree, output_file="dependency_tree.dot"):
         print(f"DOT graph saved to {output_file}")
 
         # Render to PNG
-        dot.render(base_name, format='png', cleanup=True)
+        if render_cache is None:
+            dot.render(base_name, format='png', cleanup=True)
+        else:
+            render_to_file(dot.source, f"{base_name}.png", engine=engine, cache=render_cache)
         print(f"Graph rendered to {base_name}.png")
     except Exception as e:
         print(f"Error rendering graph with Graphviz: {e}")
 
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python cli.py <package_name>")
-        sys.exit(1)
+def parse_args(argv=None, prog="rosdepviz.cli"):
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Generate a Graphviz dependency tree for a ROS package.",
+    )
+    parser.add_argument("packages", nargs="*", metavar="package",
+                        help="name of the package to visualize; several names start a batch run")
+    parser.add_argument("--all", action="store_true",
+                        help="batch run over every package in the workspace")
+    parser.add_argument("--packages-from", metavar="FILE",
+                        help="batch run over the package names listed in FILE, one per line ('-' for stdin)")
+    parser.add_argument("--output-dir", default=".", metavar="DIR",
+                        help="directory batch runs write <package>.<ext> files to (default: current directory)")
+    parser.add_argument("--render-jobs", type=positive_int, default=default_jobs(), metavar="N",
+                        help="number of graphs a batch run renders at once (default: CPU count)")
+    add_workspace_arguments(parser)
+    parser.add_argument("--transitive-deps", action="store_true",
+                        help="list every package the package depends on, directly or transitively")
+    parser.add_argument("--transitive-rdeps", action="store_true",
+                        help="list every workspace package that depends on the package, directly or transitively")
+    parser.add_argument("--build-order", action="store_true",
+                        help="print the build waves of the workspace (or of the packages and their "
+                             "dependencies), the critical path and any cycles")
+    parser.add_argument("--cycles", action="store_true",
+                        help="list every dependency cycle in the workspace with the edges to remove to "
+                             "break it; exits with status 1 if there are any")
+    parser.add_argument("--affected", metavar="FILE",
+                        help="read changed file paths from FILE ('-' for stdin, e.g. `git diff --name-only`) and "
+                             "print the packages they belong to and everything depending on them, in build order")
+    parser.add_argument("--base-dir", default=".", metavar="DIR",
+                        help="directory the --affected paths are relative to (default: current directory)")
+    parser.add_argument("--serve", action="store_true",
+                        help="keep the workspace loaded and answer queries from `python -m rosdepviz.client` "
+                             "on a Unix socket until stopped")
+    parser.add_argument("--socket", default=None, metavar="PATH",
+                        help="socket --serve listens on (default: one per workspace in $XDG_RUNTIME_DIR)")
+    parser.add_argument("--poll-interval", type=float, default=None, metavar="SECONDS",
+                        help="how often --serve checks the workspace for changed manifests; 0 disables it "
+                             "(default: 2)")
+    parser.add_argument("-r", "--reverse", action="store_true",
+                        help="walk dependents instead of dependencies: everything that is affected "
+                             "when the package changes")
+    parser.add_argument("--max-depth", type=non_negative_int, default=None, metavar="N",
+                        help="do not expand packages more than N edges away from the package")
+    parser.add_argument("--format", choices=TREE_FORMATS, default=None,
+                        help="write the tree in this format instead of rendering a PNG "
+                             "(default: png, or text with --reverse)")
+    parser.add_argument("--reduce", action="store_true",
+                        help="draw the transitive reduction: drop edges already implied by a longer path")
+    parser.add_argument("--collapse-cycles", action="store_true",
+                        help="draw each dependency cycle as a single node")
+    parser.add_argument("--fold-external", action="store_true",
+                        help="include external dependencies, folding the external leaves of each package "
+                             "into one summary node")
+    parser.add_argument("--engine", choices=("auto", "dot", "sfdp"), default="auto",
+                        help=f"Graphviz layout engine; auto uses sfdp above {SFDP_NODE_THRESHOLD} nodes")
+    parser.add_argument("--export", choices=GRAPH_FORMATS, default=None,
+                        help="write the graph of the packages' subtrees (the whole workspace with --all) "
+                             "in this format, without Graphviz")
+    parser.add_argument("-o", "--output", default=None, metavar="FILE",
+                        help="write --format or --export output to FILE instead of stdout")
+    args = parser.parse_args(argv)
+    if not (args.packages or args.all or args.packages_from or args.build_order or args.cycles or args.affected
+            or args.serve):
+        parser.error("a package name, --all or --packages-from is required")
+    # Only one mode runs, so a second one would be silently skipped (e.g. a CI check with --cycles)
+    modes = [option for option, given in (
+        ("--transitive-deps/--transitive-rdeps", args.transitive_deps or args.transitive_rdeps),
+        ("--export", args.export), ("--build-order", args.build_order), ("--cycles", args.cycles),
+        ("--affected", args.affected), ("--serve", args.serve)) if given]
+    if len(modes) > 1:
+        parser.error(f"{' and '.join(modes)} cannot be combined")
+    if args.export and args.format:
+        parser.error("--export and --format cannot be combined")
+    if args.affected and args.format == "dot":
+        parser.error("--affected writes text or json")
+    if args.build_order and args.format == "dot":
+        parser.error("--build-order writes text or json")
+    if args.cycles and args.format == "dot":
+        parser.error("--cycles writes text or json")
+    args.batch = (not (args.export or args.build_order or args.cycles or args.affected or args.serve)
+                  and bool(args.all or args.packages_from or len(args.packages) > 1))
+    if args.batch and args.output:
+        parser.error("batch runs write one file per package; use --output-dir instead of --output")
+    reductions = args.reduce or args.collapse_cycles or args.fold_external
+    if args.format and reductions:
+        parser.error("--reduce, --collapse-cycles and --fold-external only apply to rendered graphs, "
+                     "not to --format output")
+    # A single package's dependents are listed as text, unless a reduction asks for the graph
+    if args.reverse and args.format is None and not args.batch and not reductions:
+        args.format = "text"
+    args.environment = condition_environment(args)
+    return args
+
+
+def load_layered_index(args):
+    """Scans the install spaces and underlays given in `args` below ROS_SRC_DIR, each layer with its own cache."""
+    global _workspace_index
+    install_spaces = prefix_path_install_spaces() if args.prefix_path else []
+    install_spaces += [os.path.abspath(prefix) for prefix in args.install_space]
+    src_dirs = [os.path.abspath(src_dir) for src_dir in args.underlay] + [os.path.abspath(ROS_SRC_DIR)]
+    layers = build_layers(src_dirs, install_spaces, exclude=DEFAULT_EXCLUDES + tuple(args.exclude),
+                          types=args.dep_types, environment=args.environment)
+    _workspace_index = LayeredIndex.scan_layers(layers, cache=not args.no_cache, rebuild_cache=args.rebuild_cache,
+                                                jobs=args.jobs, types=args.dep_types, environment=args.environment)
+    return _workspace_index
+
+
+def load_workspace_index(args, log=sys.stdout):
+    """Scans ROS_SRC_DIR according to the scan/cache options in `args`."""
+    if args.underlay or args.install_space or args.prefix_path:
+        index = load_layered_index(args)
+        shadowed = len(index.shadowed)
+        print(f"Loaded {len(index.layers)} layers, {len(index)} packages"
+              f"{f' ({shadowed} shadowed by a higher layer)' if shadowed else ''}.", file=log)
+    else:
+        cache = None
+        if not args.no_cache:
+            cache = ManifestCache.for_workspace(ROS_SRC_DIR, rebuild=args.rebuild_cache)
+        index = get_workspace_index(refresh=True, cache=cache, jobs=args.jobs,
+                                    exclude=DEFAULT_EXCLUDES + tuple(args.exclude),
+                                    types=args.dep_types, environment=args.environment)
+    stats = index.scan_stats
+    print(f"Scanned {stats.dirs_visited} directories, found {stats.manifests_found} package.xml files.",
+          file=log)
+    return index
+
+
+def print_transitive(index, package_name, dependents=False):
+    """Prints the transitive dependencies (or dependents) of a package from the reachability index."""
+    reachability = index.reachability
+    if dependents:
+        names = reachability.dependents_of(package_name)
+        print(f"\nTransitive dependents of '{package_name}' ({len(names)}):")
+    else:
+        names = reachability.dependencies_of(package_name)
+        print(f"\nTransitive dependencies of '{package_name}' ({len(names)}):")
+    for name in names:
+        suffix = "" if index.graph.is_internal_name(name) else " (external)"
+        print(f"  {name}{suffix}")
+
+
+def format_tree(args, tree, root):
+    """Returns `tree` rendered as args.format text."""
+    if args.format == "json":
+        direction = "dependents" if args.reverse else "dependencies"
+        content = tree_to_json(tree, root, direction=direction, max_depth=args.max_depth)
+    elif args.format == "dot":
+        content = tree_to_dot(tree, root, reverse=args.reverse)
+    else:
+        content = tree_to_text(tree, root)
+    return content
+
+
+def write_tree(args, tree, root):
+    """Writes `tree` in args.format to args.output, or stdout."""
+    write_output(args, format_tree(args, tree, root))
 
-    start_package = sys.argv[1]  # Get package name from command line argument
+
+def write_output(args, content):
+    """Writes `content` to args.output, or stdout."""
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(content)
+    else:
+        sys.stdout.write(content)
+
+
+def prepare_graph(args, index, tree, root):
+    """Applies the --reduce/--collapse-cycles/--fold-external reductions and picks the layout engine.
+
+    Returns (GraphView, engine); build_digraph takes the view's edges and group_attributes.
+    """
+    if args.reverse:
+        # Draw dependents trees with arrows pointing at dependencies, like every other graph
+        flipped = defaultdict(list)
+        for name, children in tree.items():
+            for child in children:
+                flipped[child].append(name)
+        tree = flipped
+    view = simplify(root, tree, index.graph.is_internal_name,
+                    collapse=args.collapse_cycles, fold=args.fold_external, reduce=args.reduce)
+    engine = choose_engine(view.node_count()) if args.engine == "auto" else args.engine
+    return view, engine
+
+
+def build_tree_for_args(args, index, name):
+    """Builds the tree of `name` for the --reverse/--max-depth/--fold-external options."""
+    if args.reverse:
+        return build_reverse_dependency_tree(name, index=index, max_depth=args.max_depth)
+    return build_dependency_tree(name, index=index, max_depth=args.max_depth,
+                                 include_external=args.fold_external)
+
+
+def requested_packages(args, index):
+    """Returns the package names named on the command line, by --packages-from, or every one for --all."""
+    if args.all:
+        return index.graph.internal_names()
+    names = list(args.packages)
+    if args.packages_from:
+        names.extend(read_package_list(args.packages_from))
+    return names
+
+
+def render_batch_item(args, index, item):
+    """Writes one batch package to args.output_dir and returns the paths written."""
+    base = os.path.join(args.output_dir, item.package)
+    if args.format:
+        path = f"{base}.{TREE_FORMAT_EXTENSIONS[args.format]}"
+        with open(path, "w") as f:
+            f.write(format_tree(args, item.tree, item.package))
+        return [path]
+
+    if load_graphviz() is None:
+        raise RuntimeError("the graphviz Python package is not installed")
+    view, engine = prepare_graph(args, index, item.tree, item.package)
+    # A package without workspace dependencies is still drawn as a single node
+    dot = build_digraph(view.edges or {view.root: []}, engine=engine, node_attributes=view.group_attributes)
+    with open(f"{base}.dot", "w") as f:
+        f.write(dot.source)
+    if args.render_cache is None:
+        dot.render(base, format="png", cleanup=True)
+    else:
+        render_to_file(dot.source, f"{base}.png", engine=engine, cache=args.render_cache)
+    return [f"{base}.dot", f"{base}.png"]
+
+
+def run_batch(args, index):
+    """Builds and renders every requested package from the one loaded index.
+
+    Prints a line with the build and render time of each package as it
+    finishes and returns the exit status: 1 if any package failed.
+    """
+    names = requested_packages(args, index)
+
+    def build_tree(name):
+        if name not in index:
+            raise LookupError(f"not found in {ROS_SRC_DIR}")
+        return build_tree_for_args(args, index, name)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    start = time.perf_counter()
+    items = build_batch(names, build_tree)
+    print(f"Rendering {len(items)} packages with {args.render_jobs} workers...")
+
+    failed = 0
+    build_total = render_total = 0.0
+    for done, item in enumerate(iter_render_batch(items, lambda item: render_batch_item(args, index, item),
+                                                  workers=args.render_jobs), 1):
+        build_total += item.build_seconds
+        render_total += item.render_seconds
+        prefix = f"[{done}/{len(items)}] {item.package}"
+        if item.error is not None:
+            failed += 1
+            print(f"{prefix}: FAILED ({item.error})")
+            continue
+        nodes = {item.package}
+        for name, children in item.tree.items():
+            nodes.add(name)
+            nodes.update(children)
+        print(f"{prefix}: {len(nodes)} packages, build {item.build_seconds * 1000:.1f} ms, "
+              f"render {item.render_seconds * 1000:.1f} ms")
+
+    elapsed = time.perf_counter() - start
+    if args.render_cache is not None and not args.format:
+        print(f"Render cache: {args.render_cache.hits} hits, {args.render_cache.misses} misses.")
+    print(f"Rendered {len(items) - failed} of {len(items)} packages to {args.output_dir} in {elapsed:.2f} s "
+          f"(build {build_total:.2f} s, render {render_total:.2f} s summed over workers).")
+    return 1 if failed else 0
+
+
+def print_build_plan(plan):
+    """Prints the build waves with a width profile, the critical path and any cycles."""
+    print(f"\nBuild order for {len(plan)} packages in {len(plan.waves)} waves "
+          f"(critical path {len(plan.critical_path)}, average parallelism {plan.parallelism():.1f}):")
+    widest = max(plan.widths(), default=0)
+    for number, wave in enumerate(plan.waves, 1):
+        bar = "#" * max(1, round(40 * len(wave) / widest))
+        print(f"  Wave {number:>3} {len(wave):>5} {bar}")
+        print(f"             {', '.join(wave)}")
+    if plan.critical_path:
+        print(f"\nCritical path: {' -> '.join(plan.critical_path)}")
+    if plan.cycles:
+        print(f"\n{len(plan.cycles)} dependency cycle(s) must be broken before these packages can be built:")
+        for cycle in plan.cycles:
+            print(f"  {', '.join(cycle)}")
+
+
+def build_order(args, index):
+    """Computes and prints the build plan; returns 1 if dependency cycles prevent a full order."""
+    names = None
+    if args.packages or args.packages_from:
+        names = requested_packages(args, index)
+        missing = [name for name in names if name not in index]
+        if missing:
+            print(f"Package(s) not found in {ROS_SRC_DIR}: {', '.join(missing)}", file=sys.stderr)
+            return 1
+    plan = compute_build_plan(index.reachability, names)
+    if args.format == "json":
+        write_output(args, json.dumps(plan.to_dict(), indent=2) + "\n")
+    else:
+        print_build_plan(plan)
+    return 1 if plan.cycles else 0
+
+
+def report_cycles(args, index):
+    """Prints every dependency cycle and where to break it; returns 1 if there are any."""
+    cycles = find_cycles(index.reachability)
+    report = []
+    for cycle in cycles:
+        breaks = []
+        for package, dependency in cycle.break_edges:
+            package_xml = index.find_package_xml(package)
+            breaks.append({"package": package, "dependency": dependency, "package_xml": package_xml,
+                           "line": declaration_line(package_xml, dependency) if package_xml else None})
+        report.append({"packages": cycle.members, "edges": [list(edge) for edge in cycle.edges],
+                       "break": breaks})
+
+    if args.format == "json":
+        write_output(args, json.dumps({"cycles": report}, indent=2) + "\n")
+    elif not cycles:
+        print("\nNo dependency cycles found.")
+    else:
+        print(f"\nFound {len(cycles)} dependency cycle(s):")
+        for number, entry in enumerate(report, 1):
+            print(f"\n  Cycle {number}: {len(entry['packages'])} packages, {len(entry['edges'])} edges")
+            print(f"    {', '.join(entry['packages'])}")
+            print("    Remove these dependencies to break it:")
+            for edge in entry["break"]:
+                location = edge["package_xml"] or "?"
+                if edge["line"]:
+                    location = f"{location}:{edge['line']}"
+                print(f"      {edge['package']} -> {edge['dependency']}  ({location})")
+    return 1 if cycles else 0
+
+
+def report_affected(args, index):
+    """Prints the packages affected by the changed paths listed in args.affected, in build order."""
+    try:
+        paths = read_changed_paths(args.affected)
+    except OSError as e:
+        print(f"Error reading changed paths from {args.affected}: {e}", file=sys.stderr)
+        return 1
+    result = find_affected(index, paths, args.base_dir)
+    print(f"{len(paths)} changed path(s) in {len(result.changed)} package(s); "
+          f"{len(result.affected)} package(s) affected.", file=sys.stderr)
+    if result.unowned:
+        print(f"{len(result.unowned)} path(s) are outside every package.", file=sys.stderr)
+    if args.format == "json":
+        write_output(args, json.dumps(result.to_dict(), indent=2) + "\n")
+    else:
+        write_output(args, "".join(f"{name}\n" for name in result.affected))
+    return 0
+
+
+def serve(args, index):
+    """Answers queries on the daemon socket until stopped; returns the exit status."""
+    from rosdepviz.client import default_socket_path
+    from rosdepviz.daemon import DEFAULT_POLL_INTERVAL, QueryServer  # asyncio is only needed here
+
+    cache = None if args.no_cache else ManifestCache.for_workspace(ROS_SRC_DIR)
+    poll_interval = DEFAULT_POLL_INTERVAL if args.poll_interval is None else args.poll_interval
+    server = QueryServer(index, args.socket or default_socket_path(ROS_SRC_DIR), cache=cache,
+                         poll_interval=poll_interval)
+    try:
+        server.run()
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except OSError as e:
+        print(f"Error: could not serve on {server.socket_path}: {e}", file=sys.stderr)
+        return 1
+    print(f"Answered {server.requests} request(s).", file=sys.stderr)
+    return 0
+
+
+def export_graph(args, index):
+    """Writes the graph selected by the command line in args.export format; returns the exit status."""
+    roots = None
+    if not args.all:
+        roots = requested_packages(args, index)
+        missing = [name for name in roots if name not in index]
+        if missing:
+            print(f"Package(s) not found in {ROS_SRC_DIR}: {', '.join(missing)}", file=sys.stderr)
+            return 1
+    graph = index.graph
+    node_ids = select_nodes(graph, roots, reverse=args.reverse, max_depth=args.max_depth)
+    write = GRAPH_WRITERS[args.export]
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            write(graph, f, node_ids)
+    else:
+        write(graph, sys.stdout, node_ids)
+    return 0
+
+
+def main(argv=None, prog="rosdepviz.cli"):
+    args = parse_args(argv, prog)
+    args.render_cache = None if args.no_cache else RenderCache.for_user()
+    # Keep stdout clean for machine-readable output
+    log = sys.stderr if args.export or args.affected or args.serve or (args.format and not args.batch) else sys.stdout
+    index = load_workspace_index(args, log=log)
+
+    if args.transitive_deps or args.transitive_rdeps:
+        status = 0
+        for name in requested_packages(args, index):
+            # External packages are in the graph too: "who depends on roscpp" is a fair question
+            if name not in index.graph:
+                print(f"Package '{name}' not found in {ROS_SRC_DIR}.", file=sys.stderr)
+                status = 1
+                continue
+            if args.transitive_deps:
+                print_transitive(index, name)
+            if args.transitive_rdeps:
+                print_transitive(index, name, dependents=True)
+        return status
+
+    if args.export:
+        return export_graph(args, index)
+
+    if args.build_order:
+        return build_order(args, index)
+
+    if args.cycles:
+        return report_cycles(args, index)
+
+    if args.affected:
+        return report_affected(args, index)
+
+    if args.serve:
+        return serve(args, index)
+
+    if args.batch:
+        return run_batch(args, index)
+
+    start_package = args.packages[0]
+
+    if args.format:
+        if start_package not in index:
+            print(f"Package '{start_package}' not found in {ROS_SRC_DIR}.", file=sys.stderr)
+            return 1
+        write_tree(args, build_tree_for_args(args, index, start_package), start_package)
+        return 0
 
     print(f"Building dependency tree for '{start_package}'...")
-    tree = build_dependency_tree(start_package)
+    tree = build_tree_for_args(args, index, start_package)
 
     if tree:
         print("\nDependency Tree (direct dependencies within ros_indigo/src):")
         for pkg, deps in tree.items():
             print(f"  {pkg}: {', '.join(deps)}")
 
-        generate_dot_graph(tree)
+        view, engine = prepare_graph(args, index, tree, start_package)
+        if args.reduce:
+            total = sum(len(deps) for deps in tree.values())
+            print(f"Transitive reduction removed {len(view.removed_edges)} of {total} edges.")
+        if args.engine == "auto" and engine != "dot":
+            print(f"The graph has more than {SFDP_NODE_THRESHOLD} nodes; laying it out with {engine}.")
+        generate_dot_graph(view.edges or {view.root: []}, render_cache=args.render_cache, engine=engine,
+                           node_attributes=view.group_attributes)
     else:
         print(f"Could not build dependency tree for '{start_package}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
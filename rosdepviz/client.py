@@ -0,0 +1,114 @@
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sys
+import tempfile
+
+# Only the standard library: asking the daemon a question must not pay for
+# XML parsing, Graphviz or Qt imports.
+
+
+class QueryError(RuntimeError):
+    """Raised when the daemon cannot be reached or rejects a request."""
+
+
+def default_socket_path(src_dir):
+    """Returns the socket the daemon serving `src_dir` listens on ($XDG_RUNTIME_DIR, else the temp directory)."""
+    workspace_hash = hashlib.sha1(os.path.abspath(src_dir).encode("utf-8")).hexdigest()[:16]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"rosdepviz-{os.getuid()}-{workspace_hash}.sock")
+
+
+def find_socket_path(start_dir="."):
+    """Returns the socket of the daemon serving `start_dir` or the closest parent directory that has one.
+
+    The daemon is started from the workspace root, but queries are often
+    made from inside a package. Without any daemon running, returns the
+    socket `start_dir` itself would have.
+    """
+    directory = os.path.abspath(start_dir)
+    while True:
+        socket_path = default_socket_path(directory)
+        if os.path.exists(socket_path):
+            return socket_path
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return default_socket_path(start_dir)
+        directory = parent
+
+
+def query(socket_path, request, timeout=5.0):
+    """Sends one request to the daemon and returns its result; raises QueryError on failure."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except OSError as exc:
+        raise QueryError(f"could not reach the rosdepviz daemon at {socket_path}: {exc}") from exc
+    if not line:
+        raise QueryError("the rosdepviz daemon closed the connection without answering")
+    try:
+        response = json.loads(line)
+    except ValueError as exc:
+        raise QueryError(f"invalid answer from the rosdepviz daemon: {exc}") from exc
+    if not response.get("ok"):
+        raise QueryError(response.get("error", "request failed"))
+    return response.get("result")
+
+
+def parse_args(argv=None, prog="rosdepviz.client"):
+    parser = argparse.ArgumentParser(prog=prog, description="Query a running rosdepviz daemon.")
+    parser.add_argument("--socket", default=None, metavar="PATH",
+                        help="daemon socket (default: the one of the daemon serving the current directory "
+                             "or the closest parent directory)")
+    parser.add_argument("--json", action="store_true", help="print the raw JSON result")
+    commands = parser.add_subparsers(dest="op", required=True)
+    for op, help_text in (("deps", "dependencies of a package"), ("rdeps", "workspace packages depending on it")):
+        command = commands.add_parser(op, help=help_text)
+        command.add_argument("package")
+        command.add_argument("-t", "--transitive", action="store_true", help="direct and indirect ones")
+        command.add_argument("--internal", action="store_true", help="only workspace packages")
+    command = commands.add_parser("path", help="shortest dependency chain from one package to another")
+    command.add_argument("source")
+    command.add_argument("target")
+    command = commands.add_parser("closure", help="everything the packages depend on, in build order")
+    command.add_argument("packages", nargs="+")
+    command.add_argument("-r", "--reverse", action="store_true", help="everything depending on them instead")
+    commands.add_parser("ping", help="check that the daemon is up")
+    commands.add_parser("stop", help="shut the daemon down")
+    return parser.parse_args(argv)
+
+
+def build_request(args):
+    if args.op in ("deps", "rdeps"):
+        return {"op": args.op, "package": args.package, "transitive": args.transitive, "internal": args.internal}
+    if args.op == "path":
+        return {"op": "path", "from": args.source, "to": args.target}
+    if args.op == "closure":
+        return {"op": "closure", "packages": args.packages, "reverse": args.reverse}
+    return {"op": args.op}
+
+
+def main(argv=None, prog="rosdepviz.client"):
+    args = parse_args(argv, prog)
+    socket_path = args.socket or find_socket_path()
+    try:
+        result = query(socket_path, build_request(args))
+    except QueryError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.json or not isinstance(result, list):
+        print(json.dumps(result))
+    else:
+        for name in result:
+            print(name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import argparse
+import json
+import sys
+import time
+
+from rosdepviz.options import add_workspace_arguments, condition_environment
+
+# The `rosdepviz` command. Every subcommand imports what it needs when it runs,
+# so `rosdepviz deps` on a cached workspace never loads graphviz, asyncio or Qt.
+
+# Subcommands running rosdepviz.cli with these arguments in front of their own
+CLI_COMMANDS = {
+    "render": ((), "draw the dependency tree of packages with Graphviz (all options of rosdepviz.cli)"),
+    "export": (("--export",), "write the graph as json, graphml or ndjson: export FORMAT [package ...]"),
+    "build-order": (("--build-order",), "print the build waves of the workspace or of packages"),
+    "cycles": (("--cycles",), "list the dependency cycles and where to break them"),
+    "affected": (("--affected",), "packages affected by the changed paths listed in FILE: affected FILE"),
+    "serve": (("--serve",), "answer `rosdepviz query` requests on a Unix socket"),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="rosdepviz",
+        description="Explore the dependencies of the ROS packages below the current directory.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    workspace = argparse.ArgumentParser(add_help=False)
+    add_workspace_arguments(workspace)
+    for name, help_text in (("deps", "dependencies of a package"),
+                            ("rdeps", "workspace packages depending on a package")):
+        command = commands.add_parser(name, parents=[workspace], help=help_text, description=f"Print the {help_text}.")
+        command.add_argument("package")
+        command.add_argument("-t", "--transitive", action="store_true", help="direct and indirect ones")
+        if name == "deps":
+            command.add_argument("--internal", action="store_true", help="only workspace packages")
+        command.add_argument("--format", choices=("text", "json"), default="text",
+                             help="one name per line, or a JSON list (default: text)")
+    command = commands.add_parser("stats", parents=[workspace], help="size, cycles and build depth of the workspace",
+                                  description="Print the size, cycles and build depth of the workspace.")
+    command.add_argument("--format", choices=("text", "json"), default="text")
+
+    # Listed for --help; their arguments are parsed by the module they run
+    for name, (_, help_text) in CLI_COMMANDS.items():
+        commands.add_parser(name, help=help_text, add_help=False)
+    commands.add_parser("query", help="ask a running `rosdepviz serve` (see rosdepviz query --help)", add_help=False)
+    commands.add_parser("gui", help="open the graphical dependency viewer")
+
+    return parser.parse_args(argv)
+
+
+def load_index(args):
+    """Loads the workspace in the current directory like rosdepviz.cli, logging to stderr."""
+    from rosdepviz import cli
+
+    args.environment = condition_environment(args)
+    return cli.load_workspace_index(args, log=sys.stderr)
+
+
+def print_names(args, names):
+    if args.format == "json":
+        print(json.dumps(names))
+    else:
+        for name in names:
+            print(name)
+
+
+def run_deps(args):
+    index = load_index(args)
+    if args.package not in index:
+        print(f"Package '{args.package}' not found in {index.src_dir}.", file=sys.stderr)
+        return 1
+    if args.command == "rdeps":
+        names = (index.reachability.dependents_of(args.package) if args.transitive
+                 else index.graph.dependents(args.package))
+    elif args.transitive:
+        names = index.reachability.dependencies_of(args.package, internal_only=args.internal)
+    else:
+        names = index.graph.dependencies(args.package, internal_only=args.internal)
+    print_names(args, names)
+    return 0
+
+
+def run_stats(args):
+    from rosdepviz.buildorder import compute_build_plan
+    from rosdepviz.cycles import find_cycles
+
+    start = time.perf_counter()
+    index = load_index(args)
+    load_seconds = time.perf_counter() - start
+    graph = index.graph
+    plan = compute_build_plan(index.reachability)
+    stats = {
+        "src_dir": index.src_dir,
+        "packages": graph.internal_count,
+        "external_dependencies": len(graph) - graph.internal_count,
+        "dependency_edges": graph.edge_count,
+        "cycles": len(find_cycles(index.reachability)),
+        "build_waves": len(plan.waves),
+        "critical_path": len(plan.critical_path),
+        "shadowed": len(getattr(index, "shadowed", ())),
+        "directories_scanned": index.scan_stats.dirs_visited,
+        "load_seconds": round(load_seconds, 4),
+    }
+    if args.format == "json":
+        print(json.dumps(stats, indent=2))
+    else:
+        width = max(len(key) for key in stats)
+        for key, value in stats.items():
+            print(f"{key.replace('_', ' '):<{width}}  {value}")
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in CLI_COMMANDS:
+        from rosdepviz import cli
+
+        flags, _ = CLI_COMMANDS[argv[0]]
+        return cli.main([*flags, *argv[1:]], prog=f"rosdepviz {argv[0]}")
+    if argv and argv[0] == "query":
+        from rosdepviz import client
+
+        return client.main(argv[1:], prog="rosdepviz query")
+
+    args = parse_args(argv)
+    if args.command == "gui":
+        from rosdepviz import gui
+
+        return gui.main()
+    if args.command == "stats":
+        return run_stats(args)
+    return run_deps(args)
@@ -0,0 +1,140 @@
+import re
+
+from rosdepviz.manifest import DEPENDENCY_TAGS
+
+
+class DependencyCycle:
+    """Workspace packages that depend on each other, and the edges to remove to untangle them.
+
+    `break_edges` is minimal in the sense that putting any one of them back
+    re-creates a cycle; finding the smallest such set is NP-hard, so it is
+    not guaranteed to be the smallest possible one.
+    """
+
+    __slots__ = ("members", "edges", "break_edges")
+
+    def __init__(self, members, edges, break_edges):
+        self.members = members  # sorted package names
+        self.edges = edges  # (package, dependency) edges between members
+        self.break_edges = break_edges  # subset of edges whose removal makes the members acyclic
+
+    def __len__(self):
+        return len(self.members)
+
+    def __repr__(self):
+        return f"DependencyCycle({self.members!r}, break_edges={self.break_edges!r})"
+
+
+def find_cycles(reachability):
+    """Returns every dependency cycle of the graph behind a ReachabilityIndex, largest first.
+
+    The strongly connected components were already found by the index in
+    one linear pass; a component is a cycle if it has more than one member
+    or a package that depends on itself.
+    """
+    graph = reachability.graph
+    component_of = reachability.component_of
+    cycles = []
+    for comp_id, members in enumerate(reachability.components):
+        edges = []
+        for node in sorted(members):
+            for target in graph.successors(node):
+                if component_of[target] == comp_id:
+                    edges.append((graph.name_of(node), graph.name_of(target)))
+        if not edges:
+            continue
+        names = sorted(graph.name_of(node) for node in members)
+        cycles.append(DependencyCycle(names, edges, _feedback_edges(names, edges)))
+    cycles.sort(key=lambda cycle: (-len(cycle), cycle.members))
+    return cycles
+
+
+def _feedback_edges(names, edges):
+    """Edges that, once removed, leave the component acyclic (Eades-Lin-Smyth, then pruned)."""
+    successors = {name: [] for name in names}
+    predecessors = {name: [] for name in names}
+    for source, target in edges:
+        successors[source].append(target)
+        predecessors[target].append(source)
+
+    # Greedy ordering: peel sinks to the back and sources to the front; otherwise
+    # move the node with the largest out-degree minus in-degree to the front.
+    out_degree = {name: len(successors[name]) for name in names}
+    in_degree = {name: len(predecessors[name]) for name in names}
+    remaining = dict.fromkeys(names)
+    front, back = [], []
+
+    def remove(name):
+        del remaining[name]
+        for target in successors[name]:
+            if target in remaining:
+                in_degree[target] -= 1
+        for source in predecessors[name]:
+            if source in remaining:
+                out_degree[source] -= 1
+
+    while remaining:
+        changed = True
+        while changed:
+            changed = False
+            for name in list(remaining):
+                if name not in remaining:
+                    continue
+                if out_degree[name] == 0:
+                    back.append(name)
+                    remove(name)
+                    changed = True
+                elif in_degree[name] == 0:
+                    front.append(name)
+                    remove(name)
+                    changed = True
+        if remaining:
+            name = max(remaining, key=lambda n: out_degree[n] - in_degree[n])
+            front.append(name)
+            remove(name)
+    position = {name: i for i, name in enumerate(front + back[::-1])}
+
+    kept = {name: [] for name in names}
+    backward = []
+    for source, target in edges:
+        if position[target] <= position[source]:
+            backward.append((source, target))
+        else:
+            kept[source].append(target)
+
+    # Put back every backward edge that does not close a cycle on its own
+    feedback = []
+    for source, target in backward:
+        if source != target and not _reaches(kept, target, source):
+            kept[source].append(target)
+        else:
+            feedback.append((source, target))
+    return feedback
+
+
+def _reaches(successors, start, goal):
+    stack = [start]
+    seen = {start}
+    while stack:
+        name = stack.pop()
+        if name == goal:
+            return True
+        for target in successors[name]:
+            if target not in seen:
+                seen.add(target)
+                stack.append(target)
+    return False
+
+
+def declaration_line(package_xml_path, dependency):
+    """Returns the line number declaring `dependency` in a manifest, or None if it cannot be found."""
+    tags = "|".join(DEPENDENCY_TAGS)
+    pattern = re.compile(rf"<({tags})(\s[^>]*)?>\s*{re.escape(dependency)}\s*</\1>")
+    try:
+        with open(package_xml_path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if pattern.search(line):
+                    return number
+    except (OSError, UnicodeDecodeError):
+        return None
+    return None
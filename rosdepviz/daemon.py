@@ -0,0 +1,210 @@
+import asyncio
+import json
+import os
+import socket
+import sys
+import time
+from collections import deque
+
+from rosdepviz.affected import topological_order
+
+# Seconds between two checks of the workspace for added, removed or modified manifests
+DEFAULT_POLL_INTERVAL = 2.0
+# Longest request line accepted from a client
+MAX_REQUEST_BYTES = 1024 * 1024
+
+
+class RequestError(ValueError):
+    """Raised for a request the daemon cannot answer; reported to the client, not fatal."""
+
+
+def _package(index, request, key="package"):
+    name = request.get(key)
+    if not isinstance(name, str):
+        raise RequestError(f"'{key}' must be a package name")
+    if name not in index.graph:
+        raise RequestError(f"unknown package '{name}'")
+    return name
+
+
+def shortest_path(graph, source, target):
+    """Returns the shortest chain of dependencies from `source` to `target`, both included, or None."""
+    start, goal = graph.id_of(source), graph.id_of(target)
+    parent = {start: None}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        if node == goal:
+            path = []
+            while node is not None:
+                path.append(graph.name_of(node))
+                node = parent[node]
+            return path[::-1]
+        for successor in graph.successors(node):
+            if successor not in parent:
+                parent[successor] = node
+                queue.append(successor)
+    return None
+
+
+def handle_request(index, request):
+    """Answers one decoded request against a WorkspaceIndex and returns the result; raises RequestError.
+
+    Operations: deps and rdeps (direct, or with "transitive"), path (from, to),
+    closure (packages, "reverse") and ping.
+    """
+    if not isinstance(request, dict):
+        raise RequestError("a request must be a JSON object")
+    op = request.get("op")
+    graph = index.graph
+    if op == "ping":
+        return {"packages": len(index), "src_dir": index.src_dir}
+    if op == "deps":
+        name = _package(index, request)
+        internal = bool(request.get("internal"))
+        if request.get("transitive"):
+            return index.reachability.dependencies_of(name, internal_only=internal)
+        return graph.dependencies(name, internal_only=internal)
+    if op == "rdeps":
+        name = _package(index, request)
+        if request.get("transitive"):
+            return index.reachability.dependents_of(name)
+        return graph.dependents(name)
+    if op == "path":
+        return shortest_path(graph, _package(index, request, "from"), _package(index, request, "to"))
+    if op == "closure":
+        names = request.get("packages")
+        if not isinstance(names, list) or not names:
+            raise RequestError("'packages' must be a non-empty list of package names")
+        reachability = index.reachability
+        closure = set()
+        for name in names:
+            name = _package(index, {"package": name})
+            closure.add(name)
+            closure.update(reachability.dependents_of(name) if request.get("reverse")
+                           else reachability.dependencies_of(name))
+        return topological_order(reachability, closure)
+    raise RequestError(f"unknown operation '{op}'")
+
+
+class QueryServer:
+    """Keeps a WorkspaceIndex resident and answers queries on a Unix domain socket.
+
+    The protocol is one JSON object per line in each direction: a request
+    such as {"op": "deps", "package": "foo"} is answered with {"ok": true,
+    "result": ...} or {"ok": false, "error": "..."}. Clients may send several
+    requests on one connection. Every `poll_interval` seconds the workspace
+    is refreshed, so only modified manifests are read again. The refresh
+    runs on a worker thread against a copy of the index, which replaces the
+    served one once complete: queries are answered in the meantime and never
+    see a half-updated index.
+    """
+
+    def __init__(self, index, socket_path, cache=None, poll_interval=DEFAULT_POLL_INTERVAL, log=sys.stderr):
+        self.index = index
+        self.socket_path = socket_path
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.log = log
+        self.requests = 0
+        self._stop = None
+
+    def respond(self, line):
+        """Returns the encoded response line to one request line."""
+        try:
+            request = json.loads(line)
+            if isinstance(request, dict) and request.get("op") == "stop":
+                self.stop()
+                result = None
+            else:
+                result = handle_request(self.index, request)
+            response = {"ok": True, "result": result}
+        except ValueError as e:  # Malformed JSON or a RequestError
+            response = {"ok": False, "error": str(e)}
+        self.requests += 1
+        return json.dumps(response).encode("utf-8") + b"\n"
+
+    async def _serve_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(json.dumps({"ok": False, "error": "request too long"}).encode("utf-8") + b"\n")
+                    break
+                if not line:
+                    break
+                writer.write(self.respond(line))
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass  # Client gone, or the daemon is stopping with this connection still open
+        finally:
+            writer.close()
+
+    def _refreshed_index(self):
+        # Runs on a worker thread while the event loop keeps answering from self.index
+        index = self.index.copy()
+        changes = index.refresh(self.cache)
+        if changes:
+            index.graph  # Built here rather than by the first query after the swap
+        return index, changes
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            start = time.perf_counter()
+            try:
+                index, changes = await asyncio.to_thread(self._refreshed_index)
+            except Exception as e:
+                print(f"Warning: could not refresh the workspace: {e}", file=self.log)
+                continue
+            if changes:
+                self.index = index
+                print(f"Updated {len(changes)} package(s) from changed manifests in "
+                      f"{(time.perf_counter() - start) * 1000:.0f} ms.", file=self.log)
+
+    def stop(self):
+        """Makes serve() return once the current request is answered."""
+        if self._stop is not None:
+            self._stop.set()
+
+    async def serve(self, ready=None):
+        """Listens until stop() is called; `ready`, if given, is called once the socket accepts connections."""
+        claim_socket(self.socket_path)
+        self._stop = asyncio.Event()
+        server = await asyncio.start_unix_server(self._serve_client, path=self.socket_path, limit=MAX_REQUEST_BYTES)
+        os.chmod(self.socket_path, 0o600)  # Only the owner may query
+        watcher = asyncio.create_task(self._watch()) if self.poll_interval else None
+        try:
+            async with server:
+                if ready is not None:
+                    ready()
+                await self._stop.wait()
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+    def run(self):
+        """Blocking form of serve(), stopped by Ctrl+C or a "stop" request."""
+        try:
+            asyncio.run(self.serve(ready=lambda: print(f"Serving {len(self.index)} packages on {self.socket_path}",
+                                                       file=self.log)))
+        except KeyboardInterrupt:
+            pass
+
+
+def claim_socket(socket_path):
+    """Removes a socket left behind by a daemon that died; raises RuntimeError if one is still running."""
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            os.unlink(socket_path)
+            return
+    raise RuntimeError(f"a rosdepviz daemon is already listening on {socket_path}")
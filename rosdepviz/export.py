@@ -0,0 +1,134 @@
+import json
+
+
+def dot_quote(name):
+    """Quotes a package name as a DOT identifier."""
+    return '"' + name.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def tree_to_text(tree, root):
+    """Renders a tree (name -> [children]) as an indented outline below `root`.
+
+    Packages reached a second time are marked with (*) and not expanded again.
+    """
+    lines = [root]
+    expanded = {root}
+    # Explicit stack of (name, depth) so deep trees don't hit the recursion limit
+    stack = [(child, 1) for child in reversed(tree.get(root, []))]
+    while stack:
+        name, depth = stack.pop()
+        if name in expanded:
+            lines.append(f"{'  ' * depth}{name} (*)")
+            continue
+        expanded.add(name)
+        lines.append(f"{'  ' * depth}{name}")
+        stack.extend((child, depth + 1) for child in reversed(tree.get(name, [])))
+    return "\n".join(lines) + "\n"
+
+
+def tree_to_json(tree, root, direction="dependencies", max_depth=None):
+    """Renders a tree as a JSON document with its root, direction, packages and edges."""
+    packages = {root}
+    for name, children in tree.items():
+        packages.add(name)
+        packages.update(children)
+    document = {
+        "root": root,
+        "direction": direction,
+        "max_depth": max_depth,
+        "packages": sorted(packages),
+        "edges": {name: list(children) for name, children in tree.items()},
+    }
+    return json.dumps(document, indent=2) + "\n"
+
+
+def tree_to_dot(tree, root, reverse=False):
+    """Renders a tree as DOT source without going through graphviz.
+
+    Edges always point from a package to its dependency, so a reverse
+    (dependents) tree is drawn with its arrows flipped back.
+    """
+    lines = ["digraph G {", "  rankdir=LR;", "  node [shape=box];",
+             f"  {dot_quote(root)} [style=filled, fillcolor=lightblue];"]
+    for name, children in tree.items():
+        for child in children:
+            source, target = (child, name) if reverse else (name, child)
+            lines.append(f"  {dot_quote(source)} -> {dot_quote(target)};")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+GRAPH_FORMATS = ("json", "graphml", "ndjson")
+
+
+def select_nodes(graph, roots=None, reverse=False, max_depth=None):
+    """Returns the sorted ids of the nodes to export: everything, or the subtrees of `roots`."""
+    if roots is None:
+        return range(len(graph))
+    selected = set()
+    for root in roots:
+        names, _ = graph.subgraph(root, reverse=reverse, max_depth=max_depth)
+        selected.update(graph.id_of(name) for name in names if name in graph)
+    return sorted(selected)
+
+
+def _induced_edges(graph, node_ids):
+    """Yields (source id, target ids) for every exported node, keeping edges between exported nodes."""
+    selected = bytearray(len(graph))
+    for node_id in node_ids:
+        selected[node_id] = 1
+    for node_id in node_ids:
+        yield node_id, [target for target in graph.successors(node_id) if selected[target]]
+
+
+def write_graph_json(graph, out, node_ids):
+    """Writes the nodes and edges of `graph` as one JSON document, a package at a time."""
+    out.write('{"packages": [')
+    for position, node_id in enumerate(node_ids):
+        node = graph.nodes[node_id]
+        out.write(", " if position else "\n  ")
+        out.write(json.dumps({"name": node.name, "internal": node.internal, "package_xml": node.package_xml}))
+    out.write('\n], "edges": [')
+    first = True
+    for node_id, targets in _induced_edges(graph, node_ids):
+        source = graph.nodes[node_id].name
+        for target in targets:
+            out.write("\n  " if first else ", ")
+            out.write(json.dumps([source, graph.nodes[target].name]))
+            first = False
+    out.write("\n]}\n")
+
+
+def write_graph_ndjson(graph, out, node_ids):
+    """Writes one JSON adjacency record per line: name, internal, package_xml and depends."""
+    for node_id, targets in _induced_edges(graph, node_ids):
+        node = graph.nodes[node_id]
+        record = {"name": node.name, "internal": node.internal, "package_xml": node.package_xml,
+                  "depends": [graph.nodes[target].name for target in targets]}
+        out.write(json.dumps(record) + "\n")
+
+
+def write_graph_graphml(graph, out, node_ids):
+    """Writes the nodes and edges of `graph` as GraphML, a package at a time."""
+    from xml.sax.saxutils import escape, quoteattr  # Imports urllib; only GraphML needs it
+
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+              '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+              '  <key id="internal" for="node" attr.name="internal" attr.type="boolean"/>\n'
+              '  <key id="package_xml" for="node" attr.name="package_xml" attr.type="string"/>\n'
+              '  <graph id="dependencies" edgedefault="directed">\n')
+    for node_id in node_ids:
+        node = graph.nodes[node_id]
+        out.write(f'    <node id={quoteattr(node.name)}>'
+                  f'<data key="internal">{"true" if node.internal else "false"}</data>')
+        if node.package_xml:
+            out.write(f'<data key="package_xml">{escape(node.package_xml)}</data>')
+        out.write("</node>\n")
+    for node_id, targets in _induced_edges(graph, node_ids):
+        source = quoteattr(graph.nodes[node_id].name)
+        for target in targets:
+            out.write(f"    <edge source={source} target={quoteattr(graph.nodes[target].name)}/>\n")
+    out.write("  </graph>\n</graphml>\n")
+
+
+GRAPH_WRITERS = {"json": write_graph_json, "graphml": write_graph_graphml, "ndjson": write_graph_ndjson}
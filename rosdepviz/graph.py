@@ -0,0 +1,237 @@
+from array import array
+from collections import deque
+
+from rosdepviz.manifest import ALL_TYPES
+
+
+class PackageNode:
+    """Per-package record of a DependencyGraph."""
+
+    __slots__ = ("id", "name", "package_xml")
+
+    def __init__(self, node_id, name, package_xml=None):
+        self.id = node_id
+        self.name = name
+        self.package_xml = package_xml  # None for external packages
+
+    @property
+    def internal(self):
+        return self.package_xml is not None
+
+    def __repr__(self):
+        return f"PackageNode({self.id}, {self.name!r}, internal={self.internal})"
+
+
+class DependencyGraph:
+    """Immutable dependency graph with interned package ids and CSR adjacency.
+
+    Workspace packages get ids 0..internal_count-1 (sorted by name) and external
+    dependencies the ids after them, so classifying a node is one comparison.
+    Forward and reverse edges are stored as offset/target integer arrays: the
+    successors of node i are targets[offsets[i]:offsets[i + 1]], in declaration
+    order. Every forward edge also carries the dependency type mask of the
+    declaration (see rosdepviz.manifest), in a parallel array.
+    """
+
+    __slots__ = ("nodes", "ids", "internal_count",
+                 "_fwd_offsets", "_fwd_targets", "_fwd_types", "_rev_offsets", "_rev_targets")
+
+    def __init__(self, packages, dependencies, types=ALL_TYPES):
+        """`packages` maps name -> package.xml path, `dependencies` name -> {dep: type mask}.
+
+        A list of dep names instead of a dict counts as every type. Only
+        edges with one of `types` are kept.
+        """
+        typed = {}
+        for name in packages:
+            deps = dependencies.get(name, ())
+            if not isinstance(deps, dict):
+                deps = dict.fromkeys(deps, ALL_TYPES)
+            typed[name] = {dep: mask & types for dep, mask in deps.items() if mask & types}
+        internal = sorted(packages)
+        external = sorted({dep for name in internal for dep in typed[name] if dep not in packages})
+        self.internal_count = len(internal)
+        self.nodes = [PackageNode(i, name, packages[name]) for i, name in enumerate(internal)]
+        self.nodes.extend(PackageNode(len(internal) + i, name) for i, name in enumerate(external))
+        self.ids = {node.name: node.id for node in self.nodes}
+
+        ids = self.ids
+        self._fwd_offsets = array("l", [0])
+        self._fwd_targets = array("l")
+        self._fwd_types = array("B")
+        for name in internal:
+            self._fwd_targets.extend(ids[dep] for dep in typed[name])
+            self._fwd_types.extend(typed[name].values())
+            self._fwd_offsets.append(len(self._fwd_targets))
+        self._fwd_offsets.extend([len(self._fwd_targets)] * len(external))
+        self._build_reverse()
+
+    def _build_reverse(self):
+        # Counting sort of the forward edges by target keeps sources in id order
+        count = len(self.nodes)
+        offsets = array("l", [0] * (count + 1))
+        for target in self._fwd_targets:
+            offsets[target + 1] += 1
+        for i in range(count):
+            offsets[i + 1] += offsets[i]
+        targets = array("l", [0] * len(self._fwd_targets))
+        fill = array("l", offsets[:-1])
+        for source in range(self.internal_count):
+            for target in self.successors(source):
+                targets[fill[target]] = source
+                fill[target] += 1
+        self._rev_offsets = offsets
+        self._rev_targets = targets
+
+    @classmethod
+    def from_index(cls, index):
+        """Builds the graph of a WorkspaceIndex, keeping the dependency types it follows."""
+        return cls(index.packages, index.dependency_types, index.types)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    @property
+    def edge_count(self):
+        return len(self._fwd_targets)
+
+    def id_of(self, name):
+        """Returns the id of `name`, or None if it appears nowhere in the graph."""
+        return self.ids.get(name)
+
+    def name_of(self, node_id):
+        return self.nodes[node_id].name
+
+    def is_internal(self, node_id):
+        return node_id < self.internal_count
+
+    def is_internal_name(self, name):
+        node_id = self.ids.get(name)
+        return node_id is not None and node_id < self.internal_count
+
+    def internal_names(self):
+        """Returns the workspace package names in sorted order."""
+        return [node.name for node in self.nodes[:self.internal_count]]
+
+    def successors(self, node_id):
+        """Ids of the packages `node_id` depends on, in declaration order."""
+        return self._fwd_targets[self._fwd_offsets[node_id]:self._fwd_offsets[node_id + 1]]
+
+    def successor_types(self, node_id):
+        """Type masks of the edges returned by successors(node_id), in the same order."""
+        return self._fwd_types[self._fwd_offsets[node_id]:self._fwd_offsets[node_id + 1]]
+
+    def predecessors(self, node_id):
+        """Ids of the workspace packages that depend on `node_id`, in id order."""
+        return self._rev_targets[self._rev_offsets[node_id]:self._rev_offsets[node_id + 1]]
+
+    def dependencies(self, name, internal_only=False):
+        """Names of the direct dependencies of `name`."""
+        node_id = self.ids.get(name)
+        if node_id is None:
+            return []
+        return [self.nodes[i].name for i in self.successors(node_id)
+                if not internal_only or i < self.internal_count]
+
+    def dependency_types(self, name):
+        """Returns {dependency: type mask} of the direct dependencies of `name`."""
+        node_id = self.ids.get(name)
+        if node_id is None:
+            return {}
+        return {self.nodes[target].name: mask
+                for target, mask in zip(self.successors(node_id), self.successor_types(node_id))}
+
+    def dependents(self, name):
+        """Names of the workspace packages that directly depend on `name`."""
+        node_id = self.ids.get(name)
+        if node_id is None:
+            return []
+        return [self.nodes[i].name for i in self.predecessors(node_id)]
+
+    def subgraph(self, start, reverse=False, include_external=True, max_depth=None):
+        """Breadth-first subgraph reachable from package `start`.
+
+        Returns (visited names, edges) where edges maps a name to the list of
+        its neighbours, only for names that have any. Traversal only continues
+        through workspace packages; with `include_external` False, edges to
+        external packages are left out as well. With `reverse`, dependents are
+        followed instead of dependencies. With `max_depth`, packages further
+        than that many edges from `start` are not expanded.
+        """
+        start_id = self.ids.get(start)
+        if start_id is None:
+            return {start}, {}
+        neighbours = self.predecessors if reverse else self.successors
+        internal_count = self.internal_count
+
+        visited = {start_id}
+        edges = {}
+        queue = deque([(start_id, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            if max_depth is not None and depth >= max_depth:
+                continue
+            targets = [t for t in neighbours(current) if include_external or t < internal_count]
+            if targets:
+                edges[self.nodes[current].name] = [self.nodes[t].name for t in targets]
+            for target in targets:
+                if target not in visited:
+                    visited.add(target)
+                    if target < internal_count:
+                        queue.append((target, depth + 1))
+        return {self.nodes[i].name for i in visited}, edges
+
+    def strongly_connected_components(self):
+        """Tarjan's algorithm over the whole graph, iterative so deep stacks are fine.
+
+        Returns the components as lists of node ids, in reverse topological
+        order: every component comes after all components it depends on.
+        """
+        count = len(self.nodes)
+        index_of = array("l", [-1] * count)
+        lowlink = array("l", [0] * count)
+        on_stack = bytearray(count)
+        stack = []
+        components = []
+        next_index = 0
+
+        for root in range(count):
+            if index_of[root] != -1:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, edge_pos = work.pop()
+                if edge_pos == 0:
+                    index_of[node] = lowlink[node] = next_index
+                    next_index += 1
+                    stack.append(node)
+                    on_stack[node] = 1
+                successors = self.successors(node)
+                recurse = False
+                for pos in range(edge_pos, len(successors)):
+                    target = successors[pos]
+                    if index_of[target] == -1:
+                        work.append((node, pos + 1))
+                        work.append((target, 0))
+                        recurse = True
+                        break
+                    if on_stack[target]:
+                        lowlink[node] = min(lowlink[node], index_of[target])
+                if recurse:
+                    continue
+                if lowlink[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+        return components
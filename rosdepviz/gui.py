@@ -1,17 +1,34 @@
+import bisect
 import os
 import sys
 import tempfile
-from collections import defaultdict
 
-import graphviz
-import defusedxml.ElementTree as ET
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-                             QComboBox, QLabel, QScrollArea, QLineEdit, QPushButton, QFileDialog,
-                             QProgressDialog, QMessageBox)
-from PyQt5.QtCore import Qt
+                             QComboBox, QLabel, QListView, QLineEdit, QPushButton, QFileDialog,
+                             QProgressBar, QMessageBox, QCheckBox)
+from PyQt5.QtCore import QFileSystemWatcher, Qt, QTimer
+
+from rosdepviz.cache import ManifestCache
+from rosdepviz.gui_models import ExternalFilterProxy, PackageListModel
+from rosdepviz.gui_workers import GraphRenderer, WorkspaceLoader
+from rosdepviz.manifest import ALL_TYPES, DEFAULT_TYPES, EXEC
+from rosdepviz.overlay import LayeredIndex, prefix_path_install_spaces
+from rosdepviz.parallel import default_jobs
+from rosdepviz.render import RenderCache
+from rosdepviz.workspace import WorkspaceIndex
+
+
+# Entries of the dependency type selector
+DEPENDENCY_TYPE_PRESETS = (
+    ("Build and run dependencies", DEFAULT_TYPES),
+    ("Runtime dependencies only", EXEC),
+    ("All dependencies (with buildtool, test and doc)", ALL_TYPES),
+)
 
 
 class DependencyViewer(QWidget):
+    WATCH_DEBOUNCE_MS = 500  # Quiet period after the last filesystem event before updating
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("ROSDepViz - ROS Package Dependency Viewer")
@@ -37,6 +54,10 @@ class DependencyViewer(QWidget):
                 border-radius: 5px;
                 background-color: #e0e0e0;
             }
+            QLabel#cycle_label {
+                color: #c0392b; /* Red for dependency cycles */
+                font-weight: bold;
+            }
             QComboBox {
                 border: 1px solid #cccccc;
                 border-radius: 3px;
@@ -70,23 +91,16 @@ class DependencyViewer(QWidget):
             QPushButton:hover {
                 background-color: #0056b3;
             }
-            QScrollArea {
+            QListView {
                 border: 1px solid #dddddd;
                 border-radius: 5px;
                 background-color: white;
             }
-            /* Style for clickable internal package names */
-            QLabel.internal_package a {
-                color: #007bff; /* Blue for links */
-                text-decoration: none; /* No underline */
-            }
-            QLabel.internal_package a:hover {
-                text-decoration: underline;
+            QListView::item {
+                padding: 2px 4px;
             }
-            /* Style for external package names */
-            QLabel.external_package {
-                color: #888888; /* Gray for external packages */
-                font-style: italic;
+            QListView::item:hover {
+                background-color: #e8f1fb; /* Hint that workspace packages are clickable */
             }
             """,
         )
@@ -95,103 +109,237 @@ class DependencyViewer(QWidget):
         default_ros_src_dir = os.path.abspath(".")
         self.ros_src_dir = default_ros_src_dir
 
-        self.all_packages = {}  # Stores only packages found within self.ros_src_dir
-        self.forward_dependencies = defaultdict(list)  # package -> [all deps, internal and external]
-        self.reverse_dependencies = defaultdict(list)  # dep -> [internal packages that depend on it]
+        self.dependency_types = DEFAULT_TYPES  # Dependency types followed by lists and graphs
+        # Packages found within self.ros_src_dir
+        self.index = WorkspaceIndex(self.ros_src_dir, types=self.dependency_types)
+        self.underlays = []  # Source directories loaded below self.ros_src_dir, lowest priority first
+        self._loaded_layers = []  # Layers of the last completed load, reused by the next one
 
         self.show_external_packages = True  # New state variable
+        self.jobs = default_jobs()  # Worker processes used to parse manifests
+        self.render_cache = RenderCache.for_user()  # Rendered images shared with the CLI
+        self._loader = None  # WorkspaceLoader currently running, if any
+        self._renderer = None  # GraphRenderer currently running, if any
+        self._reduction_summary = ""  # Edges removed from the last graph, when reduced
+        self._sorted_packages = []  # Mirrors the selector entries after the placeholder
+        self._package_to_restore = None  # Selection to re-apply once a reload finishes
+
+        # Manifest edits are picked up incrementally; the timer coalesces bursts of
+        # events (e.g. a git checkout touching hundreds of manifests) into one update.
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._on_manifest_changed)
+        self.watcher.directoryChanged.connect(self._on_directory_changed)
+        self._changed_manifests = set()  # package.xml paths reported since the last update
+        self._rescan_needed = False  # A watched directory changed: manifests may have come or gone
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(self.WATCH_DEBOUNCE_MS)
+        self._refresh_timer.timeout.connect(self.apply_filesystem_changes)
 
-        self.load_all_package_data()
         self.init_ui()
+        self.load_all_package_data()
 
-    def parse_package_xml(self, package_xml_path):
-        """Parses a package.xml file and returns the package name and its dependencies."""
-        try:
-            tree = ET.parse(package_xml_path)
-            root = tree.getroot()
-
-            name = root.find("name").text if root.find("name") is not None else None
-
-            dependencies = set()
-            for dep_type in ["build_depend", "exec_depend", "depend"]:
-                for dep in root.findall(dep_type):
-                    if dep.text:
-                        dependencies.add(dep.text)
-            return name, list(dependencies)
-        except Exception as exc:
-            print(f"Error parsing {package_xml_path}: {exc}")
-            return None, []
+    @property
+    def graph(self):
+        """Dependency graph shared with the CLI, rebuilt lazily whenever the index changes."""
+        return self.index.graph
 
     def find_package_xml_path(self, package_name):
-        """Searches for a package.xml file for a given package name within the current self.ros_src_dir."""
-        for root, _, files in os.walk(self.ros_src_dir):
-            if "package.xml" in files:
-                package_xml_path = os.path.join(root, "package.xml")
-                name, _ = self.parse_package_xml(package_xml_path)
-                if name == package_name:
-                    return package_xml_path
-        return None
-
-    def _gather_package_xml_files(self):
-        package_xml_files = []
-        if os.path.isdir(self.ros_src_dir):
-            for root, _, files in os.walk(self.ros_src_dir):
-                if "package.xml" in files:
-                    package_xml_files.append(os.path.join(root, "package.xml"))
-        return package_xml_files
-
-    def _first_pass_load_packages(self, package_xml_files):
-        for pkg_xml_path in package_xml_files:
-            name, deps = self.parse_package_xml(pkg_xml_path)
-            if name:
-                self.all_packages[name] = pkg_xml_path  # Only packages found in ROS_SRC_DIR
-                self.forward_dependencies[name] = deps  # Store all dependencies
-
-    def _second_pass_build_reverse_dependencies(self):
-        for pkg_name, deps in self.forward_dependencies.items():
-            for dep in deps:
-                if dep in self.all_packages:  # Only if the dependent is an internal package
-                    self.reverse_dependencies[dep].append(pkg_name)
-
-    def load_all_package_data(self):
-        """Loads all package data and builds dependency maps from the current self.ros_src_dir."""
+        """Returns the package.xml path for a given package name within the current self.ros_src_dir."""
+        return self.index.find_package_xml(package_name)
+
+    def load_all_package_data(self, reuse_layers=False):
+        """Starts loading package data from the current self.ros_src_dir in the background.
+
+        Packages show up in the selector in batches while the scan runs, and any
+        load still in flight is cancelled first. With `reuse_layers`, the layers
+        of the last completed load are refreshed instead of scanned again.
+        """
+        # The loader takes the layers over; a cancelled load leaves nothing to reuse
+        previous_layers = self._loaded_layers if reuse_layers else []
+        self._loaded_layers = []
+        self._cancel_loading()
+        self._stop_watching()
         print(f"Loading all package data from: {self.ros_src_dir}...")
-        self.all_packages = {}
-        self.forward_dependencies = defaultdict(list)
-        self.reverse_dependencies = defaultdict(list)
 
-        package_xml_files = self._gather_package_xml_files()
+        if self.package_selector.currentIndex() > 0:
+            self._package_to_restore = self.package_selector.currentText()
 
-        # First pass: get all package names and their direct dependencies
-        self._first_pass_load_packages(package_xml_files)
+        self.index = WorkspaceIndex(self.ros_src_dir, types=self.dependency_types)
+        self._sorted_packages = []
+
+        self.package_selector.blockSignals(True)
+        self.package_selector.clear()
+        self.package_selector.addItem("Select a package...")
+        self.package_selector.blockSignals(False)
+        self.package_selector.setCurrentIndex(0)
+        self.on_package_selected(0)
+
+        install_spaces = prefix_path_install_spaces() if self.install_spaces_checkbox.isChecked() else []
+        self._loader = WorkspaceLoader(self.ros_src_dir, jobs=self.jobs, types=self.dependency_types,
+                                       underlays=self.underlays, install_spaces=install_spaces,
+                                       previous_layers=previous_layers, parent=self)
+        self._loader.packages_loaded.connect(self._on_packages_loaded)
+        self._loader.progress.connect(self._on_load_progress)
+        self._loader.loaded.connect(self._on_load_finished)
+        self._loader.finished.connect(self._loader.deleteLater)
+
+        self.load_progress.setRange(0, 0)
+        self.load_progress.show()
+        self.cancel_load_button.show()
+        self._loader.start()
+
+    def _cancel_loading(self):
+        if self._loader is not None:
+            self._loader.cancel()
+            self._loader = None
+
+    def cancel_loading(self):
+        """Stops the running load; packages loaded so far stay browsable."""
+        if self._loader is None:
+            return
+        self._cancel_loading()
+        self._finish_loading()
+        print(f"Loading cancelled after {len(self.index)} packages.")
+
+    def _on_packages_loaded(self, packages):
+        if self.sender() is not self._loader:
+            return  # Late batch from a cancelled load
+        for name, package_xml_path, deps in packages:
+            self.index.add_package(name, package_xml_path, deps)
+            self._insert_package_in_selector(name)
+
+        if self._package_to_restore in self.index:
+            self._select_package(self._package_to_restore)
+            self._package_to_restore = None
+        else:
+            # Dependents of the package on display may have just arrived
+            current_package = self.current_pkg_name.text()
+            if current_package in self.index:
+                self.display_package_info(current_package)
+
+    def _insert_package_in_selector(self, name):
+        position = bisect.bisect_left(self._sorted_packages, name)
+        self._sorted_packages.insert(position, name)
+        self.package_selector.blockSignals(True)
+        self.package_selector.insertItem(position + 1, name)  # +1 for the placeholder
+        self.package_selector.blockSignals(False)
+
+    def _remove_package_from_selector(self, name):
+        position = bisect.bisect_left(self._sorted_packages, name)
+        if position == len(self._sorted_packages) or self._sorted_packages[position] != name:
+            return
+        del self._sorted_packages[position]
+        was_current = self.package_selector.currentIndex() == position + 1
+        self.package_selector.blockSignals(True)
+        self.package_selector.removeItem(position + 1)
+        self.package_selector.blockSignals(False)
+        if was_current:
+            self.package_selector.setCurrentIndex(0)
+            self.on_package_selected(0)
+
+    def _select_package(self, name):
+        idx = self.package_selector.findText(name)
+        if idx != -1:
+            self.package_selector.setCurrentIndex(idx)
+            self.display_package_info(name)
+
+    def _on_load_progress(self, done, total):
+        if self.sender() is not self._loader:
+            return
+        self.load_progress.setRange(0, total)
+        self.load_progress.setValue(done)
+        if total:
+            self.load_progress.setFormat("Loading packages... %v/%m")
 
-        # Second pass: build reverse dependencies, only for internal packages
-        self._second_pass_build_reverse_dependencies()
+    def _on_load_finished(self, index):
+        if self.sender() is not self._loader:
+            return
+        self._loader = None
+        if index is not None:
+            index.set_types(self.dependency_types)  # The selection may have changed during the load
+            self.index = index
+            self._loaded_layers = index.layers if isinstance(index, LayeredIndex) else [index]
+            current_package = self.current_pkg_name.text()
+            if current_package in self.index:
+                self.display_package_info(current_package)  # Now with transitive counts
+            self._update_watched_paths()
+        self._finish_loading()
         print("Package data loaded.")
 
-        # Update the package selector if it exists
-        if hasattr(self, "package_selector"):
-            current_selected_package = (
-                self.package_selector.currentText()
-                if self.package_selector.currentIndex() != 0
-                else None
-            )
+    def _stop_watching(self):
+        self._refresh_timer.stop()
+        self._changed_manifests.clear()
+        self._rescan_needed = False
+        watched = self.watcher.files() + self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+
+    def _update_watched_paths(self):
+        """Watches every scanned directory (new or removed packages) and every manifest (edits)."""
+        wanted = set(self.index.watch_dirs) | set(self.index.manifests)
+        watched = set(self.watcher.files()) | set(self.watcher.directories())
+        stale = watched - wanted
+        if stale:
+            self.watcher.removePaths(list(stale))
+        new = wanted - watched
+        if new:
+            self.watcher.addPaths(sorted(new))
+
+    def _on_manifest_changed(self, path):
+        self._changed_manifests.add(path)
+        self._refresh_timer.start()  # Restarting the timer debounces bursts of events
+
+    def _on_directory_changed(self, _path):
+        self._rescan_needed = True
+        self._refresh_timer.start()
+
+    def apply_filesystem_changes(self):
+        """Re-reads the manifests that changed on disk and updates the lists.
+
+        Edited manifests are re-read directly; the tree is only rescanned when
+        a watched directory changed. The dependency graph is then rebuilt from
+        the index in memory, without parsing anything else.
+        """
+        if self._loader is not None:
+            return  # A full load is in progress and will pick the changes up
+        cache = ManifestCache.for_workspace(self.ros_src_dir)
+        if self._rescan_needed:
+            changes = self.index.refresh(cache=cache)
+        else:
+            changes = self.index.update_manifests(sorted(self._changed_manifests), cache)
+            cache.save()
+        self._changed_manifests.clear()
+        self._rescan_needed = False
+        self._update_watched_paths()
+        if not changes:
+            return
+        print(f"Updated {len(changes)} package(s) from changed manifests.")
 
-            self.package_selector.clear()
-            self.package_selector.addItem("Select a package...")
-            self.package_selector.addItems(sorted(self.all_packages.keys()))
-
-            if current_selected_package and current_selected_package in self.all_packages:
-                idx = self.package_selector.findText(current_selected_package)
-                if idx != -1:
-                    self.package_selector.setCurrentIndex(idx)
-                    self.display_package_info(current_selected_package)
-                else:
-                    self.package_selector.setCurrentIndex(0)
-                    self.display_package_info("<i>No package selected</i>")
+        for name in changes:
+            if name in self.index:
+                if name not in self._sorted_packages:
+                    self._insert_package_in_selector(name)
             else:
-                self.package_selector.setCurrentIndex(0)
-                self.display_package_info("<i>No package selected</i>")
+                self._remove_package_from_selector(name)
+
+        current_package = self.current_pkg_name.text()
+        if current_package in self.index:
+            self.display_package_info(current_package)
+
+    def closeEvent(self, event):
+        # Worker threads must not outlive the widget that owns them
+        self._cancel_loading()
+        self._cancel_render()
+        for worker in self.findChildren(WorkspaceLoader) + self.findChildren(GraphRenderer):
+            worker.cancel()
+            worker.wait()
+        super().closeEvent(event)
+
+    def _finish_loading(self):
+        self.load_progress.hide()
+        self.cancel_load_button.hide()
+        self._package_to_restore = None
 
     def init_ui(self):
         main_layout = QVBoxLayout()
@@ -209,13 +357,32 @@ class DependencyViewer(QWidget):
         path_layout.addWidget(self.browse_button)
         main_layout.addLayout(path_layout)
 
+        # Underlay source directories, loaded below the ROS source directory
+        underlay_layout = QHBoxLayout()
+        self.underlays_input = QLineEdit(self)
+        self.underlays_input.setReadOnly(True)
+        self.underlays_input.setPlaceholderText("(none)")
+        self.add_underlay_button = QPushButton("Add...", self)
+        self.add_underlay_button.setFixedWidth(80)
+        self.add_underlay_button.setToolTip("Add a source directory below the ones already listed")
+        self.add_underlay_button.clicked.connect(self.add_underlay_directory)
+        self.clear_underlays_button = QPushButton("Clear", self)
+        self.clear_underlays_button.setFixedWidth(80)
+        self.clear_underlays_button.clicked.connect(self.clear_underlays)
+
+        underlay_layout.addWidget(QLabel("Underlays:"))
+        underlay_layout.addWidget(self.underlays_input)
+        underlay_layout.addWidget(self.add_underlay_button)
+        underlay_layout.addWidget(self.clear_underlays_button)
+        main_layout.addLayout(underlay_layout)
+        self._update_underlays_input()
+
         # Package Selector (Dropdown) and Refresh Button
         selector_row_layout = QHBoxLayout()
         self.package_selector = QComboBox(self)
 
-        # Add a placeholder item and then the actual packages
+        # Add a placeholder item; packages are added as they are loaded
         self.package_selector.addItem("Select a package...")
-        self.package_selector.addItems(sorted(self.all_packages.keys()))
         self.package_selector.setCurrentIndex(0)  # Set initial selection to placeholder
 
         self.package_selector.currentIndexChanged.connect(self.on_package_selected)
@@ -232,23 +399,42 @@ class DependencyViewer(QWidget):
         selector_row_layout.addWidget(self.package_selector)
         selector_row_layout.addWidget(self.refresh_button)
         selector_row_layout.addWidget(self.toggle_external_button)
+
+        # Sourced install spaces ($AMENT_PREFIX_PATH, $CMAKE_PREFIX_PATH) as underlays
+        self.install_spaces_checkbox = QCheckBox("Include install spaces", self)
+        install_spaces = prefix_path_install_spaces()
+        self.install_spaces_checkbox.setToolTip(
+            "Read the packages installed in the sourced install spaces as underlays:\n"
+            + ("\n".join(reversed(install_spaces)) if install_spaces else "(none sourced)")
+        )
+        self.install_spaces_checkbox.setEnabled(bool(install_spaces))
+        self.install_spaces_checkbox.toggled.connect(lambda _checked: self.load_all_package_data(reuse_layers=True))
+        selector_row_layout.addWidget(self.install_spaces_checkbox)
         main_layout.addLayout(selector_row_layout)
 
+        # Loading progress, only visible while a workspace is being loaded
+        loading_row_layout = QHBoxLayout()
+        self.load_progress = QProgressBar(self)
+        self.load_progress.setTextVisible(True)
+        self.cancel_load_button = QPushButton("Cancel", self)
+        self.cancel_load_button.setFixedWidth(80)
+        self.cancel_load_button.clicked.connect(self.cancel_loading)
+        loading_row_layout.addWidget(self.load_progress)
+        loading_row_layout.addWidget(self.cancel_load_button)
+        main_layout.addLayout(loading_row_layout)
+        self.load_progress.hide()
+        self.cancel_load_button.hide()
+
         # Content Area
         content_layout = QHBoxLayout()
 
         # Left Panel: Dependencies
         self.deps_label = QLabel("<b>Dependencies:</b>")
-        self.deps_list = QVBoxLayout()
-        self.deps_scroll = QScrollArea()
-        self.deps_scroll.setWidgetResizable(True)
-        deps_widget = QWidget()
-        deps_widget.setLayout(self.deps_list)
-        self.deps_scroll.setWidget(deps_widget)
+        self.deps_model, self.deps_proxy, self.deps_view = self._package_list()
 
         left_panel_layout = QVBoxLayout()
         left_panel_layout.addWidget(self.deps_label)
-        left_panel_layout.addWidget(self.deps_scroll)
+        left_panel_layout.addWidget(self.deps_view)
         content_layout.addLayout(left_panel_layout)
 
         # Center Panel: Current Package
@@ -261,106 +447,124 @@ class DependencyViewer(QWidget):
         center_panel_layout.addWidget(self.current_pkg_label)
         center_panel_layout.addWidget(self.current_pkg_name)
 
+        # Sizes of the full upstream/downstream closure, from the reachability index
+        self.transitive_counts_label = QLabel("")
+        self.transitive_counts_label.setAlignment(Qt.AlignCenter)
+        center_panel_layout.addWidget(self.transitive_counts_label)
+
+        # Names the other members of a dependency cycle the package is part of
+        self.cycle_label = QLabel("")
+        self.cycle_label.setObjectName("cycle_label")
+        self.cycle_label.setAlignment(Qt.AlignCenter)
+        self.cycle_label.setWordWrap(True)
+        center_panel_layout.addWidget(self.cycle_label)
+
         # View graph Button
         self.view_graph_button = QPushButton("View graph", self)
         self.view_graph_button.clicked.connect(self.save_dependency_image)
         center_panel_layout.addWidget(self.view_graph_button)
 
+        # Draw only the edges that are not implied by a longer path
+        self.reduce_edges_checkbox = QCheckBox("Hide redundant edges", self)
+        self.reduce_edges_checkbox.setToolTip("Draw the transitive reduction of the graph")
+        center_panel_layout.addWidget(self.reduce_edges_checkbox)
+
+        # Which dependency types the lists and the graph follow
+        self.dependency_type_selector = QComboBox(self)
+        for label, _ in DEPENDENCY_TYPE_PRESETS:
+            self.dependency_type_selector.addItem(label)
+        self.dependency_type_selector.currentIndexChanged.connect(self.on_dependency_types_selected)
+        center_panel_layout.addWidget(self.dependency_type_selector)
+
+        # Render status, only visible while a graph is being rendered
+        render_row_layout = QHBoxLayout()
+        self.render_status_label = QLabel("")
+        self.cancel_render_button = QPushButton("Cancel", self)
+        self.cancel_render_button.setFixedWidth(80)
+        self.cancel_render_button.clicked.connect(self.cancel_render)
+        render_row_layout.addWidget(self.render_status_label)
+        render_row_layout.addWidget(self.cancel_render_button)
+        center_panel_layout.addLayout(render_row_layout)
+        self.render_status_label.hide()
+        self.cancel_render_button.hide()
+
         center_panel_layout.addStretch(1)
         content_layout.addLayout(center_panel_layout)
 
         # Right Panel: Dependents
         self.dependents_label = QLabel("<b>Dependents:</b>")
-        self.dependents_list = QVBoxLayout()
-        self.dependents_scroll = QScrollArea()
-        self.dependents_scroll.setWidgetResizable(True)
-        dependents_widget = QWidget()
-        dependents_widget.setLayout(self.dependents_list)
-        self.dependents_scroll.setWidget(dependents_widget)
+        self.dependents_model, self.dependents_proxy, self.dependents_view = self._package_list()
 
         right_panel_layout = QVBoxLayout()
         right_panel_layout.addWidget(self.dependents_label)
-        right_panel_layout.addWidget(self.dependents_scroll)
+        right_panel_layout.addWidget(self.dependents_view)
         content_layout.addLayout(right_panel_layout)
 
         main_layout.addLayout(content_layout)
         self.setLayout(main_layout)
 
-    def clear_layout(self, layout):
-        if layout is not None:
-            while layout.count():
-                item = layout.takeAt(0)
-                widget = item.widget()
-                if widget is not None:
-                    widget.deleteLater()
-                else:
-                    self.clear_layout(item.layout())
+    def _package_list(self):
+        """Creates a package panel: model, external filter and a list view that only paints visible rows."""
+        model = PackageListModel(parent=self)
+        proxy = ExternalFilterProxy(self)
+        proxy.setSourceModel(model)
+        view = QListView(self)
+        view.setModel(proxy)
+        view.setUniformItemSizes(True)  # Rows need not be measured one by one
+        view.setEditTriggers(QListView.NoEditTriggers)
+        view.setMouseTracking(True)
+        view.clicked.connect(self._on_package_clicked)
+        view.activated.connect(self._on_package_clicked)
+        return model, proxy, view
+
+    def _on_package_clicked(self, index):
+        if index.data(PackageListModel.InternalRole):  # Workspace package
+            self.display_package_info(index.data(PackageListModel.NameRole))
+
+    def _transitive_counts(self, package_name):
+        """(transitive dependencies, transitive dependents) of a package, or None while loading."""
+        if self._loader is not None or package_name not in self.index:
+            return None
+        reachability = self.index.reachability
+        return reachability.count_dependencies(package_name), reachability.count_dependents(package_name)
+
+    def _cycle_members(self, package_name):
+        """Other packages in a dependency cycle with `package_name` ([] if none), or None while loading."""
+        if self._loader is not None or package_name not in self.index:
+            return None
+        return self.index.reachability.cycle_of(package_name)
 
     def display_package_info(self, package_name):
         self.current_pkg_name.setText(package_name)
-
-        # Clear previous lists
-        self.clear_layout(self.deps_list)
-        self.clear_layout(self.dependents_list)
-
-        # Display Dependencies
-        deps = self.forward_dependencies.get(package_name, [])
-        if deps:
-            for dep in sorted(deps):
-                if not self.show_external_packages and dep not in self.all_packages:
-                    continue  # Skip external packages if hidden
-
-                dep_label = QLabel()
-                dep_label.setTextFormat(Qt.RichText)  # Enable rich text for links
-
-                if dep in self.all_packages:  # Internal package - make clickable
-                    dep_label.setOpenExternalLinks(False)
-                    dep_label.setText(f"<a href=\"{dep}\">{dep}</a>")
-                    dep_label.linkActivated.connect(self.display_package_info)
-                    dep_label.setProperty("class", "internal_package")
-                else:  # External package - plain text, grayed out
-                    dep_label.setText(dep)
-                    dep_label.setProperty("class", "external_package")
-
-                self.deps_list.addWidget(dep_label)
-        else:
-            self.deps_list.addWidget(QLabel("No dependencies found."))
-        self.deps_list.addStretch(1)
-
-        # Display Dependents
-        dependents = self.reverse_dependencies.get(package_name, [])
-        if dependents:
-            for dep in sorted(dependents):
-                if not self.show_external_packages and dep not in self.all_packages:
-                    continue  # This condition should ideally not be met for dependents
-
-                dep_label = QLabel()
-                dep_label.setTextFormat(Qt.RichText)  # Enable rich text for links
-
-                if dep in self.all_packages:  # Internal package - make clickable
-                    dep_label.setOpenExternalLinks(False)
-                    dep_label.setText(f"<a href=\"{dep}\">{dep}</a>")
-                    dep_label.linkActivated.connect(self.display_package_info)
-                    dep_label.setProperty("class", "internal_package")
-                else:  # External package - plain text, grayed out
-                    dep_label.setText(dep)
-                    dep_label.setProperty("class", "external_package")
-
-                self.dependents_list.addWidget(dep_label)
+        counts = self._transitive_counts(package_name)
+        self.transitive_counts_label.setText(
+            f"Transitive: {counts[0]} dependencies, {counts[1]} dependents" if counts else ""
+        )
+        cycle = self._cycle_members(package_name) or []
+        if cycle == [package_name]:
+            self.cycle_label.setText("Depends on itself")
+        elif cycle:
+            self.cycle_label.setText(f"In a dependency cycle with: {', '.join(cycle)}")
         else:
-            self.dependents_list.addWidget(QLabel("No packages depend on this."))
-        self.dependents_list.addStretch(1)
+            self.cycle_label.setText("")
+
+        # Rows are formatted lazily by the models, only once they become visible
+        graph = self.graph
+        self.deps_model.set_packages(graph.dependencies(package_name), graph.is_internal_name,
+                                     self._transitive_counts, cycle, placeholder="No dependencies found.")
+        self.dependents_model.set_packages(graph.dependents(package_name), graph.is_internal_name,
+                                           self._transitive_counts, cycle,
+                                           placeholder="No packages depend on this.")
+        self.deps_view.scrollToTop()
+        self.dependents_view.scrollToTop()
 
     def on_package_selected(self, index):
         # Check if the selected index is the placeholder (index 0)
         if index == 0:
             self.current_pkg_name.setText("<i>No package selected</i>")
-            self.clear_layout(self.deps_list)
-            self.clear_layout(self.dependents_list)
-            self.deps_list.addWidget(QLabel("-"))
-            self.dependents_list.addWidget(QLabel("-"))
-            self.deps_list.addStretch(1)
-            self.dependents_list.addStretch(1)
+            self.transitive_counts_label.setText("")
+            self.deps_model.clear()
+            self.dependents_model.clear()
             return
 
         package_name = self.package_selector.currentText()
@@ -373,11 +577,43 @@ class DependencyViewer(QWidget):
         if new_dir:
             self.ros_src_dir = new_dir
             self.path_input.setText(new_dir)
-            self.load_all_package_data()
+            self.load_all_package_data(reuse_layers=True)
+
+    def add_underlay_directory(self):
+        """Adds a source directory below the ROS source directory and the underlays already listed."""
+        new_dir = QFileDialog.getExistingDirectory(self, "Select Underlay Source Directory", self.ros_src_dir)
+        if not new_dir:
+            return
+        new_dir = os.path.abspath(new_dir)
+        if new_dir == os.path.abspath(self.ros_src_dir) or new_dir in self.underlays:
+            return
+        self.underlays.insert(0, new_dir)
+        self._update_underlays_input()
+        self.load_all_package_data(reuse_layers=True)
+
+    def clear_underlays(self):
+        if not self.underlays:
+            return
+        self.underlays = []
+        self._update_underlays_input()
+        self.load_all_package_data(reuse_layers=True)
+
+    def _update_underlays_input(self):
+        # Highest priority first, like the order packages are looked up in
+        self.underlays_input.setText(os.pathsep.join(reversed(self.underlays)))
+        self.clear_underlays_button.setEnabled(bool(self.underlays))
 
     def refresh_data(self):
         print("Refresh button clicked. Reloading data...")
-        self.load_all_package_data()
+        self.load_all_package_data(reuse_layers=True)
+
+    def on_dependency_types_selected(self, index):
+        """Switches the followed dependency types without re-reading any manifest."""
+        self.dependency_types = DEPENDENCY_TYPE_PRESETS[index][1]
+        self.index.set_types(self.dependency_types)
+        current_package = self.current_pkg_name.text()
+        if current_package in self.index:
+            self.display_package_info(current_package)
 
     def toggle_external_packages(self):
         self.show_external_packages = not self.show_external_packages
@@ -386,35 +622,12 @@ class DependencyViewer(QWidget):
         else:
             self.toggle_external_button.setText("Show External")
 
-        # Re-display info for current package to apply the filter
-        current_package = self.current_pkg_name.text()
-        if current_package and current_package != "<i>No package selected</i>":
-            self.display_package_info(current_package)
-
-    def _build_subgraph_for_package(self, start_package):
-        """Builds subgraph nodes and edges for `start_package` and returns them."""
-        subgraph_nodes = set()
-        subgraph_edges = defaultdict(list)
-
-        queue = [start_package]
-        visited = set()
-
-        while queue:
-            current_pkg = queue.pop(0)
-            if current_pkg in visited:
-                continue
-            visited.add(current_pkg)
-            subgraph_nodes.add(current_pkg)
-
-            deps = self.forward_dependencies.get(current_pkg, [])
-            for dep in deps:
-                subgraph_edges[current_pkg].append(dep)
-                if dep in self.all_packages and dep not in visited:
-                    queue.append(dep)
-
-        return subgraph_nodes, subgraph_edges
+        # The proxies re-filter the rows already in the models
+        self.deps_proxy.set_show_external(self.show_external_packages)
+        self.dependents_proxy.set_show_external(self.show_external_packages)
 
     def save_dependency_image(self):
+        """Renders the current package's dependency graph in the background and opens it when ready."""
         current_package = self.current_pkg_name.text()
         if current_package == "<i>No package selected</i>":
             QMessageBox.warning(
@@ -424,91 +637,73 @@ class DependencyViewer(QWidget):
             )
             return
 
-        progress_dialog = QProgressDialog("Generating image...", "Cancel", 0, 0, self)
-        progress_dialog.setWindowTitle("ROSDepViz")
-        progress_dialog.setWindowModality(Qt.WindowModal)
-        progress_dialog.setCancelButton(None)  # No cancel button
-        progress_dialog.show()
-        QApplication.processEvents()  # Update GUI
-
-        try:
-            dot = graphviz.Digraph(comment="Dependency Tree")
-            dot.attr(rankdir="LR")
-            dot.attr("node", shape="box")
-
-            # Build the subgraph for the static image
-            subgraph_nodes, subgraph_edges = self._build_subgraph_for_package(current_package)
-
-            # Determine leaf nodes within this specific subgraph
-            nodes_with_outgoing = set(subgraph_edges.keys())
-            all_nodes = set(subgraph_nodes)
-            for deps_list in subgraph_edges.values():
-                for dep_node in deps_list:
-                    all_nodes.add(dep_node)
-
-            leaf_nodes = all_nodes - nodes_with_outgoing
-
-            # Add nodes with styling
-            for package in sorted(list(all_nodes)):
-                self._style_node(dot, package, current_package, leaf_nodes)
-
-            # Add edges
-            for package, dependencies in subgraph_edges.items():
-                for dep in dependencies:
-                    dot.edge(package, dep)
-
-            # Render the graph and open the image
-            png_base = os.path.join(
-                tempfile.gettempdir(), f"{current_package}_dependency_tree"
-            )
-            dot.render(png_base, format="png", cleanup=True)
-            png_path = png_base + ".png"
-
-            # Open the image
-            import webbrowser
-
-            if sys.platform == "win32":
-                os.startfile(png_path)
-            else:
-                webbrowser.open(f"file://{png_path}")
-
-        except Exception as exc:
-            QMessageBox.critical(self, "Error", f"An unexpected error occurred: {exc}")
-        finally:
-            progress_dialog.close()
-
-    def _style_node(self, dot, package, current_package, leaf_nodes):
-        """Apply styling to `package` nodes in the DOT graph."""
-        if package == current_package:
-            dot.node(package, style="filled", fillcolor="lightblue")
-            return
-
-        if package in leaf_nodes:
-            if package not in self.all_packages:
-                dot.node(
-                    package,
-                    style="filled",
-                    fillcolor="lightgray",
-                    fontcolor="dimgray",
-                )
-            else:
-                dot.node(package, style="filled", fillcolor="lightgreen")
+        self._cancel_render()
+        self._reduction_summary = ""
+        png_path = os.path.join(tempfile.gettempdir(), f"{current_package}_dependency_tree.png")
+        self._renderer = GraphRenderer(self.graph, current_package, png_path, render_cache=self.render_cache,
+                                       reduce=self.reduce_edges_checkbox.isChecked(), parent=self)
+        self._renderer.reduced.connect(self._on_graph_reduced)
+        self._renderer.rendered.connect(self._on_graph_rendered)
+        self._renderer.failed.connect(self._on_graph_failed)
+        self._renderer.finished.connect(self._renderer.deleteLater)
+
+        self.render_status_label.setText(f"Rendering graph of {current_package}...")
+        self.render_status_label.show()
+        self.cancel_render_button.show()
+        self._renderer.start()
+
+    def _cancel_render(self):
+        if self._renderer is not None:
+            self._renderer.cancel()
+            self._renderer = None
+
+    def cancel_render(self):
+        """Stops the graph render in progress, killing its Graphviz process."""
+        self._cancel_render()
+        self._finish_render()
+
+    def _on_graph_reduced(self, removed, total):
+        if self.sender() is not self._renderer:
             return
+        self._reduction_summary = f"Transitive reduction removed {removed} of {total} edges."
+        print(self._reduction_summary)
+
+    def _on_graph_rendered(self, png_path):
+        if self.sender() is not self._renderer:
+            return  # A cancelled render that finished anyway
+        self._renderer = None
+        self._finish_render()
+        if self._reduction_summary:
+            # Keep the summary on screen next to the graph it describes
+            self.render_status_label.setText(self._reduction_summary)
+            self.render_status_label.show()
+
+        # Open the image
+        import webbrowser
+
+        if sys.platform == "win32":
+            os.startfile(png_path)
+        else:
+            webbrowser.open(f"file://{png_path}")
 
-        if package not in self.all_packages:
-            dot.node(
-                package,
-                style="filled",
-                fillcolor="lightgray",
-                fontcolor="dimgray",
-            )
+    def _on_graph_failed(self, message):
+        if self.sender() is not self._renderer:
             return
+        self._renderer = None
+        self._finish_render()
+        QMessageBox.critical(self, "Error", f"An unexpected error occurred: {message}")
 
-        dot.node(package)
+    def _finish_render(self):
+        self.render_status_label.hide()
+        self.cancel_render_button.hide()
 
 
-if __name__ == "__main__":
+def main():
     app = QApplication([])
     viewer = DependencyViewer()
     viewer.show()
-    app.exec_()
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
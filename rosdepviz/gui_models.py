@@ -0,0 +1,115 @@
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QSortFilterProxyModel, Qt
+from PyQt5.QtGui import QBrush, QColor, QFont
+
+INTERNAL_COLOR = QColor("#007bff")  # Clickable workspace packages
+EXTERNAL_COLOR = QColor("#888888")
+CYCLE_COLOR = QColor("#c0392b")
+
+
+class PackageListModel(QAbstractListModel):
+    """Package names shown in a dependency or dependent panel.
+
+    Rows are only formatted when a view asks for them, so a hub package with
+    hundreds of dependents costs one model reset instead of a widget per
+    name. `counts(name)` returns (transitive dependencies, transitive
+    dependents) or None; it is called lazily for visible workspace packages.
+    When there are no packages, a single `placeholder` row is shown instead.
+    """
+
+    InternalRole = Qt.UserRole + 1  # True for workspace packages, None for the placeholder row
+    NameRole = Qt.UserRole + 2
+
+    def __init__(self, placeholder="-", parent=None):
+        super().__init__(parent)
+        self._names = []
+        self._internal = set()
+        self._in_cycle = set()
+        self._counts = None
+        self._labels = {}  # name -> display text, filled as rows are painted
+        self._placeholder = placeholder
+
+    def set_packages(self, names, is_internal, counts=None, in_cycle=(), placeholder=None):
+        """Replaces the rows with `names`, sorted."""
+        self.beginResetModel()
+        self._names = sorted(names)
+        self._internal = {name for name in self._names if is_internal(name)}
+        self._in_cycle = set(in_cycle)
+        self._counts = counts
+        self._labels = {}
+        if placeholder is not None:
+            self._placeholder = placeholder
+        self.endResetModel()
+
+    def clear(self, placeholder="-"):
+        self.set_packages([], lambda name: False, placeholder=placeholder)
+
+    def names(self):
+        return list(self._names)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._names) or 1
+
+    def flags(self, index):
+        if not self._names:
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if not self._names:
+            if role == Qt.DisplayRole:
+                return self._placeholder
+            return None
+        name = self._names[index.row()]
+        internal = name in self._internal
+        if role == Qt.DisplayRole:
+            return self._label(name, internal)
+        if role == self.NameRole:
+            return name
+        if role == self.InternalRole:
+            return internal
+        if role == Qt.ForegroundRole:
+            if name in self._in_cycle:
+                return QBrush(CYCLE_COLOR)
+            return QBrush(INTERNAL_COLOR if internal else EXTERNAL_COLOR)
+        if role == Qt.FontRole and not internal:
+            font = QFont()
+            font.setItalic(True)
+            return font
+        if role == Qt.ToolTipRole and internal:
+            return f"Show {name}"
+        return None
+
+    def _label(self, name, internal):
+        label = self._labels.get(name)
+        if label is None:
+            label = name
+            counts = self._counts(name) if internal and self._counts is not None else None
+            if counts is not None:
+                label += f"  ({counts[0]} ↓ / {counts[1]} ↑)"
+            if name in self._in_cycle:
+                label += "  (cycle)"
+            self._labels[name] = label
+        return label
+
+
+class ExternalFilterProxy(QSortFilterProxyModel):
+    """Hides the external packages of a PackageListModel when show_external is off."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._show_external = True
+
+    def set_show_external(self, show):
+        if show != self._show_external:
+            self._show_external = show
+            self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._show_external:
+            return True
+        internal = self.sourceModel().index(source_row, 0, source_parent).data(PackageListModel.InternalRole)
+        return internal is not False  # The placeholder row is always shown
@@ -0,0 +1,201 @@
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from rosdepviz.cache import ManifestCache
+from rosdepviz.manifest import DEFAULT_TYPES
+from rosdepviz.overlay import InstallSpaceIndex, LayeredIndex, layer_key
+from rosdepviz.render import RenderCancelled, render_to_file
+from rosdepviz.transform import LARGE_GRAPH_NODES, choose_engine, cycle_edges, simplify
+from rosdepviz.workspace import WorkspaceIndex
+
+
+class WorkspaceLoader(QThread):
+    """Scans and parses a workspace off the UI thread.
+
+    Packages are streamed to the UI in batches through `packages_loaded` as
+    (name, package.xml path, {dep: type mask}) tuples, so they can be browsed before the
+    whole workspace is loaded. `loaded` carries the complete WorkspaceIndex, or
+    None if the load was cancelled or failed.
+
+    With `underlays` (source directories, lowest priority first) or
+    `install_spaces`, they are loaded below `src_dir` and `loaded` carries a
+    LayeredIndex. Layers are loaded from the top one down, so the first
+    package streamed for a name is the one that shadows the others. Layers
+    found in `previous_layers` are refreshed instead of scanned again.
+    """
+
+    packages_loaded = pyqtSignal(list)
+    progress = pyqtSignal(int, int)  # manifests done, manifests total (0, 0 while scanning)
+    loaded = pyqtSignal(object)
+
+    def __init__(self, src_dir, jobs=1, types=DEFAULT_TYPES, underlays=(), install_spaces=(), previous_layers=(),
+                 parent=None):
+        super().__init__(parent)
+        self.src_dir = src_dir
+        self.jobs = jobs
+        self.types = types
+        self.underlays = list(underlays)
+        self.install_spaces = list(install_spaces)
+        self.previous_layers = list(previous_layers)
+        self._cancelled = False
+
+    def cancel(self):
+        """Asks the loader to stop after the batch in progress."""
+        self._cancelled = True
+
+    def run(self):
+        try:
+            self.loaded.emit(self._load())
+        except Exception as exc:
+            print(f"Error loading package data from {self.src_dir}: {exc}")
+            self.loaded.emit(None)
+
+    def _load(self):
+        self.progress.emit(0, 0)
+        # Highest priority first
+        layers = [WorkspaceIndex(src_dir, types=self.types) for src_dir in [self.src_dir] + self.underlays[::-1]]
+        layers.extend(InstallSpaceIndex(prefix, (), self.types) for prefix in reversed(self.install_spaces))
+        previous = {layer_key(layer): layer for layer in self.previous_layers}
+
+        # Reused layers only need a refresh; new ones are scanned before anything is parsed
+        package_xml_files = {}
+        for position, layer in enumerate(layers):
+            old = previous.get(layer_key(layer))
+            if old is not None:
+                old.refresh(ManifestCache.for_workspace(old.src_dir))
+                old.set_types(self.types)
+                layers[position] = old
+            else:
+                package_xml_files[position] = layer.gather_package_xml_files()
+            if self._cancelled:
+                return None
+
+        total = sum(len(files) for files in package_xml_files.values())
+        self.progress.emit(0, total)
+        done_before = 0
+        for position, layer in enumerate(layers):
+            if position not in package_xml_files:
+                self.packages_loaded.emit([(name, layer.packages[name], layer.dependency_types[name])
+                                           for name in layer.packages])
+                continue
+            cache = ManifestCache.for_workspace(layer.src_dir)
+            loads = layer.iter_load_manifests(package_xml_files[position], cache=cache, jobs=self.jobs)
+            for done, _, added in loads:
+                self.packages_loaded.emit(
+                    [(name, layer.packages[name], layer.dependency_types[name]) for name in added]
+                )
+                self.progress.emit(done_before + done, total)
+                if self._cancelled:
+                    loads.close()
+                    return None
+            done_before += len(package_xml_files[position])
+        if len(layers) == 1:
+            return layers[0]
+        return LayeredIndex(reversed(layers), types=self.types)
+
+
+def package_view(graph, package, reduce=False):
+    """Returns the GraphView of everything `package` depends on, ready to be drawn.
+
+    Large graphs have their cycles collapsed and external leaves folded, and
+    `reduce` drops the edges implied by a longer path.
+    """
+    subgraph_nodes, subgraph_edges = graph.subgraph(package)
+    large = len(subgraph_nodes) > LARGE_GRAPH_NODES
+    return simplify(package, subgraph_edges, graph.is_internal_name, collapse=large, fold=large, reduce=reduce)
+
+
+def package_digraph(graph, view):
+    """Builds the styled graphviz Digraph of a package view, laid out with sfdp when it is large."""
+    import graphviz  # Imported by the first render rather than delaying the window
+
+    dot = graphviz.Digraph(comment="Dependency Tree", engine=choose_engine(view.node_count()))
+    dot.attr(rankdir="LR")
+    dot.attr("node", shape="box")
+
+    # Determine leaf nodes within this specific subgraph
+    all_nodes = view.nodes()
+    leaf_nodes = all_nodes - set(view.edges)
+
+    for name in sorted(all_nodes):
+        attributes = view.group_attributes(name)
+        if attributes:
+            dot.node(name, **attributes)
+        elif name == view.root:
+            dot.node(name, style="filled", fillcolor="lightblue")
+        elif not graph.is_internal_name(name):
+            dot.node(name, style="filled", fillcolor="lightgray", fontcolor="dimgray")
+        elif name in leaf_nodes:
+            dot.node(name, style="filled", fillcolor="lightgreen")
+        else:
+            dot.node(name)
+
+    # Edges on a dependency cycle are drawn in red
+    on_cycle = cycle_edges(view)
+    for name, dependencies in view.edges.items():
+        for dep in dependencies:
+            if (name, dep) in on_cycle:
+                dot.edge(name, dep, color="red", penwidth="2")
+            else:
+                dot.edge(name, dep)
+    return dot
+
+
+class GraphRenderer(QThread):
+    """Builds and renders the dependency graph of one package off the UI thread.
+
+    `rendered` carries the path of the finished image and `failed` an error
+    message. With `reduce`, `reduced` reports the number of edges the
+    transitive reduction removed and the number of edges before it. A
+    cancelled render emits neither; cancel() kills the Graphviz process if
+    layout has already started.
+    """
+
+    rendered = pyqtSignal(str)
+    failed = pyqtSignal(str)
+    reduced = pyqtSignal(int, int)  # edges removed, edges before the reduction
+
+    def __init__(self, graph, package, output_path, render_cache=None, reduce=False, parent=None):
+        super().__init__(parent)
+        self.graph = graph  # DependencyGraph snapshots are immutable, so sharing one is safe
+        self.package = package
+        self.output_path = output_path
+        self.render_cache = render_cache
+        self.reduce = reduce
+        self._cancelled = False
+        self._process = None
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Stops the render, killing the Graphviz process if it is running."""
+        with self._lock:
+            self._cancelled = True
+            if self._process is not None and self._process.poll() is None:
+                self._process.kill()
+
+    def _process_started(self, process):
+        with self._lock:
+            self._process = process
+            if self._cancelled:
+                process.kill()
+
+    def run(self):
+        try:
+            view = package_view(self.graph, self.package, reduce=self.reduce)
+            if self.reduce:
+                _, edges = self.graph.subgraph(self.package)
+                self.reduced.emit(len(view.removed_edges), sum(len(deps) for deps in edges.values()))
+            dot = package_digraph(self.graph, view)
+            if self._cancelled:
+                return
+            render_to_file(dot.source, self.output_path, engine=dot.engine, cache=self.render_cache,
+                           process_started=self._process_started)
+        except RenderCancelled:
+            return
+        except Exception as exc:
+            if not self._cancelled:
+                self.failed.emit(str(exc))
+            return
+        if not self._cancelled:
+            self.rendered.emit(self.output_path)
@@ -0,0 +1,223 @@
+import os
+import re
+
+_element_tree = None
+
+
+# Dependency types (REP 140/149), one bit each so an edge can carry several
+BUILD = 1
+BUILD_EXPORT = 2
+BUILDTOOL = 4
+BUILDTOOL_EXPORT = 8
+EXEC = 16
+TEST = 32
+DOC = 64
+ALL_TYPES = BUILD | BUILD_EXPORT | BUILDTOOL | BUILDTOOL_EXPORT | EXEC | TEST | DOC
+# What the original build_depend/exec_depend/depend reading followed: buildtool,
+# test and doc dependencies (catkin, ament_cmake, ...) are opt-in
+DEFAULT_TYPES = BUILD | BUILD_EXPORT | EXEC
+
+# Tag -> the dependency types it declares
+TAG_TYPES = {
+    "build_depend": BUILD,
+    "build_export_depend": BUILD_EXPORT,
+    "buildtool_depend": BUILDTOOL,
+    "buildtool_export_depend": BUILDTOOL_EXPORT,
+    "exec_depend": EXEC,
+    "run_depend": BUILD_EXPORT | EXEC,  # format 1
+    "test_depend": TEST,
+    "doc_depend": DOC,
+    "depend": BUILD | BUILD_EXPORT | EXEC,
+}
+DEPENDENCY_TAGS = tuple(TAG_TYPES)
+
+# Names accepted by parse_dependency_types
+TYPE_NAMES = {
+    "build": BUILD,
+    "build_export": BUILD_EXPORT,
+    "buildtool": BUILDTOOL,
+    "buildtool_export": BUILDTOOL_EXPORT,
+    "exec": EXEC,
+    "test": TEST,
+    "doc": DOC,
+    "runtime": EXEC,
+    "default": DEFAULT_TYPES,
+    "all": ALL_TYPES,
+}
+
+# Variables REP 149 conditions are usually written against
+CONDITION_VARIABLES = ("ROS_VERSION", "ROS_DISTRO", "ROS_PYTHON_VERSION")
+
+
+def parse_dependency_types(value):
+    """Turns a comma-separated list of TYPE_NAMES into a type mask."""
+    mask = 0
+    for name in value.split(","):
+        name = name.strip()
+        if name not in TYPE_NAMES:
+            raise ValueError(f"unknown dependency type '{name}' (expected one of {', '.join(TYPE_NAMES)})")
+        mask |= TYPE_NAMES[name]
+    return mask
+
+
+def default_condition_environment():
+    """Returns the condition variables of the current environment ($ROS_VERSION, $ROS_DISTRO...)."""
+    return {name: os.environ[name] for name in CONDITION_VARIABLES if name in os.environ}
+
+
+_CONDITION_TOKEN = re.compile(r"\s*(?:(==|!=|<=|>=|<|>|\(|\))|\$([A-Za-z_][A-Za-z0-9_]*)"
+                              r"|\"([^\"]*)\"|'([^']*)'|([A-Za-z0-9_.\-]+))")
+
+
+def _tokenize_condition(expression):
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _CONDITION_TOKEN.match(expression, position)
+        if match is None:
+            raise ValueError(f"unexpected '{expression[position:].strip()}'")
+        operator, variable, double_quoted, single_quoted, word = match.groups()
+        if operator:
+            tokens.append(("op", operator))
+        elif variable:
+            tokens.append(("var", variable))
+        elif word in ("and", "or"):
+            tokens.append(("op", word))
+        else:
+            literal = word if word is not None else (double_quoted if double_quoted is not None else single_quoted)
+            tokens.append(("str", literal))
+        position = match.end()
+    return tokens
+
+
+def evaluate_condition(expression, environment):
+    """Evaluates a REP 149 `condition` attribute against `environment`.
+
+    The grammar is comparisons (==, !=, <, <=, >, >=) of $VARIABLES and
+    literals, combined with `and`, `or` and parentheses. Like catkin_pkg,
+    values compare as strings and unset variables are empty. Raises
+    ValueError on a malformed expression.
+    """
+    tokens = _tokenize_condition(expression)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else (None, None)
+
+    def take():
+        nonlocal position
+        token = peek()
+        position += 1
+        return token
+
+    def value():
+        kind, text = take()
+        if kind == "var":
+            return environment.get(text, "")
+        if kind == "str":
+            return text
+        raise ValueError(f"expected a value in '{expression}'")
+
+    def comparison():
+        if peek() == ("op", "("):
+            take()
+            result = disjunction()
+            if take() != ("op", ")"):
+                raise ValueError(f"missing ')' in '{expression}'")
+            return result
+        left = value()
+        kind, operator = take()
+        if kind != "op" or operator not in ("==", "!=", "<", "<=", ">", ">="):
+            raise ValueError(f"expected a comparison in '{expression}'")
+        right = value()
+        return {"==": left == right, "!=": left != right, "<": left < right,
+                "<=": left <= right, ">": left > right, ">=": left >= right}[operator]
+
+    def conjunction():
+        result = comparison()
+        while peek() == ("op", "and"):
+            take()
+            result = comparison() and result
+        return result
+
+    def disjunction():
+        result = conjunction()
+        while peek() == ("op", "or"):
+            take()
+            result = conjunction() or result
+        return result
+
+    result = disjunction()
+    if position != len(tokens):
+        raise ValueError(f"unexpected '{tokens[position][1]}' in '{expression}'")
+    return result
+
+
+def resolve_dependencies(records, environment=None, types=ALL_TYPES):
+    """Turns parse_manifest records into {dependency: type mask}, in declaration order.
+
+    Records whose condition is false in `environment` are dropped; a malformed
+    condition is reported and treated as true. Only types in `types` are kept.
+    """
+    environment = default_condition_environment() if environment is None else environment
+    dependencies = {}
+    for dep, mask, condition in records:
+        mask &= types
+        if not mask:
+            continue
+        if condition:
+            try:
+                if not evaluate_condition(condition, environment):
+                    continue
+            except ValueError as e:
+                print(f"Warning: ignoring invalid condition on dependency {dep}: {e}")
+        dependencies[dep] = dependencies.get(dep, 0) | mask
+    return dependencies
+
+
+def element_tree():
+    """Returns the ElementTree module used to parse manifests, imported on first use.
+
+    defusedxml is used when it is installed. Commands answered from the
+    manifest cache never parse XML, so they do not pay for the import.
+    """
+    global _element_tree
+    if _element_tree is None:
+        try:
+            import defusedxml.ElementTree as ET
+        except Exception:
+            import xml.etree.ElementTree as ET  # fallback when defusedxml not available
+        _element_tree = ET
+    return _element_tree
+
+
+def parse_manifest(package_xml_path):
+    """Parses a package.xml file and returns its name and typed dependency records.
+
+    Records are (dependency, type mask, condition or None) in declaration
+    order, with conditions left unevaluated so the result does not depend on
+    the environment and can be cached as is.
+    """
+    try:
+        tree = element_tree().parse(package_xml_path)
+        root = tree.getroot()
+
+        name_elem = root.find("name")
+        name = name_elem.text.strip() if name_elem is not None and name_elem.text else None
+
+        records = []
+        for child in root:
+            mask = TAG_TYPES.get(child.tag)
+            if mask is not None and child.text and child.text.strip():
+                records.append((child.text.strip(), mask, child.get("condition")))
+        return name, records
+    except Exception as e:
+        print(f"Error parsing {package_xml_path}: {e}")
+        return None, []
+
+
+def parse_package_xml(package_xml_path, environment=None, types=DEFAULT_TYPES):
+    """Parses a package.xml file and returns the package name and its dependencies."""
+    name, records = parse_manifest(package_xml_path)
+    return name, list(resolve_dependencies(records, environment, types))
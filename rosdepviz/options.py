@@ -0,0 +1,80 @@
+import argparse
+
+from rosdepviz.manifest import DEFAULT_TYPES, default_condition_environment, parse_dependency_types
+from rosdepviz.parallel import default_jobs
+from rosdepviz.scanner import DEFAULT_EXCLUDES
+
+# Command-line options shared by rosdepviz.cli and the `rosdepviz` subcommands.
+# Only light modules are imported here: every command builds its parser first.
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value}")
+    return number
+
+
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"expected a non-negative integer, got {value}")
+    return number
+
+
+def dependency_types(value):
+    try:
+        return parse_dependency_types(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def condition_assignment(value):
+    name, sep, setting = value.partition("=")
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"expected VARIABLE=VALUE, got {value}")
+    return name, setting
+
+
+def add_workspace_arguments(parser):
+    """Adds the options selecting what is scanned and how manifests are read and cached."""
+    parser.add_argument("-j", "--jobs", type=positive_int, default=default_jobs(),
+                        help="number of worker processes used to parse manifests (default: CPU count)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="PATTERN",
+                        help="glob for directories to skip while scanning, in addition to "
+                             f"{', '.join(DEFAULT_EXCLUDES)} (may be repeated)")
+    parser.add_argument("--underlay", action="append", default=[], metavar="DIR",
+                        help="source workspace below the current directory; packages of the current directory "
+                             "shadow it (may be repeated, lowest priority first)")
+    parser.add_argument("--install-space", action="append", default=[], metavar="PREFIX",
+                        help="install space whose share/*/package.xml are read as an underlay below every source "
+                             "directory (may be repeated, lowest priority first)")
+    parser.add_argument("--prefix-path", action="store_true",
+                        help="add the install spaces of $AMENT_PREFIX_PATH and $CMAKE_PREFIX_PATH as the lowest layers")
+    parser.add_argument("--dep-types", type=dependency_types, default=DEFAULT_TYPES, metavar="TYPES",
+                        help="comma-separated dependency types to follow: build, build_export, buildtool, "
+                             "buildtool_export, exec, test, doc, runtime (= exec), default (build, "
+                             "build_export and exec) or all (default: default)")
+    parser.add_argument("--ros-version", default=None, metavar="N",
+                        help="value of $ROS_VERSION in dependency conditions (default: from the environment)")
+    parser.add_argument("--ros-distro", default=None, metavar="NAME",
+                        help="value of $ROS_DISTRO in dependency conditions (default: from the environment)")
+    parser.add_argument("--condition", action="append", type=condition_assignment, default=[],
+                        metavar="VAR=VALUE", help="set another variable used by dependency conditions (may be repeated)")
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument("--no-cache", action="store_true",
+                             help="parse every package.xml and render every graph without reading or "
+                                  "writing the manifest and render caches")
+    cache_group.add_argument("--rebuild-cache", action="store_true",
+                             help="ignore the manifest cache on disk and rewrite it from scratch")
+
+
+def condition_environment(args):
+    """Returns the variables dependency conditions are evaluated with, given the options of add_workspace_arguments."""
+    environment = default_condition_environment()
+    environment.update(args.condition)
+    if args.ros_version is not None:
+        environment["ROS_VERSION"] = args.ros_version
+    if args.ros_distro is not None:
+        environment["ROS_DISTRO"] = args.ros_distro
+    return environment
@@ -0,0 +1,190 @@
+import os
+
+from rosdepviz.cache import ManifestCache
+from rosdepviz.manifest import DEFAULT_TYPES
+from rosdepviz.scanner import DEFAULT_EXCLUDES, ScanStats
+from rosdepviz.workspace import WorkspaceIndex
+
+# Environment variables listing install spaces, the most recently sourced first
+PREFIX_PATH_VARIABLES = ("AMENT_PREFIX_PATH", "CMAKE_PREFIX_PATH")
+
+
+def prefix_path_install_spaces(environ=None):
+    """Returns the install spaces of $AMENT_PREFIX_PATH and $CMAKE_PREFIX_PATH, underlays first.
+
+    Both variables list the last sourced prefix first, so the order is
+    reversed; prefixes listed in both only keep their highest priority and
+    prefixes that do not exist are skipped.
+    """
+    environ = os.environ if environ is None else environ
+    prefixes = []
+    for variable in PREFIX_PATH_VARIABLES:
+        for prefix in environ.get(variable, "").split(os.pathsep):
+            prefix = os.path.abspath(prefix) if prefix else ""
+            if prefix and prefix not in prefixes and os.path.isdir(prefix):
+                prefixes.append(prefix)
+    return prefixes[::-1]
+
+
+class InstallSpaceIndex(WorkspaceIndex):
+    """WorkspaceIndex of an install space, built from the installed share/<package>/package.xml files."""
+
+    def gather_package_xml_files(self):
+        """Lists share/*/package.xml below the prefix, recording ScanStats."""
+        self.scan_stats = ScanStats()
+        self.watch_dirs = []
+        share = os.path.join(self.src_dir, "share")
+        try:
+            with os.scandir(share) as it:
+                names = sorted(entry.name for entry in it if entry.is_dir())
+        except OSError:
+            return []
+        self.scan_stats.dirs_visited = 1
+        self.watch_dirs.append(share)
+        package_xml_files = []
+        for name in names:
+            package_xml = os.path.join(share, name, "package.xml")
+            if os.path.isfile(package_xml):
+                package_xml_files.append(package_xml)
+        self.scan_stats.manifests_found = len(package_xml_files)
+        return package_xml_files
+
+
+def layer_key(layer):
+    """Identifies a layer across reloads: its kind and directory."""
+    return type(layer).__name__, layer.src_dir
+
+
+class LayeredIndex(WorkspaceIndex):
+    """An underlay/overlay stack of indexes merged into one.
+
+    `layers` go from the lowest priority (the underlay) to the highest (the
+    overlay being worked on): a package found in several layers is taken,
+    with its dependencies, from the last one, like sourcing the setup files
+    in that order. Every layer keeps its own manifest cache, so a change in
+    one layer only re-reads that layer. `src_dir` is the top layer's.
+    """
+
+    def __init__(self, layers, types=DEFAULT_TYPES, environment=None):
+        layers = list(layers)
+        super().__init__(layers[-1].src_dir, layers[-1].exclude, types, environment)
+        self.layers = layers
+        self.layer_of = {}  # name -> position in `layers` of the manifest in use
+        self.shadowed = {}  # name -> [package.xml paths hidden by a higher layer], lowest first
+        self.merge()
+
+    @classmethod
+    def scan_layers(cls, layers, cache=True, rebuild_cache=False, jobs=1, types=DEFAULT_TYPES, environment=None,
+                    previous=()):
+        """Loads `layers` (unloaded WorkspaceIndex objects, underlay first) and merges them.
+
+        Layers matching one of the `previous` layers (see layer_key) are not
+        scanned again; the previous layer is refreshed instead.
+        """
+        reusable = {layer_key(layer): layer for layer in previous}
+        loaded = []
+        for layer in layers:
+            layer_cache = ManifestCache.for_workspace(layer.src_dir, rebuild=rebuild_cache) if cache else None
+            old = reusable.get(layer_key(layer))
+            if old is not None:
+                old.refresh(layer_cache)
+                loaded.append(old)
+            else:
+                layer.load(layer_cache, jobs)
+                loaded.append(layer)
+        return cls(loaded, types, environment)
+
+    def merge(self):
+        """Rebuilds the merged lookups from the layers."""
+        self.packages = {}
+        self.dependency_types = {}
+        self.layer_of = {}
+        self.shadowed = {}
+        self.manifests = {}
+        self.signatures = {}
+        self.watch_dirs = []
+        self.scan_stats = ScanStats()
+        for position, layer in enumerate(self.layers):
+            for name, package_xml_path in layer.packages.items():
+                if name in self.packages:
+                    self.shadowed.setdefault(name, []).append(self.packages[name])
+                self.packages[name] = package_xml_path
+                self.dependency_types[name] = layer.dependency_types[name]
+                self.layer_of[name] = position
+            self.manifests.update(layer.manifests)
+            self.signatures.update(layer.signatures)
+            self.watch_dirs.extend(layer.watch_dirs)
+            for field in ScanStats.__slots__:
+                setattr(self.scan_stats, field, getattr(self.scan_stats, field) + getattr(layer.scan_stats, field))
+        self.dependencies = {name: [dep for dep, mask in deps.items() if mask & self.types]
+                             for name, deps in self.dependency_types.items()}
+        self._graph = None
+
+    def layer_for(self, package_name):
+        """Returns the layer providing `package_name`, or None if it is external."""
+        position = self.layer_of.get(package_name)
+        return None if position is None else self.layers[position]
+
+    def _layer_cache(self, layer, cache):
+        # `cache` belongs to the top layer; the others use their own file next to it
+        if cache is None or layer.src_dir == self.src_dir:
+            return cache
+        return ManifestCache.for_workspace(layer.src_dir, os.path.dirname(cache.path))
+
+    def _changes_since(self, packages, dependency_types, dependencies):
+        changes = {}
+        for name in set(packages) | set(self.packages):
+            if (packages.get(name), dependency_types.get(name)) != (self.packages.get(name),
+                                                                    self.dependency_types.get(name)):
+                changes[name] = dependencies.get(name)
+        return changes
+
+    def load(self, cache=None, jobs=1):
+        """(Re)loads every layer; see refresh() for how `cache` is used."""
+        for layer in self.layers:
+            layer.load(self._layer_cache(layer, cache), jobs)
+        self.merge()
+
+    def refresh(self, cache=None):
+        """Refreshes every layer and returns the merged changes, like WorkspaceIndex.refresh.
+
+        `cache` is the top layer's ManifestCache; when it is given, the other
+        layers use their own cache files in the same directory.
+        """
+        before = (dict(self.packages), dict(self.dependency_types), dict(self.dependencies))
+        for layer in self.layers:
+            layer.refresh(self._layer_cache(layer, cache))
+        self.merge()
+        return self._changes_since(*before)
+
+    def update_manifests(self, package_xml_paths, cache=None, live=None):
+        """Re-reads the given manifests in the layers below which they live; see WorkspaceIndex.update_manifests."""
+        before = (dict(self.packages), dict(self.dependency_types), dict(self.dependencies))
+        remaining = list(package_xml_paths)
+        for layer in reversed(self.layers):
+            prefix = os.path.join(layer.src_dir, "")
+            paths = [path for path in remaining if path.startswith(prefix)]
+            if paths:
+                layer.update_manifests(paths, self._layer_cache(layer, cache), live)
+                remaining = [path for path in remaining if not path.startswith(prefix)]
+        self.merge()
+        return self._changes_since(*before)
+
+    def copy(self):
+        other = super().copy()
+        other.layers = [layer.copy() for layer in self.layers]
+        other.layer_of = dict(self.layer_of)
+        other.shadowed = dict(self.shadowed)
+        return other
+
+    def set_types(self, types):
+        super().set_types(types)
+        for layer in self.layers:
+            layer.set_types(types)
+
+
+def build_layers(src_dirs, install_spaces=(), exclude=DEFAULT_EXCLUDES, types=DEFAULT_TYPES, environment=None):
+    """Returns the unloaded layers for LayeredIndex.scan_layers: install spaces, then source directories."""
+    layers = [InstallSpaceIndex(prefix, (), types, environment) for prefix in install_spaces]
+    layers.extend(WorkspaceIndex(src_dir, exclude, types, environment) for src_dir in src_dirs)
+    return layers
@@ -0,0 +1,65 @@
+import os
+import sys
+
+from rosdepviz.manifest import parse_manifest
+
+# Below this many manifests the cost of starting worker processes outweighs the gain.
+MIN_PARALLEL_MANIFESTS = 64
+
+
+def default_jobs():
+    """Returns the default worker count: the number of CPUs available to this process."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def _worker_start_method():
+    # Forking copies the parent's threads' state (the GUI scans from a QThread, with
+    # Qt's threads and locks around); a forkserver is forked from a clean process
+    return "forkserver" if sys.platform.startswith("linux") else "spawn"
+
+
+def _parse_batch(package_xml_paths):
+    return [parse_manifest(path) for path in package_xml_paths]
+
+
+def _batches(items, batch_size):
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+
+def parse_manifests(package_xml_paths, jobs=1):
+    """Parses `package_xml_paths` and returns their (name, records) in input order.
+
+    With `jobs` > 1 the manifests are split into batches and parsed by a process
+    pool; results are merged back in input order so the outcome is identical to
+    a sequential parse.
+    """
+    return list(iter_parse_manifests(package_xml_paths, jobs))
+
+
+def iter_parse_manifests(package_xml_paths, jobs=1):
+    """Generator form of parse_manifests, yielding results in input order as they arrive.
+
+    Closing the generator early cancels the batches that have not started yet.
+    """
+    package_xml_paths = list(package_xml_paths)
+    jobs = default_jobs() if jobs is None else jobs
+    if jobs <= 1 or len(package_xml_paths) < MIN_PARALLEL_MANIFESTS:
+        for path in package_xml_paths:
+            yield parse_manifest(path)
+        return
+
+    # Pull in multiprocessing only when a pool is needed
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # A few batches per worker keeps the pool busy without paying per-file IPC
+    batch_size = max(1, len(package_xml_paths) // (jobs * 4))
+    executor = ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context(_worker_start_method()))
+    try:
+        for batch_result in executor.map(_parse_batch, _batches(package_xml_paths, batch_size)):
+            yield from batch_result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
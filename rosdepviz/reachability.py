@@ -0,0 +1,105 @@
+class ReachabilityIndex:
+    """Transitive dependency/dependent lookups for a DependencyGraph.
+
+    The graph is condensed into its strongly connected components and, walking
+    the condensation in topological order, every component gets a bitset (a
+    Python int indexed by node id) of the nodes it reaches. Building costs one
+    pass over the edges; afterwards "does X depend on Y" is a bit test and the
+    closure sizes are popcounts.
+    """
+
+    __slots__ = ("graph", "components", "component_of", "_descendants", "_ancestors")
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.components = graph.strongly_connected_components()
+        self.component_of = [0] * len(graph)
+        for comp_id, members in enumerate(self.components):
+            for node in members:
+                self.component_of[node] = comp_id
+        self._descendants = self._closure(graph.successors, reversed_order=False)
+        self._ancestors = self._closure(graph.predecessors, reversed_order=True)
+
+    def _closure(self, neighbours, reversed_order):
+        # Components are in reverse topological order (dependencies first), so
+        # descendants are complete when each component is reached; for
+        # ancestors the order is walked backwards.
+        component_of = self.component_of
+        masks = [0] * len(self.components)
+        order = range(len(self.components) - 1, -1, -1) if reversed_order else range(len(self.components))
+        for comp_id in order:
+            members = self.components[comp_id]
+            mask = 0
+            cyclic = len(members) > 1
+            for node in members:
+                for target in neighbours(node):
+                    target_comp = component_of[target]
+                    if target_comp == comp_id:
+                        cyclic = True  # Self-loop
+                        continue
+                    mask |= masks[target_comp] | (1 << target)
+            if cyclic:
+                for node in members:
+                    mask |= 1 << node
+            masks[comp_id] = mask
+        return masks
+
+    def _names(self, mask, exclude, internal_only):
+        names = []
+        limit = self.graph.internal_count if internal_only else len(self.graph)
+        while mask:
+            low = mask & -mask
+            node = low.bit_length() - 1
+            if node >= limit:
+                break  # Ids grow with the bits; only external ids remain
+            if node != exclude:
+                names.append(self.graph.name_of(node))
+            mask ^= low
+        return names
+
+    def _mask(self, masks, name):
+        node = self.graph.id_of(name)
+        if node is None:
+            return None, 0
+        return node, masks[self.component_of[node]]
+
+    def dependencies_of(self, name, internal_only=False):
+        """All packages `name` depends on, directly or transitively, sorted by id."""
+        node, mask = self._mask(self._descendants, name)
+        return self._names(mask, node, internal_only)
+
+    def dependents_of(self, name):
+        """All workspace packages that depend on `name`, directly or transitively."""
+        node, mask = self._mask(self._ancestors, name)
+        return self._names(mask, node, internal_only=False)
+
+    def depends_on(self, name, dependency):
+        """True if `name` depends on `dependency`, directly or transitively."""
+        target = self.graph.id_of(dependency)
+        if target is None:
+            return False
+        _, mask = self._mask(self._descendants, name)
+        return bool(mask >> target & 1)
+
+    def count_dependencies(self, name):
+        """Size of dependencies_of(name), without decoding the names."""
+        node, mask = self._mask(self._descendants, name)
+        return mask.bit_count() - (node is not None and mask >> node & 1)
+
+    def count_dependents(self, name):
+        """Size of dependents_of(name), without decoding the names."""
+        node, mask = self._mask(self._ancestors, name)
+        return mask.bit_count() - (node is not None and mask >> node & 1)
+
+    def cycle_of(self, name):
+        """Names of the other packages in a dependency cycle with `name`, sorted; [] if it is in none.
+
+        A package that depends on itself is returned on its own.
+        """
+        node = self.graph.id_of(name)
+        if node is None:
+            return []
+        members = self.components[self.component_of[node]]
+        if len(members) == 1:
+            return [name] if node in self.graph.successors(node) else []
+        return sorted(self.graph.name_of(member) for member in members if member != node)
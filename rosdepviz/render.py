@@ -0,0 +1,159 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+from rosdepviz.cache import default_cache_dir
+
+DEFAULT_RENDER_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class RenderError(RuntimeError):
+    """Raised when Graphviz cannot be run or fails to lay out a graph."""
+
+
+class RenderCancelled(RenderError):
+    """Raised when the Graphviz process was killed before it finished."""
+
+
+def render_key(source, fmt="png", engine="dot"):
+    """Returns the cache key of rendering DOT `source` to `fmt` with `engine`."""
+    digest = hashlib.sha256()
+    for part in (engine, fmt, source):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def run_graphviz(source, fmt="png", engine="dot", process_started=None):
+    """Runs the Graphviz `engine` binary on DOT `source` and returns the rendered bytes.
+
+    `process_started`, if given, is called with the Popen object before any
+    input is written, so another thread can kill() a layout that takes too long.
+    """
+    try:
+        process = subprocess.Popen([engine, f"-T{fmt}"], stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as exc:
+        raise RenderError(f"could not run Graphviz '{engine}': {exc}") from exc
+    with process:
+        if process_started is not None:
+            process_started(process)
+        try:
+            stdout, stderr = process.communicate(source.encode("utf-8"))
+        except BrokenPipeError:
+            # Killed before it read its input
+            process.wait()
+            stdout, stderr = b"", b""
+    if process.returncode < 0:
+        raise RenderCancelled(f"Graphviz '{engine}' was killed by signal {-process.returncode}")
+    if process.returncode != 0:
+        message = stderr.decode("utf-8", "replace").strip()
+        raise RenderError(f"Graphviz '{engine}' exited with status {process.returncode}: {message}")
+    return stdout
+
+
+class RenderCache:
+    """Rendered graphs on disk, keyed by a hash of DOT source, format and engine.
+
+    Identical subgraphs are only laid out once. Reading an entry bumps its
+    mtime, and once the directory grows past `max_bytes` the least recently
+    used entries are deleted.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_RENDER_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_user(cls, cache_dir=None, max_bytes=DEFAULT_RENDER_CACHE_BYTES):
+        """Opens the render cache shared by every workspace ($XDG_CACHE_HOME/rosdepviz/renders)."""
+        return cls(os.path.join(cache_dir or default_cache_dir(), "renders"), max_bytes)
+
+    def path_for(self, key, fmt):
+        return os.path.join(self.directory, f"{key}.{fmt}")
+
+    def lookup(self, key, fmt):
+        """Returns the path of a cached render, or None."""
+        path = self.path_for(key, fmt)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def store(self, key, fmt, data):
+        """Atomically writes a render into the cache and evicts old entries; returns its path or None."""
+        path = self.path_for(key, fmt)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".render-", suffix=".tmp", dir=self.directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as exc:
+            print(f"Warning: could not write render cache {path}: {exc}")
+            return None
+        self.evict()
+        return path
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.startswith(".") or not entry.is_file(follow_symlinks=False):
+                        continue
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                    total += st.st_size
+        except OSError:
+            return
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+
+
+def render_to_file(source, output_path, fmt="png", engine="dot", cache=None, process_started=None):
+    """Renders DOT `source` to `output_path`, copying it out of `cache` when already rendered."""
+    if cache is not None:
+        key = render_key(source, fmt, engine)
+        cached = cache.lookup(key, fmt)
+        if cached is not None:
+            try:
+                shutil.copyfile(cached, output_path)
+                return output_path
+            except OSError:
+                pass  # Evicted by another process; render it again
+    data = run_graphviz(source, fmt, engine, process_started)
+    if cache is not None:
+        cache.store(key, fmt, data)
+    with open(output_path, "wb") as f:
+        f.write(data)
+    return output_path
@@ -0,0 +1,100 @@
+import fnmatch
+import os
+
+# Directories that never contain source packages: VCS metadata, hidden
+# directories and the build/devel/install/log spaces of catkin and colcon.
+DEFAULT_EXCLUDES = (".*", "build", "devel", "install", "log", "__pycache__")
+
+# Marker files that exclude a directory and everything below it.
+IGNORE_MARKERS = frozenset(("CATKIN_IGNORE", "COLCON_IGNORE", "AMENT_IGNORE"))
+
+
+class ScanStats:
+    """Counters describing how much of the tree a scan had to touch."""
+
+    __slots__ = ("dirs_visited", "dirs_excluded", "dirs_ignored", "manifests_found")
+
+    def __init__(self):
+        self.dirs_visited = 0  # directories listed with scandir
+        self.dirs_excluded = 0  # skipped because they matched an exclude pattern
+        self.dirs_ignored = 0  # skipped because they contain an *_IGNORE marker
+        self.manifests_found = 0
+
+    def __repr__(self):
+        return (f"ScanStats(dirs_visited={self.dirs_visited}, dirs_excluded={self.dirs_excluded}, "
+                f"dirs_ignored={self.dirs_ignored}, manifests_found={self.manifests_found})")
+
+
+def is_excluded(name, rel_path, exclude):
+    """Returns True if a directory matches one of the `exclude` glob patterns.
+
+    Patterns containing a "/" are matched against the path relative to the scan
+    root, the others against the directory name alone.
+    """
+    for pattern in exclude:
+        if fnmatch.fnmatchcase(rel_path if "/" in pattern else name, pattern):
+            return True
+    return False
+
+
+def gather_package_xml_files(src_dir, exclude=DEFAULT_EXCLUDES, stats=None, visited_dirs=None):
+    """Returns the paths of every package.xml found below `src_dir`.
+
+    Like catkin and colcon, the scan does not descend below a directory that
+    contains a package.xml, skips directories holding a CATKIN_IGNORE,
+    COLCON_IGNORE or AMENT_IGNORE marker and follows symlinks (each directory is
+    visited once). Directories matching `exclude` are not entered. Results are
+    in sorted depth-first order. If `visited_dirs` is a list, every directory
+    listed during the scan is appended to it.
+    """
+    stats = stats if stats is not None else ScanStats()
+    exclude = tuple(exclude or ())
+    package_xml_files = []
+    if not os.path.isdir(src_dir):
+        return package_xml_files
+
+    seen = set()
+    stack = [(src_dir, "")]
+    while stack:
+        path, rel_path = stack.pop()
+        try:
+            st = os.stat(path)
+            if (st.st_dev, st.st_ino) in seen:
+                continue  # Symlink loop or a package linked in twice
+            seen.add((st.st_dev, st.st_ino))
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        stats.dirs_visited += 1
+        if visited_dirs is not None:
+            visited_dirs.append(path)
+
+        names = {entry.name for entry in entries}
+        if names & IGNORE_MARKERS:
+            stats.dirs_ignored += 1
+            continue
+        if "package.xml" in names:
+            package_xml_files.append(os.path.join(path, "package.xml"))
+            stats.manifests_found += 1
+            continue  # Package root: nested directories belong to this package
+
+        subdirs = []
+        for entry in entries:
+            if not _is_dir(entry):
+                continue
+            child_rel = f"{rel_path}/{entry.name}" if rel_path else entry.name
+            if is_excluded(entry.name, child_rel, exclude):
+                stats.dirs_excluded += 1
+                continue
+            subdirs.append((entry.path, child_rel))
+        # Pushed in reverse so directories are popped in sorted order
+        stack.extend(sorted(subdirs, reverse=True))
+    return package_xml_files
+
+
+def _is_dir(entry):
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
@@ -0,0 +1,190 @@
+from rosdepviz.graph import DependencyGraph
+
+# Above this many nodes `dot` layout gets slow enough that sfdp is the better default
+SFDP_NODE_THRESHOLD = 400
+# The GUI collapses cycles and folds external leaves on its own above this many nodes
+LARGE_GRAPH_NODES = 150
+# Collapsed cycles list at most this many of their members in the node label
+MAX_LABEL_MEMBERS = 12
+
+
+class GraphView:
+    """A dependency subgraph about to be handed to Graphviz.
+
+    `edges` maps node -> [children] like the trees built by the CLI. Nodes
+    listed in `groups` stand for several packages: ("cycle", members) for a
+    collapsed strongly connected component and ("external", members) for
+    the folded external leaves of one parent. `removed_edges` lists the
+    (source, target) edges dropped by transitive_reduction().
+    """
+
+    __slots__ = ("root", "edges", "groups", "removed_edges")
+
+    def __init__(self, root, edges, groups=None, removed_edges=None):
+        self.root = root
+        self.edges = {name: list(children) for name, children in edges.items() if children}
+        self.groups = dict(groups or {})
+        self.removed_edges = list(removed_edges or [])
+
+    def nodes(self):
+        """Returns every node of the view, the root included."""
+        nodes = {self.root}
+        for name, children in self.edges.items():
+            nodes.add(name)
+            nodes.update(children)
+        return nodes
+
+    def node_count(self):
+        return len(self.nodes())
+
+    def edge_count(self):
+        return sum(len(children) for children in self.edges.values())
+
+    def group_attributes(self, node):
+        """Returns the Graphviz node attributes of a group node, or None for a plain package."""
+        group = self.groups.get(node)
+        if group is None:
+            return None
+        kind, members = group
+        if kind == "cycle":
+            shown = members[:MAX_LABEL_MEMBERS]
+            label = "\\n".join(shown)
+            if len(members) > len(shown):
+                label += f"\\n... {len(members) - len(shown)} more"
+            return {"label": f"cycle of {len(members)}:\\n{label}", "shape": "box3d",
+                    "style": "filled", "fillcolor": "lightsalmon"}
+        return {"label": f"{len(members)} external packages", "shape": "note", "style": "filled",
+                "fillcolor": "lightgray", "fontcolor": "dimgray", "tooltip": ", ".join(members)}
+
+
+def collapse_cycles(view):
+    """Returns a view where every dependency cycle is drawn as a single node.
+
+    Edges inside a cycle disappear and parallel edges between the same
+    pair of components are merged. Cycle nodes are named __cycle_<n>: no ROS
+    package name starts with an underscore, and Graphviz reads a ':' in a
+    node name as a port, so the member list only goes in the label.
+    """
+    # Interning the subgraph lets us reuse the iterative Tarjan of DependencyGraph
+    graph = DependencyGraph(dict.fromkeys(view.edges, ""), view.edges)
+    node_of = {}
+    groups = dict(view.groups)
+    for component in graph.strongly_connected_components():
+        if len(component) == 1:
+            name = graph.name_of(component[0])
+            node_of[name] = name
+            continue
+        members = sorted(graph.name_of(node_id) for node_id in component)
+        node = f"__cycle_{sum(kind == 'cycle' for kind, _ in groups.values())}"
+        groups[node] = ("cycle", members)
+        for name in members:
+            node_of[name] = node
+
+    edges = {}
+    for name, children in view.edges.items():
+        source = node_of[name]
+        targets = edges.setdefault(source, [])
+        for child in children:
+            target = node_of.get(child, child)
+            if target != source and target not in targets:
+                targets.append(target)
+    return GraphView(node_of.get(view.root, view.root), edges, groups, view.removed_edges)
+
+
+def cycle_edges(view):
+    """Returns the set of (source, target) edges of the view that lie on a dependency cycle."""
+    graph = DependencyGraph(dict.fromkeys(view.edges, ""), view.edges)
+    component_of = [0] * len(graph)
+    for comp_id, component in enumerate(graph.strongly_connected_components()):
+        for node_id in component:
+            component_of[node_id] = comp_id
+    return {(name, child) for name, children in view.edges.items() for child in children
+            if component_of[graph.id_of(name)] == component_of[graph.id_of(child)]}
+
+
+def fold_external_leaves(view, is_internal, min_group=2):
+    """Returns a view where the external leaves of each parent are drawn as one summary node.
+
+    A parent with fewer than `min_group` external leaves keeps them as they
+    are. Summary nodes are named __ext_<parent> (see collapse_cycles).
+    """
+    groups = dict(view.groups)
+    edges = {}
+    for name, children in view.edges.items():
+        leaves = [child for child in children
+                  if child not in view.edges and child not in view.groups and not is_internal(child)]
+        if len(leaves) < min_group:
+            edges[name] = list(children)
+            continue
+        folded = f"__ext_{name}"
+        groups[folded] = ("external", sorted(leaves))
+        leaves = set(leaves)
+        edges[name] = [child for child in children if child not in leaves] + [folded]
+    return GraphView(view.root, edges, groups, view.removed_edges)
+
+
+def transitive_reduction(view):
+    """Returns a view without the edges that are implied by a longer path.
+
+    Cycles are handled on the condensation: an edge between two strongly
+    connected components is dropped when the target component is reachable
+    through another successor of the source component. Edges inside a cycle
+    are kept, so cycles stay visible.
+    """
+    graph = DependencyGraph(dict.fromkeys(view.edges, ""), view.edges)
+    components = graph.strongly_connected_components()
+    component_of = [0] * len(graph)
+    for component_id, component in enumerate(components):
+        for node_id in component:
+            component_of[node_id] = component_id
+
+    # Components come dependencies first, so every successor's closure is ready
+    reach = [0] * len(components)  # bitset of the components reachable from each component
+    redundant = [0] * len(components)  # bitset of the successor components implied by another one
+    for component_id, component in enumerate(components):
+        successors = []
+        for node_id in component:
+            for target in graph.successors(node_id):
+                target_component = component_of[target]
+                if target_component != component_id and target_component not in successors:
+                    successors.append(target_component)
+        # A component never reaches itself in the condensation, so a successor found in
+        # the union of the successors' closures is reachable through another successor
+        through_successors = 0
+        for successor in successors:
+            through_successors |= reach[successor]
+        direct = 0
+        for successor in successors:
+            direct |= 1 << successor
+        redundant[component_id] = direct & through_successors
+        reach[component_id] = direct | through_successors
+
+    edges = {}
+    removed = list(view.removed_edges)
+    for name, children in view.edges.items():
+        source = component_of[graph.id_of(name)]
+        kept = []
+        for child in children:
+            if redundant[source] >> component_of[graph.id_of(child)] & 1:
+                removed.append((name, child))
+            else:
+                kept.append(child)
+        edges[name] = kept
+    return GraphView(view.root, edges, view.groups, removed)
+
+
+def choose_engine(node_count, threshold=SFDP_NODE_THRESHOLD):
+    """Returns the Graphviz layout engine for a graph of `node_count` nodes."""
+    return "sfdp" if node_count > threshold else "dot"
+
+
+def simplify(root, edges, is_internal, collapse=False, fold=False, reduce=False):
+    """Applies the requested size reductions to a subgraph and returns the resulting GraphView."""
+    view = GraphView(root, edges)
+    if reduce:
+        view = transitive_reduction(view)
+    if collapse:
+        view = collapse_cycles(view)
+    if fold:
+        view = fold_external_leaves(view, is_internal)
+    return view
@@ -0,0 +1,290 @@
+import copy
+import os
+from collections import defaultdict
+
+from rosdepviz.cache import stat_signature
+from rosdepviz.graph import DependencyGraph
+from rosdepviz.manifest import ALL_TYPES, DEFAULT_TYPES, default_condition_environment, parse_manifest, resolve_dependencies
+from rosdepviz.parallel import iter_parse_manifests
+from rosdepviz.reachability import ReachabilityIndex
+from rosdepviz.scanner import DEFAULT_EXCLUDES, ScanStats, gather_package_xml_files
+
+
+# Manifests handled between two progress reports of iter_load_manifests.
+DEFAULT_BATCH_SIZE = 200
+
+
+def _stat_or_none(path):
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def _signature_or_none(stat_result):
+    return stat_signature(stat_result) if stat_result is not None else None
+
+
+def _walk_order(package_xml_path):
+    # Sorting by path components reproduces the scanner's sorted depth-first order
+    return package_xml_path.split(os.sep)
+
+
+class WorkspaceIndex:
+    """Name -> manifest and name -> dependencies lookups for a source directory.
+
+    The directory is walked once and every package.xml is parsed once, so
+    resolving packages afterwards is a dictionary lookup instead of a walk.
+    Dependency conditions are evaluated against `environment` (by default
+    $ROS_VERSION, $ROS_DISTRO... of this process) and only dependencies of
+    one of the `types` (a manifest type mask) are followed.
+    """
+
+    def __init__(self, src_dir, exclude=DEFAULT_EXCLUDES, types=DEFAULT_TYPES, environment=None):
+        self.src_dir = os.path.abspath(src_dir)
+        self.exclude = tuple(exclude)
+        self.types = types
+        self.environment = default_condition_environment() if environment is None else dict(environment)
+        self.packages = {}  # name -> package.xml path
+        self.dependency_types = {}  # name -> {dep: type mask}, every type
+        self.dependencies = {}  # name -> [deps of one of `types`, internal and external]
+        self.manifests = {}  # package.xml path -> (name, records), including shadowed duplicates
+        self.signatures = {}  # package.xml path -> stat signature when it was read
+        self.watch_dirs = []  # directories listed by the last scan
+        self.scan_stats = ScanStats()
+        self._graph = None
+        self._reachability = None
+
+    @classmethod
+    def scan(cls, src_dir, cache=None, jobs=1, exclude=DEFAULT_EXCLUDES, types=DEFAULT_TYPES, environment=None):
+        """Builds an index for `src_dir`, reusing unchanged entries from `cache`."""
+        index = cls(src_dir, exclude, types, environment)
+        index.load(cache, jobs)
+        return index
+
+    def gather_package_xml_files(self):
+        """Scans the source directory for manifests, recording ScanStats."""
+        self.scan_stats = ScanStats()
+        self.watch_dirs = []
+        return gather_package_xml_files(self.src_dir, self.exclude, self.scan_stats, self.watch_dirs)
+
+    def load(self, cache=None, jobs=1):
+        """(Re)loads every manifest below the source directory."""
+        self.load_manifests(self.gather_package_xml_files(), cache, jobs)
+
+    def load_manifests(self, package_xml_files, cache=None, jobs=1):
+        """(Re)loads the index from `package_xml_files`.
+
+        With a ManifestCache, manifests whose stat signature is unchanged are
+        not parsed again, and the cache is written back afterwards. The rest are
+        parsed with `jobs` workers (None means one per CPU).
+        """
+        for _ in self.iter_load_manifests(package_xml_files, cache, jobs):
+            pass
+
+    def iter_load_manifests(self, package_xml_files, cache=None, jobs=1, batch_size=DEFAULT_BATCH_SIZE):
+        """Incremental form of load_manifests.
+
+        Yields (manifests done, manifests total, names added) after every
+        `batch_size` manifests so callers can report progress, show partial
+        results or stop early by closing the generator. The cache is only
+        written back once every manifest has been processed.
+        """
+        package_xml_files = list(package_xml_files)
+        total = len(package_xml_files)
+        cached = [None] * total
+        stats = [_stat_or_none(path) for path in package_xml_files]
+        pending = []
+        for position, package_xml_path in enumerate(package_xml_files):
+            if cache is not None and stats[position] is not None:
+                cached[position] = cache.lookup(package_xml_path, stats[position])
+            if cached[position] is None:
+                pending.append(package_xml_path)
+
+        self.packages = {}
+        self.dependency_types = {}
+        self.dependencies = {}
+        self.manifests = {}
+        self.signatures = {}
+        self._graph = None
+        added = []
+        # Merge in walk order so duplicate names resolve the same way regardless of jobs
+        parsed = iter_parse_manifests(pending, jobs)
+        try:
+            for position, package_xml_path in enumerate(package_xml_files):
+                result = cached[position]
+                if result is None:
+                    result = next(parsed)
+                    if cache is not None and stats[position] is not None:
+                        cache.store(package_xml_path, stats[position], *result)
+                name, records = result
+                self.manifests[package_xml_path] = (name, records)
+                self.signatures[package_xml_path] = _signature_or_none(stats[position])
+                if self.add_package(name, package_xml_path, self._resolve(records)):
+                    added.append(name)
+                if (position + 1) % batch_size == 0 and position + 1 < total:
+                    yield position + 1, total, added
+                    added = []
+        finally:
+            parsed.close()
+        yield total, total, added
+
+        if cache is not None:
+            cache.prune(package_xml_files)
+            cache.save()
+
+    def refresh(self, cache=None):
+        """Rescans the source directory and re-reads only added, removed or modified manifests.
+
+        Returns the changes as name -> dependencies before the refresh (None for
+        packages that were not in the index), see update_manifests.
+        """
+        package_xml_files = self.gather_package_xml_files()
+        live = set(package_xml_files)
+        changed = [path for path in self.manifests if path not in live]
+        for package_xml_path in package_xml_files:
+            signature = _signature_or_none(_stat_or_none(package_xml_path))
+            if package_xml_path not in self.manifests or self.signatures.get(package_xml_path) != signature:
+                changed.append(package_xml_path)
+
+        changes = self.update_manifests(changed, cache, live)
+        if cache is not None:
+            cache.prune(package_xml_files)
+            cache.save()
+        return changes
+
+    def update_manifests(self, package_xml_paths, cache=None, live=None):
+        """Re-reads the given manifests, which may have been added, modified or deleted.
+
+        Only the affected packages are touched. If the manifest that provided a
+        name goes away, a shadowed duplicate takes over. Paths missing from disk,
+        or from `live` when it is given, are dropped from the index. Returns
+        name -> dependencies before the update (None if the package was not in
+        the index) for every package whose entry changed.
+        """
+        affected = set()
+        for package_xml_path in package_xml_paths:
+            previous = self.manifests.pop(package_xml_path, None)
+            self.signatures.pop(package_xml_path, None)
+            if previous is not None:
+                affected.add(previous[0])
+
+            stat_result = _stat_or_none(package_xml_path)
+            if stat_result is None or (live is not None and package_xml_path not in live):
+                continue
+            name, records = self._read_manifest(package_xml_path, stat_result, cache)
+            self.manifests[package_xml_path] = (name, records)
+            self.signatures[package_xml_path] = stat_signature(stat_result)
+            affected.add(name)
+        affected.discard(None)
+
+        changes = {}
+        for name in affected:
+            previous = (self.packages.get(name), self.dependency_types.get(name))
+            previous_deps = self.dependencies.get(name)
+            self.packages.pop(name, None)
+            self.dependency_types.pop(name, None)
+            self.dependencies.pop(name, None)
+            self._graph = None
+            candidates = [path for path, (n, _) in self.manifests.items() if n == name]
+            if candidates:
+                winner = min(candidates, key=_walk_order)
+                self.add_package(name, winner, self._resolve(self.manifests[winner][1]))
+            if (self.packages.get(name), self.dependency_types.get(name)) != previous:
+                changes[name] = previous_deps
+        return changes
+
+    @staticmethod
+    def _read_manifest(package_xml_path, stat_result, cache):
+        cached = cache.lookup(package_xml_path, stat_result) if cache is not None else None
+        if cached is not None:
+            return cached
+        name, records = parse_manifest(package_xml_path)
+        if cache is not None:
+            cache.store(package_xml_path, stat_result, name, records)
+        return name, records
+
+    def _resolve(self, records):
+        return resolve_dependencies(records, self.environment)
+
+    def add_package(self, name, package_xml_path, deps):
+        """Registers a parsed manifest; the first manifest found for a name wins.
+
+        `deps` maps dependency -> type mask; a plain list of names counts as
+        every type.
+        """
+        if not name or name in self.packages:
+            return False
+        if not isinstance(deps, dict):
+            deps = dict.fromkeys(deps, ALL_TYPES)
+        self.packages[name] = package_xml_path
+        self.dependency_types[name] = deps
+        self.dependencies[name] = [dep for dep, mask in deps.items() if mask & self.types]
+        self._graph = None
+        return True
+
+    def copy(self):
+        """Returns an index that can be refreshed or updated without changing this one.
+
+        The lookups are copied; parsed records and the built graph are shared,
+        as updates replace them rather than modify them.
+        """
+        other = copy.copy(self)
+        other.packages = dict(self.packages)
+        other.dependency_types = dict(self.dependency_types)
+        other.dependencies = dict(self.dependencies)
+        other.manifests = dict(self.manifests)
+        other.signatures = dict(self.signatures)
+        other.watch_dirs = list(self.watch_dirs)
+        return other
+
+    def set_types(self, types):
+        """Only follows dependencies of one of `types` from now on; nothing is parsed again."""
+        if types == self.types:
+            return
+        self.types = types
+        self.dependencies = {name: [dep for dep, mask in deps.items() if mask & types]
+                             for name, deps in self.dependency_types.items()}
+        self._graph = None
+
+    @property
+    def graph(self):
+        """DependencyGraph of the index, rebuilt (without re-parsing) after changes."""
+        if self._graph is None:
+            self._graph = DependencyGraph.from_index(self)
+        return self._graph
+
+    @property
+    def reachability(self):
+        """ReachabilityIndex over the current graph, built on first use after each change."""
+        graph = self.graph
+        if self._reachability is None or self._reachability.graph is not graph:
+            self._reachability = ReachabilityIndex(graph)
+        return self._reachability
+
+    def __contains__(self, package_name):
+        return package_name in self.packages
+
+    def __len__(self):
+        return len(self.packages)
+
+    def find_package_xml(self, package_name):
+        """Returns the package.xml path for `package_name`, or None if it is external."""
+        return self.packages.get(package_name)
+
+    def get_dependencies(self, package_name):
+        """Returns all declared dependencies of `package_name` (internal and external)."""
+        return self.dependencies.get(package_name, [])
+
+    def get_internal_dependencies(self, package_name):
+        """Returns the dependencies of `package_name` that live in this workspace."""
+        return [dep for dep in self.get_dependencies(package_name) if dep in self.packages]
+
+    def build_reverse_dependencies(self):
+        """Returns dep -> [internal packages that depend on it] for internal deps."""
+        reverse_dependencies = defaultdict(list)
+        for pkg_name, deps in self.dependencies.items():
+            for dep in deps:
+                if dep in self.packages:
+                    reverse_dependencies[dep].append(pkg_name)
+        return reverse_dependencies
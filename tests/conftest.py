@@ -1,7 +1,17 @@
 from pathlib import Path
 import sys
 
+import pytest
+
 # Ensure the project root is on sys.path so tests can import the package
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_home(tmp_path, monkeypatch):
+    """Keep on-disk caches written by the code under test inside tmp_path."""
+    cache_home = tmp_path / "xdg-cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+    return cache_home
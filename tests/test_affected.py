@@ -0,0 +1,63 @@
+import io
+import json
+
+import rosdepviz.cli as cli
+from rosdepviz.affected import PackageOwners, find_affected
+from rosdepviz.workspace import WorkspaceIndex
+
+from test_cli import write_package_xml
+
+
+def make_workspace(base):
+    write_package_xml(base / "core" / "package.xml", "core", deps=["roscpp"])
+    write_package_xml(base / "msgs" / "package.xml", "msgs")
+    write_package_xml(base / "stack" / "driver" / "package.xml", "driver", deps=["core", "msgs"])
+    write_package_xml(base / "stack" / "driver_tools" / "package.xml", "driver_tools", deps=["msgs"])
+    write_package_xml(base / "app" / "package.xml", "app", deps=["driver"])
+
+
+def test_package_owners(tmp_path):
+    base = tmp_path / "src"
+    make_workspace(base)
+    owners = PackageOwners(WorkspaceIndex.scan(str(base)).packages)
+    assert owners.owner_of(str(base / "stack" / "driver" / "src" / "main.cpp")) == "driver"
+    assert owners.owner_of(str(base / "stack" / "driver_tools" / "CMakeLists.txt")) == "driver_tools"
+    assert owners.owner_of(str(base / "stack" / "driver")) == "driver"
+    assert owners.owner_of(str(base / "stack" / "README.md")) is None
+    assert owners.owner_of(str(base / "deleted" / "file.py")) is None
+
+
+def test_find_affected_in_build_order(tmp_path):
+    base = tmp_path / "src"
+    make_workspace(base)
+    index = WorkspaceIndex.scan(str(base))
+    result = find_affected(index, ["core/src/core.cpp", "stack/README.md", "core/package.xml"], str(base))
+    assert result.changed == ["core"]
+    assert result.affected == ["core", "driver", "app"]
+    assert result.unowned == ["stack/README.md"]
+
+    result = find_affected(index, ["msgs/msg/Status.msg", "core/CMakeLists.txt"], str(base))
+    assert sorted(result.changed) == ["core", "msgs"]
+    affected = result.affected
+    assert set(affected) == {"core", "msgs", "driver", "driver_tools", "app"}
+    assert affected.index("driver") > max(affected.index("core"), affected.index("msgs"))
+    assert affected.index("app") > affected.index("driver")
+
+
+def test_cli_affected_from_stdin(tmp_path, monkeypatch, capsys):
+    base = tmp_path / "src"
+    make_workspace(base)
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+    monkeypatch.setattr("sys.stdin", io.StringIO("stack/driver/src/main.cpp\n\nREADME.md\n"))
+
+    assert cli.main(["--affected", "-", "--base-dir", str(base)]) == 0
+    captured = capsys.readouterr()
+    assert captured.out == "driver\napp\n"
+    assert "1 path(s) are outside every package" in captured.err
+
+    monkeypatch.setattr("sys.stdin", io.StringIO("msgs/package.xml\n"))
+    assert cli.main(["--affected", "-", "--base-dir", str(base), "--format", "json"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["changed"] == ["msgs"]
+    assert report["affected"][0] == "msgs"
+    assert sorted(report["affected"]) == ["app", "driver", "driver_tools", "msgs"]
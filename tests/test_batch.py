@@ -0,0 +1,56 @@
+import json
+
+import rosdepviz.cli as cli
+from rosdepviz.batch import read_package_list
+
+from test_cli import FakeDigraph, write_package_xml
+
+
+def make_workspace(base):
+    write_package_xml(base / "A" / "package.xml", "A", deps=["B", "std_msgs"])
+    write_package_xml(base / "B" / "package.xml", "B", deps=["C"])
+    write_package_xml(base / "C" / "package.xml", "C", deps=[])
+
+
+def test_read_package_list(tmp_path):
+    listing = tmp_path / "packages.txt"
+    listing.write_text("A\n\n# comment\nB  # trailing\n")
+    assert read_package_list(str(listing)) == ["A", "B"]
+
+
+def test_batch_scans_once_and_writes_every_package(tmp_path, monkeypatch, capsys):
+    base = tmp_path / "src"
+    make_workspace(base)
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+
+    scans = []
+    original_scan = cli.WorkspaceIndex.scan
+    monkeypatch.setattr(cli.WorkspaceIndex, "scan",
+                        classmethod(lambda cls, *a, **kw: scans.append(1) or original_scan(*a, **kw)))
+
+    out_dir = tmp_path / "out"
+    status = cli.main(["--all", "--format", "json", "--output-dir", str(out_dir), "--render-jobs", "2", "--no-cache"])
+    assert status == 0
+    assert len(scans) == 1
+    assert sorted(p.name for p in out_dir.iterdir()) == ["A.json", "B.json", "C.json"]
+    assert json.loads((out_dir / "A.json").read_text())["packages"] == ["A", "B", "C"]
+    assert "Rendered 3 of 3 packages" in capsys.readouterr().out
+
+
+def test_batch_renders_png_and_reports_failures(tmp_path, monkeypatch, capsys):
+    base = tmp_path / "src"
+    make_workspace(base)
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+    monkeypatch.setattr(cli, "graphviz", type("M", (), {"Digraph": FakeDigraph}))
+
+    listing = tmp_path / "packages.txt"
+    listing.write_text("C\nmissing\n")
+    out_dir = tmp_path / "out"
+    status = cli.main(["A", "--packages-from", str(listing), "--output-dir", str(out_dir), "--no-cache"])
+    assert status == 1
+    assert sorted(p.name for p in out_dir.iterdir()) == ["A.dot", "A.png", "C.dot", "C.png"]
+    # A leaf package is drawn as a single node
+    assert '"C";' in (out_dir / "C.dot").read_text()
+    out = capsys.readouterr().out
+    assert "missing: FAILED" in out
+    assert "Rendered 2 of 3 packages" in out
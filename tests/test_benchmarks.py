@@ -0,0 +1,36 @@
+import json
+
+from benchmarks.bench_suite import SCENARIOS, compare, run_suite
+from benchmarks.synthetic import generate_workspace
+from rosdepviz.buildorder import compute_build_plan
+from rosdepviz.cycles import find_cycles
+from rosdepviz.workspace import WorkspaceIndex
+
+
+def test_generated_workspace_shape(tmp_path):
+    paths = generate_workspace(str(tmp_path), packages=120, fan_out=3, group_size=4, depth=5, nesting=2, ignored=12)
+    index = WorkspaceIndex.scan(str(tmp_path))
+    # The stray manifests in build spaces and the ignored directory are not picked up
+    assert sorted(index.packages.values()) == sorted(paths)
+    assert index.scan_stats.dirs_ignored == 1
+    assert paths[-1].startswith(str(tmp_path / "stack_007" / "group_001" / "pkg_00119"))
+    plan = compute_build_plan(index.reachability)
+    assert len(plan.waves) == 5 and not plan.cycles
+
+    cyclic = tmp_path / "cyclic"
+    generate_workspace(str(cyclic), packages=120, fan_out=3, depth=5, cycle_density=0.1)
+    assert find_cycles(WorkspaceIndex.scan(str(cyclic)).reachability)
+
+
+def test_suite_results(capsys):
+    shape = {"packages": 40, "depth": 4, "cycle_density": 0.05, "ignored": 4}
+    results = run_suite(shape, list(SCENARIOS), repeat=2, sample=5)
+    results = json.loads(json.dumps(results))
+    assert results["workspace"]["packages"] == 40
+    assert set(results["scenarios"]) == set(SCENARIOS)
+    assert all(len(timing["runs"]) == 2 for timing in results["scenarios"].values())
+
+    slower = json.loads(json.dumps(results))
+    slower["scenarios"]["warm_scan"]["best_s"] = results["scenarios"]["warm_scan"]["best_s"] * 2
+    assert compare(slower, results, 1.5) == ["warm_scan"]
+    assert "REGRESSION" in capsys.readouterr().out
@@ -0,0 +1,66 @@
+import json
+
+import rosdepviz.cli as cli
+from rosdepviz.buildorder import compute_build_plan
+from rosdepviz.graph import DependencyGraph
+from rosdepviz.reachability import ReachabilityIndex
+
+from test_cli import write_package_xml
+
+
+def plan_for(dependencies, names=None):
+    graph = DependencyGraph({name: f"/ws/{name}/package.xml" for name in dependencies}, dependencies)
+    return compute_build_plan(ReachabilityIndex(graph), names)
+
+
+def test_build_waves_and_critical_path():
+    plan = plan_for({
+        "msgs": ["std_msgs"],
+        "utils": [],
+        "driver": ["msgs", "utils"],
+        "planner": ["msgs"],
+        "bringup": ["driver", "planner"],
+    })
+    assert plan.waves == [["msgs", "utils"], ["driver", "planner"], ["bringup"]]
+    assert plan.widths() == [2, 2, 1]
+    assert plan.critical_path == ["msgs", "driver", "bringup"]
+    assert plan.cycles == []
+    assert plan.order() == ["msgs", "utils", "driver", "planner", "bringup"]
+
+
+def test_build_plan_reports_cycles_and_restricts_to_closure():
+    plan = plan_for({"a": ["b"], "b": ["a"], "c": ["a"], "d": []})
+    assert plan.waves == [["a", "b", "d"], ["c"]]
+    assert plan.cycles == [["a", "b"]]
+
+    plan = plan_for({"a": ["b"], "b": [], "c": ["a"], "d": []}, names=["a"])
+    assert plan.waves == [["b"], ["a"]]
+
+
+def test_cli_build_order(tmp_path, monkeypatch, capsys):
+    base = tmp_path / "src"
+    write_package_xml(base / "A" / "package.xml", "A", deps=["B", "C"])
+    write_package_xml(base / "B" / "package.xml", "B", deps=["C"])
+    write_package_xml(base / "C" / "package.xml", "C", deps=["roscpp"])
+    write_package_xml(base / "D" / "package.xml", "D", deps=[])
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+
+    assert cli.main(["--build-order", "--no-cache"]) == 0
+    out = capsys.readouterr().out
+    assert "Build order for 4 packages in 3 waves" in out
+    assert "Critical path: C -> B -> A" in out
+
+    assert cli.main(["B", "--build-order", "--format", "json", "--no-cache"]) == 0
+    doc = json.loads(capsys.readouterr().out)
+    assert doc["waves"] == [["C"], ["B"]]
+
+    write_package_xml(base / "C" / "package.xml", "C", deps=["A"])
+    assert cli.main(["--build-order", "--no-cache"]) == 1
+    assert "A, B, C" in capsys.readouterr().out
+
+    try:
+        cli.parse_args(["--build-order", "--format", "dot"])
+    except SystemExit as exc:
+        assert exc.code == 2
+    else:
+        raise AssertionError("--build-order has no DOT output")
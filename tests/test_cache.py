@@ -0,0 +1,118 @@
+import json
+import os
+
+from rosdepviz import cache as cache_mod
+from rosdepviz import manifest
+from rosdepviz.cache import CACHE_SCHEMA_VERSION, ManifestCache, workspace_cache_path
+from rosdepviz.workspace import WorkspaceIndex
+
+import rosdepviz.cli as cli
+from test_cli import write_package_xml
+
+
+def make_workspace(base):
+    write_package_xml(base / "A" / "package.xml", "A", deps=["B"])
+    write_package_xml(base / "B" / "package.xml", "B", deps=["roscpp"])
+
+
+def count_parses(monkeypatch):
+    calls = []
+    parse = manifest.parse_manifest
+
+    def counting_parse(path):
+        calls.append(path)
+        return parse(path)
+
+    monkeypatch.setattr("rosdepviz.parallel.parse_manifest", counting_parse)
+    return calls
+
+
+def test_cache_path_lives_under_xdg_cache_home(tmp_path, isolated_cache_home):
+    path = workspace_cache_path(str(tmp_path / "src"))
+    assert path.startswith(str(isolated_cache_home / "rosdepviz"))
+    assert path != workspace_cache_path(str(tmp_path / "other"))
+
+
+def test_warm_load_only_reparses_changed_manifests(tmp_path, monkeypatch):
+    base = tmp_path / "src"
+    make_workspace(base)
+    calls = count_parses(monkeypatch)
+
+    WorkspaceIndex.scan(str(base), cache=ManifestCache.for_workspace(str(base)))
+    assert len(calls) == 2
+
+    calls.clear()
+    warm = ManifestCache.for_workspace(str(base))
+    index = WorkspaceIndex.scan(str(base), cache=warm)
+    assert calls == []
+    assert warm.hits == 2
+    assert index.get_dependencies("A") == ["B"]
+
+    # Changing the size of one manifest invalidates just that entry
+    write_package_xml(base / "B" / "package.xml", "B", deps=["roscpp", "std_msgs"])
+    index = WorkspaceIndex.scan(str(base), cache=ManifestCache.for_workspace(str(base)))
+    assert calls == [str(base / "B" / "package.xml")]
+    assert index.get_dependencies("B") == ["roscpp", "std_msgs"]
+
+
+def test_removed_manifests_are_pruned(tmp_path):
+    base = tmp_path / "src"
+    make_workspace(base)
+    WorkspaceIndex.scan(str(base), cache=ManifestCache.for_workspace(str(base)))
+
+    os.remove(base / "B" / "package.xml")
+    index = WorkspaceIndex.scan(str(base), cache=ManifestCache.for_workspace(str(base)))
+    assert "B" not in index
+
+    entries = ManifestCache.for_workspace(str(base)).entries
+    assert list(entries) == [str(base / "A" / "package.xml")]
+
+
+def test_schema_mismatch_and_corrupt_files_are_ignored(tmp_path):
+    base = tmp_path / "src"
+    path = workspace_cache_path(str(base))
+    os.makedirs(os.path.dirname(path))
+
+    with open(path, "w") as f:
+        json.dump({"schema": CACHE_SCHEMA_VERSION + 1, "entries": {"x": {}}}, f)
+    assert ManifestCache.for_workspace(str(base)).entries == {}
+
+    with open(path, "w") as f:
+        f.write("{not json")
+    assert ManifestCache.for_workspace(str(base)).entries == {}
+
+
+def test_save_is_atomic_and_skipped_when_clean(tmp_path, monkeypatch):
+    base = tmp_path / "src"
+    make_workspace(base)
+    WorkspaceIndex.scan(str(base), cache=ManifestCache.for_workspace(str(base)))
+    cache_dir = os.path.dirname(workspace_cache_path(str(base)))
+    assert [n for n in os.listdir(cache_dir) if n.endswith(".tmp")] == []
+
+    def fail(*args, **kwargs):
+        raise AssertionError("clean cache must not be rewritten")
+
+    monkeypatch.setattr(cache_mod.os, "replace", fail)
+    WorkspaceIndex.scan(str(base), cache=ManifestCache.for_workspace(str(base)))
+
+
+def test_cli_cache_switches(tmp_path, monkeypatch):
+    base = tmp_path / "src"
+    make_workspace(base)
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+    monkeypatch.setattr(cli, "generate_dot_graph", lambda tree, **kwargs: None)
+    calls = count_parses(monkeypatch)
+
+    cli.main(["A"])
+    assert len(calls) == 2
+    calls.clear()
+
+    cli.main(["A"])
+    assert calls == []
+
+    cli.main(["A", "--rebuild-cache"])
+    assert len(calls) == 2
+    calls.clear()
+
+    cli.main(["A", "--no-cache"])
+    assert len(calls) == 2
@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import rosdepviz.cli as cli
+from rosdepviz import commands
+
+from test_cli import write_package_xml
+
+ROOT = Path(__file__).resolve().parents[1]
+# Wall-clock budget of `rosdepviz deps` on a cached 200-package workspace, interpreter start included
+STARTUP_BUDGET_SECONDS = 1.0
+HEAVY_MODULES = ("graphviz", "PyQt5", "asyncio", "defusedxml", "multiprocessing")
+
+
+def make_workspace(base, size=3):
+    write_package_xml(base / "core" / "package.xml", "core", deps=["roscpp"])
+    write_package_xml(base / "driver" / "package.xml", "driver", deps=["core"])
+    for number in range(size - 2):
+        write_package_xml(base / "apps" / f"app{number}" / "package.xml", f"app{number}", deps=["driver"])
+
+
+def test_deps_and_rdeps(tmp_path, monkeypatch, capsys):
+    base = tmp_path / "src"
+    make_workspace(base)
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+
+    assert commands.main(["deps", "driver"]) == 0
+    assert capsys.readouterr().out == "core\n"
+    assert commands.main(["deps", "app0", "--transitive", "--format", "json"]) == 0
+    assert json.loads(capsys.readouterr().out) == ["core", "driver", "roscpp"]
+    assert commands.main(["deps", "app0", "-t", "--internal"]) == 0
+    assert capsys.readouterr().out == "core\ndriver\n"
+    assert commands.main(["rdeps", "core", "-t"]) == 0
+    assert capsys.readouterr().out == "app0\ndriver\n"
+    assert commands.main(["rdeps", "missing"]) == 1
+    assert "not found" in capsys.readouterr().err
+
+
+def test_stats_and_cli_commands(tmp_path, monkeypatch, capsys):
+    base = tmp_path / "src"
+    make_workspace(base, size=4)
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+
+    assert commands.main(["stats", "--format", "json"]) == 0
+    stats = json.loads(capsys.readouterr().out)
+    assert (stats["packages"], stats["external_dependencies"], stats["dependency_edges"]) == (4, 1, 4)
+    assert (stats["cycles"], stats["build_waves"]) == (0, 3)
+
+    # The other subcommands run rosdepviz.cli with the matching flag
+    assert commands.main(["build-order", "--format", "json"]) == 0
+    assert json.loads(capsys.readouterr().out)["waves"] == [["core"], ["driver"], ["app0", "app1"]]
+    assert commands.main(["cycles"]) == 0
+
+
+def test_deps_starts_fast_on_a_cached_workspace(tmp_path, isolated_cache_home):
+    base = tmp_path / "src"
+    make_workspace(base, size=200)
+    env = dict(os.environ, PYTHONPATH=str(ROOT), XDG_CACHE_HOME=str(isolated_cache_home))
+    script = ("import sys; from rosdepviz.commands import main; code = main(sys.argv[1:]); "
+              f"print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules], file=sys.stderr); sys.exit(code)")
+    command = [sys.executable, "-c", script, "deps", "app0", "--transitive", "--jobs", "1"]
+    subprocess.run(command, cwd=base, env=env, check=True, capture_output=True)  # Fills the manifest cache
+
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=base, env=env, check=True, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+
+    assert result.stdout.split() == ["core", "driver", "roscpp"]
+    assert result.stderr.splitlines()[-1] == ""  # None of HEAVY_MODULES was imported
+    assert elapsed < STARTUP_BUDGET_SECONDS, f"rosdepviz deps took {elapsed:.2f} s"
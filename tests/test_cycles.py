@@ -0,0 +1,100 @@
+import json
+
+import rosdepviz.cli as cli
+from rosdepviz.cycles import declaration_line, find_cycles
+from rosdepviz.graph import DependencyGraph
+from rosdepviz.reachability import ReachabilityIndex
+from rosdepviz.transform import GraphView, cycle_edges
+
+from test_cli import write_package_xml
+
+
+def reachability_for(dependencies):
+    graph = DependencyGraph({name: f"/ws/{name}/package.xml" for name in dependencies}, dependencies)
+    return ReachabilityIndex(graph)
+
+
+def is_acyclic(edges):
+    successors = {}
+    for source, target in edges:
+        successors.setdefault(source, []).append(target)
+    state = {}
+
+    def visit(name):
+        state[name] = 1
+        for target in successors.get(name, []):
+            if state.get(target) == 1 or (target not in state and not visit(target)):
+                return False
+        state[name] = 2
+        return True
+
+    return all(state.get(name) == 2 or visit(name) for name in list(successors))
+
+
+def test_find_cycles_and_break_edges():
+    reachability = reachability_for({
+        "a": ["b"], "b": ["c"], "c": ["a", "d"],  # three-package cycle
+        "d": ["e"], "e": ["d"],  # two-package cycle below it
+        "f": ["f", "a"],  # depends on itself
+        "g": ["a"],
+    })
+    cycles = find_cycles(reachability)
+    assert [cycle.members for cycle in cycles] == [["a", "b", "c"], ["d", "e"], ["f"]]
+    for cycle in cycles:
+        assert cycle.break_edges
+        assert set(cycle.break_edges) <= set(cycle.edges)
+        remaining = [edge for edge in cycle.edges if edge not in cycle.break_edges]
+        assert is_acyclic(remaining)
+        # Minimal: putting any single break edge back re-creates a cycle
+        for edge in cycle.break_edges:
+            assert not is_acyclic(remaining + [edge])
+    assert cycles[2].break_edges == [("f", "f")]
+
+    assert reachability.cycle_of("b") == ["a", "c"]
+    assert reachability.cycle_of("f") == ["f"]
+    assert reachability.cycle_of("g") == []
+
+
+def test_cycle_edges_of_view():
+    view = GraphView("a", {"a": ["b"], "b": ["c"], "c": ["b", "d"]})
+    assert cycle_edges(view) == {("b", "c"), ("c", "b")}
+
+
+def test_declaration_line(tmp_path):
+    manifest = tmp_path / "package.xml"
+    manifest.write_text("<package>\n  <name>a</name>\n  <build_depend>b</build_depend>\n"
+                        "  <exec_depend condition=\"$ROS_VERSION == 2\">bc</exec_depend>\n</package>\n")
+    assert declaration_line(str(manifest), "b") == 3
+    assert declaration_line(str(manifest), "bc") == 4
+    assert declaration_line(str(manifest), "c") is None
+
+
+def test_cli_cycles_exit_status(tmp_path, monkeypatch, capsys):
+    base = tmp_path / "src"
+    write_package_xml(base / "A" / "package.xml", "A", deps=["B"])
+    write_package_xml(base / "B" / "package.xml", "B", deps=["roscpp"])
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+
+    assert cli.main(["--cycles", "--no-cache"]) == 0
+    assert "No dependency cycles found." in capsys.readouterr().out
+
+    write_package_xml(base / "B" / "package.xml", "B", deps=["A"])
+    assert cli.main(["--cycles", "--format", "json", "--no-cache"]) == 1
+    report = json.loads(capsys.readouterr().out)["cycles"]
+    assert report[0]["packages"] == ["A", "B"]
+    (edge,) = report[0]["break"]
+    assert edge["package_xml"].endswith("package.xml")
+    assert edge["line"] == 4
+
+
+def test_cli_rejects_unsupported_combinations():
+    for argv in (["--cycles", "--build-order"], ["--affected", "-", "--serve"],
+                 ["A", "--transitive-deps", "--export", "json"], ["--cycles", "--format", "dot"]):
+        try:
+            cli.parse_args(argv)
+        except SystemExit as exc:
+            assert exc.code == 2
+        else:
+            raise AssertionError(f"{argv} must be rejected")
+    args = cli.parse_args(["A", "--transitive-deps", "--transitive-rdeps"])
+    assert args.transitive_deps and args.transitive_rdeps
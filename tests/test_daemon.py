@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+
+from rosdepviz import client
+from rosdepviz.daemon import QueryServer, RequestError, handle_request
+from rosdepviz.workspace import WorkspaceIndex
+
+from test_cli import write_package_xml
+
+
+def make_workspace(base):
+    write_package_xml(base / "core" / "package.xml", "core", deps=["roscpp"])
+    write_package_xml(base / "msgs" / "package.xml", "msgs")
+    write_package_xml(base / "driver" / "package.xml", "driver", deps=["core", "msgs"])
+    write_package_xml(base / "app" / "package.xml", "app", deps=["driver"])
+
+
+def test_handle_request(tmp_path):
+    base = tmp_path / "src"
+    make_workspace(base)
+    index = WorkspaceIndex.scan(str(base))
+
+    assert handle_request(index, {"op": "deps", "package": "driver"}) == ["core", "msgs"]
+    assert handle_request(index, {"op": "deps", "package": "app", "transitive": True}) == [
+        "core", "driver", "msgs", "roscpp"]
+    assert handle_request(index, {"op": "deps", "package": "app", "transitive": True, "internal": True}) == [
+        "core", "driver", "msgs"]
+    assert handle_request(index, {"op": "rdeps", "package": "core", "transitive": True}) == ["app", "driver"]
+    assert handle_request(index, {"op": "path", "from": "app", "to": "msgs"}) == ["app", "driver", "msgs"]
+    assert handle_request(index, {"op": "path", "from": "msgs", "to": "app"}) is None
+    assert handle_request(index, {"op": "closure", "packages": ["driver"]}) == [
+        "roscpp", "core", "msgs", "driver"]
+    assert handle_request(index, {"op": "closure", "packages": ["msgs"], "reverse": True}) == [
+        "msgs", "driver", "app"]
+
+    for request in ({"op": "deps", "package": "missing"}, {"op": "closure", "packages": []}, {"op": "bogus"}, []):
+        try:
+            handle_request(index, request)
+            assert False, f"{request} should be rejected"
+        except RequestError:
+            pass
+
+
+def test_query_server_round_trip(tmp_path):
+    base = tmp_path / "src"
+    make_workspace(base)
+    index = WorkspaceIndex.scan(str(base))
+    socket_path = str(tmp_path / "daemon.sock")
+    server = QueryServer(index, socket_path, poll_interval=0.05)
+    ready = threading.Event()
+    thread = threading.Thread(target=asyncio.run, args=(server.serve(ready=ready.set),))
+    thread.start()
+    try:
+        assert ready.wait(5)
+        assert client.query(socket_path, {"op": "ping"})["packages"] == 4
+        assert client.query(socket_path, {"op": "rdeps", "package": "msgs"}) == ["driver"]
+        try:
+            client.query(socket_path, {"op": "deps", "package": "missing"})
+            assert False, "unknown packages should be reported"
+        except client.QueryError as e:
+            assert "missing" in str(e)
+
+        # The daemon picks up edited manifests on its own
+        write_package_xml(base / "tools" / "package.xml", "tools", deps=["msgs"])
+        deadline = time.monotonic() + 5
+        while client.query(socket_path, {"op": "rdeps", "package": "msgs"}) != ["driver", "tools"]:
+            assert time.monotonic() < deadline, "the new package was not picked up"
+            time.sleep(0.05)
+        # The refresh ran on a copy, which replaced the index being served
+        assert server.index is not index and "tools" not in index
+    finally:
+        client.query(socket_path, {"op": "stop"})
+        thread.join(5)
+    assert not thread.is_alive()
+    assert not (tmp_path / "daemon.sock").exists()
+
+
+def test_client_main(tmp_path, capsys):
+    assert client.main(["--socket", str(tmp_path / "nothing.sock"), "ping"]) == 1
+    assert "could not reach" in capsys.readouterr().err
+
+
+def test_client_finds_socket_of_parent_directory(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    package_dir = tmp_path / "src" / "app"
+    package_dir.mkdir(parents=True)
+    assert client.find_socket_path(str(package_dir)) == client.default_socket_path(str(package_dir))
+
+    socket_path = client.default_socket_path(str(tmp_path / "src"))
+    open(socket_path, "w").close()
+    assert client.find_socket_path(str(package_dir)) == socket_path
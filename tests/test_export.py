@@ -0,0 +1,105 @@
+import io
+import json
+
+from xml.etree import ElementTree
+
+import rosdepviz.cli as cli
+from rosdepviz.export import (select_nodes, tree_to_dot, tree_to_json, tree_to_text, write_graph_graphml,
+                              write_graph_json, write_graph_ndjson)
+from rosdepviz.graph import DependencyGraph
+
+from test_cli import write_package_xml
+
+
+def make_workspace(base):
+    # D depends on C, C and B depend on A
+    write_package_xml(base / "A" / "package.xml", "A", deps=["std_msgs"])
+    write_package_xml(base / "B" / "package.xml", "B", deps=["A"])
+    write_package_xml(base / "C" / "package.xml", "C", deps=["A"])
+    write_package_xml(base / "D" / "package.xml", "D", deps=["C", "B"])
+
+
+def test_tree_to_text_marks_repeated_packages():
+    tree = {"A": ["B", "C"], "B": ["D"], "C": ["D"]}
+    assert tree_to_text(tree, "A") == "A\n  B\n    D\n  C\n    D (*)\n"
+
+
+def test_tree_to_json_and_dot():
+    tree = {"A": ["B", "C"], "C": ["B"]}
+    doc = json.loads(tree_to_json(tree, "A", direction="dependents", max_depth=2))
+    assert doc["root"] == "A"
+    assert doc["direction"] == "dependents"
+    assert doc["max_depth"] == 2
+    assert doc["packages"] == ["A", "B", "C"]
+    assert doc["edges"]["C"] == ["B"]
+
+    # Reverse trees point edges from dependent to dependency
+    dot = tree_to_dot(tree, "A", reverse=True)
+    assert '"B" -> "A";' in dot
+    assert '"B" -> "C";' in dot
+
+
+def test_cli_reverse_tree(tmp_path, monkeypatch, capsys):
+    base = tmp_path / "src"
+    make_workspace(base)
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+
+    tree = cli.build_reverse_dependency_tree("A")
+    assert sorted(tree["A"]) == ["B", "C"]
+    assert tree["B"] == ["D"]
+
+    tree = cli.build_reverse_dependency_tree("A", max_depth=1)
+    assert "B" not in tree
+
+    assert cli.main(["A", "--reverse", "--format", "json", "--no-cache"]) == 0
+    out = capsys.readouterr()
+    doc = json.loads(out.out)
+    assert doc["packages"] == ["A", "B", "C", "D"]
+    assert "Scanned" in out.err
+
+    assert cli.main(["missing", "--reverse", "--no-cache"]) == 1
+
+
+def test_graph_exporters(tmp_path):
+    graph = DependencyGraph({"A": "/ws/A/package.xml", "B": "/ws/B/package.xml", "C": "/ws/C/package.xml"},
+                            {"A": ["B", "std_msgs"], "B": ["roscpp"], "C": ["A"]})
+    node_ids = select_nodes(graph, ["A"], max_depth=1)
+    assert [graph.name_of(i) for i in node_ids] == ["A", "B", "std_msgs"]
+
+    out = io.StringIO()
+    write_graph_json(graph, out, node_ids)
+    doc = json.loads(out.getvalue())
+    assert doc["packages"][0] == {"name": "A", "internal": True, "package_xml": "/ws/A/package.xml"}
+    assert doc["edges"] == [["A", "B"], ["A", "std_msgs"]]
+
+    out = io.StringIO()
+    write_graph_ndjson(graph, out, select_nodes(graph))
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert len(records) == len(graph)
+    assert records[2] == {"name": "C", "internal": True, "package_xml": "/ws/C/package.xml", "depends": ["A"]}
+
+    out = io.StringIO()
+    write_graph_graphml(graph, out, select_nodes(graph, ["B"], reverse=True))
+    root = ElementTree.fromstring(out.getvalue())
+    ns = {"g": "http://graphml.graphdrawing.org/xmlns"}
+    assert sorted(node.get("id") for node in root.iterfind(".//g:node", ns)) == ["A", "B", "C"]
+    assert sorted((e.get("source"), e.get("target")) for e in root.iterfind(".//g:edge", ns)) == [
+        ("A", "B"), ("C", "A")]
+
+
+def test_cli_export(tmp_path, monkeypatch, capsys):
+    base = tmp_path / "src"
+    make_workspace(base)
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+
+    out = tmp_path / "graph.ndjson"
+    assert cli.main(["--all", "--export", "ndjson", "-o", str(out), "--no-cache"]) == 0
+    names = [json.loads(line)["name"] for line in out.read_text().splitlines()]
+    assert names == ["A", "B", "C", "D", "std_msgs"]
+
+    capsys.readouterr()
+    assert cli.main(["C", "--export", "json", "--no-cache"]) == 0
+    doc = json.loads(capsys.readouterr().out)
+    assert doc["edges"] == [["A", "std_msgs"], ["C", "A"]]
+
+    assert cli.main(["missing", "--export", "json", "--no-cache"]) == 1
@@ -0,0 +1,56 @@
+from rosdepviz.graph import DependencyGraph
+
+PACKAGES = {"a": "a/package.xml", "b": "b/package.xml", "c": "c/package.xml"}
+DEPENDENCIES = {"a": ["b", "roscpp", "b"], "b": ["c", "std_msgs"], "c": ["a", "roscpp"]}
+
+
+def test_ids_are_interned_internal_first():
+    graph = DependencyGraph(PACKAGES, DEPENDENCIES)
+    assert len(graph) == 5
+    assert graph.internal_count == 3
+    assert graph.internal_names() == ["a", "b", "c"]
+    assert [graph.is_internal(i) for i in range(len(graph))] == [True, True, True, False, False]
+    assert graph.name_of(graph.id_of("roscpp")) == "roscpp"
+    assert graph.id_of("missing") is None
+    assert graph.is_internal_name("a") and not graph.is_internal_name("std_msgs")
+    assert not graph.is_internal_name("missing")
+    assert graph.nodes[0].package_xml == "a/package.xml" and not graph.nodes[3].internal
+
+
+def test_forward_and_reverse_adjacency():
+    graph = DependencyGraph(PACKAGES, DEPENDENCIES)
+    # Duplicate declarations collapse to one edge
+    assert graph.edge_count == 6
+    assert graph.dependencies("a") == ["b", "roscpp"]
+    assert graph.dependencies("a", internal_only=True) == ["b"]
+    assert graph.dependencies("roscpp") == []
+    assert graph.dependents("roscpp") == ["a", "c"]
+    assert graph.dependents("a") == ["c"]
+    assert graph.dependents("missing") == []
+    assert list(graph.predecessors(graph.id_of("b"))) == [graph.id_of("a")]
+
+
+def test_subgraph_forward_reverse_and_external():
+    graph = DependencyGraph(PACKAGES, {"a": ["b", "roscpp"], "b": ["c"], "c": []})
+    nodes, edges = graph.subgraph("a")
+    assert nodes == {"a", "b", "c", "roscpp"}
+    assert edges == {"a": ["b", "roscpp"], "b": ["c"]}
+
+    assert graph.subgraph("a", include_external=False) == ({"a", "b", "c"}, {"a": ["b"], "b": ["c"]})
+    assert graph.subgraph("c", reverse=True) == ({"a", "b", "c"}, {"c": ["b"], "b": ["a"]})
+    assert graph.subgraph("roscpp") == ({"roscpp"}, {})
+    assert graph.subgraph("missing") == ({"missing"}, {})
+
+
+def test_empty_graph():
+    graph = DependencyGraph({}, {})
+    assert len(graph) == 0 and graph.edge_count == 0
+    assert graph.subgraph("x") == ({"x"}, {})
+
+
+def test_subgraph_max_depth():
+    graph = DependencyGraph(PACKAGES, {"a": ["b"], "b": ["c"], "c": ["roscpp"]})
+    assert graph.subgraph("a", max_depth=0) == ({"a"}, {})
+    assert graph.subgraph("a", max_depth=1) == ({"a", "b"}, {"a": ["b"]})
+    assert graph.subgraph("a", max_depth=2)[1] == {"a": ["b"], "b": ["c"]}
+    assert graph.subgraph("roscpp", reverse=True, max_depth=2)[1] == {"roscpp": ["c"], "c": ["b"]}
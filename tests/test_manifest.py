@@ -0,0 +1,83 @@
+from rosdepviz import manifest
+
+REP149_MANIFEST = """<?xml version="1.0"?>
+<?xml-model href="http://download.ros.org/schema/package_format3.xsd" schematypens="http://www.w3.org/2001/XMLSchema"?>
+<package format="3">
+  <name>  nav_core  </name>
+  <version>1.2.3</version>
+  <description>
+    A <b>rich</b> description.
+  </description>
+  <maintainer email="someone@example.com">Someone</maintainer>
+  <license>BSD</license>
+  <!-- comments are skipped -->
+  <buildtool_depend>catkin</buildtool_depend>
+  <depend>roscpp</depend>
+  <build_depend>std_msgs</build_depend>
+  <exec_depend>std_msgs</exec_depend>
+  <exec_depend>tf2_ros</exec_depend>
+  <test_depend>rostest</test_depend>
+  <export>
+    <nav_core plugin="${prefix}/plugins.xml"/>
+  </export>
+</package>
+"""
+
+
+def write(tmp_path, content, name="package.xml"):
+    path = tmp_path / name
+    path.write_text(content)
+    return str(path)
+
+
+def test_parse_rep149_manifest(tmp_path):
+    path = write(tmp_path, REP149_MANIFEST)
+    # Declaration order; buildtool, test and doc dependencies are not followed by default
+    assert manifest.parse_package_xml(path) == ("nav_core", ["roscpp", "std_msgs", "tf2_ros"])
+    assert manifest.parse_package_xml(path, types=manifest.DEFAULT_TYPES | manifest.BUILDTOOL)[1][0] == "catkin"
+
+
+def test_parse_manifest_typed_records(tmp_path):
+    path = write(tmp_path, REP149_MANIFEST)
+    name, records = manifest.parse_manifest(path)
+    assert name == "nav_core"
+    assert records[0] == ("catkin", manifest.BUILDTOOL, None)
+    deps = manifest.resolve_dependencies(records, {})
+    assert deps["std_msgs"] == manifest.BUILD | manifest.EXEC
+    assert deps["roscpp"] == manifest.BUILD | manifest.BUILD_EXPORT | manifest.EXEC
+    assert deps["rostest"] == manifest.TEST
+    runtime = manifest.resolve_dependencies(records, {}, manifest.parse_dependency_types("runtime"))
+    assert list(runtime) == ["roscpp", "std_msgs", "tf2_ros"]
+
+
+def test_conditions_follow_the_environment(tmp_path):
+    path = write(tmp_path, """<package format="3">
+  <name>bridge</name>
+  <depend condition="$ROS_VERSION == 1">roscpp</depend>
+  <depend condition="$ROS_VERSION == 2">rclcpp</depend>
+  <exec_depend condition="$ROS_VERSION == 2 and ($ROS_DISTRO == humble or $ROS_DISTRO >= 'jazzy')">rmw</exec_depend>
+  <exec_depend condition="$ROS_VERSION ==">broken</exec_depend>
+</package>
+""")
+    _, records = manifest.parse_manifest(path)
+    assert list(manifest.resolve_dependencies(records, {"ROS_VERSION": "1"})) == ["roscpp", "broken"]
+    humble = {"ROS_VERSION": "2", "ROS_DISTRO": "humble"}
+    assert list(manifest.resolve_dependencies(records, humble)) == ["rclcpp", "rmw", "broken"]
+    assert "rmw" not in manifest.resolve_dependencies(records, {"ROS_VERSION": "2", "ROS_DISTRO": "foxy"})
+    assert manifest.evaluate_condition("$ROS_DISTRO != noetic", {}) is True
+    try:
+        manifest.evaluate_condition("$ROS_VERSION == 2 or", {})
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_parser_rejects_entity_expansion(tmp_path, capsys):
+    bomb = write(tmp_path, """<?xml version="1.0"?>
+<!DOCTYPE package [<!ENTITY a "aaaaaaaaaa"><!ENTITY b "&a;&a;&a;&a;&a;&a;&a;&a;&a;&a;">]>
+<package><name>&b;</name></package>
+""")
+    name, deps = manifest.parse_package_xml(bomb)
+    if manifest.element_tree().__name__.startswith("defusedxml"):
+        assert (name, deps) == (None, [])
+        assert "Error parsing" in capsys.readouterr().out
@@ -0,0 +1,83 @@
+import os
+
+import rosdepviz.cli as cli
+from rosdepviz.cache import ManifestCache
+from rosdepviz.overlay import InstallSpaceIndex, LayeredIndex, build_layers, prefix_path_install_spaces
+from rosdepviz.workspace import WorkspaceIndex
+
+from test_cli import write_package_xml
+
+
+def make_layers(tmp_path):
+    install = tmp_path / "opt"
+    write_package_xml(install / "share" / "rclcpp" / "package.xml", "rclcpp", deps=["rcl"])
+    write_package_xml(install / "share" / "nav" / "package.xml", "nav", deps=["rclcpp"])
+    (install / "share" / "doc").mkdir()
+    underlay = tmp_path / "underlay" / "src"
+    write_package_xml(underlay / "driver" / "package.xml", "driver", deps=["rclcpp"])
+    overlay = tmp_path / "overlay" / "src"
+    write_package_xml(overlay / "nav" / "package.xml", "nav", deps=["driver"])
+    write_package_xml(overlay / "app" / "package.xml", "app", deps=["nav"])
+    return str(install), str(underlay), str(overlay)
+
+
+def test_prefix_path_install_spaces(tmp_path):
+    first, second = tmp_path / "ws_install", tmp_path / "opt"
+    first.mkdir()
+    second.mkdir()
+    environ = {"AMENT_PREFIX_PATH": os.pathsep.join([str(first), str(second)]),
+               "CMAKE_PREFIX_PATH": os.pathsep.join([str(second), str(tmp_path / "missing")])}
+    assert prefix_path_install_spaces(environ) == [str(second), str(first)]
+
+
+def test_install_space_index_reads_share(tmp_path):
+    install, _, _ = make_layers(tmp_path)
+    index = InstallSpaceIndex.scan(install)
+    assert sorted(index.packages) == ["nav", "rclcpp"]
+    assert index.watch_dirs == [os.path.join(install, "share")]
+
+
+def test_layered_index_shadows_lower_layers(tmp_path):
+    install, underlay, overlay = make_layers(tmp_path)
+    index = LayeredIndex.scan_layers(build_layers([underlay, overlay], [install]))
+    assert index.src_dir == overlay
+    assert sorted(index.packages) == ["app", "driver", "nav", "rclcpp"]
+    assert index.find_package_xml("nav") == os.path.join(overlay, "nav", "package.xml")
+    assert index.shadowed == {"nav": [os.path.join(install, "share", "nav", "package.xml")]}
+    assert index.layer_for("rclcpp").src_dir == install
+    # Packages from every layer are internal; the overlay's dependencies win
+    assert index.reachability.dependencies_of("app") == ["driver", "nav", "rclcpp", "rcl"]
+    assert index.graph.dependents("rclcpp") == ["driver"]
+
+
+def test_layers_are_cached_and_refreshed_independently(tmp_path, monkeypatch):
+    install, underlay, overlay = make_layers(tmp_path)
+    index = LayeredIndex.scan_layers(build_layers([underlay, overlay], [install]))
+
+    parsed = []
+    parse = WorkspaceIndex._read_manifest
+    monkeypatch.setattr(WorkspaceIndex, "_read_manifest",
+                        staticmethod(lambda path, st, cache: parsed.append(path) or parse(path, st, cache)))
+    write_package_xml(tmp_path / "underlay" / "src" / "driver" / "package.xml", "driver", deps=["rclcpp", "tf2"])
+    changes = index.refresh(cache=ManifestCache.for_workspace(overlay))
+    assert parsed == [os.path.join(underlay, "driver", "package.xml")]
+    assert changes == {"driver": ["rclcpp"]}
+    assert "tf2" in index.reachability.dependencies_of("app")
+
+    # Switching the overlay reuses the layers that did not change
+    other = tmp_path / "other" / "src"
+    write_package_xml(other / "app" / "package.xml", "app", deps=["driver"])
+    parsed.clear()
+    switched = LayeredIndex.scan_layers(build_layers([underlay, str(other)], [install]), previous=index.layers)
+    assert switched.layers[:2] == index.layers[:2]
+    assert parsed == []
+    assert switched.find_package_xml("nav") == os.path.join(install, "share", "nav", "package.xml")
+
+
+def test_cli_underlay_and_install_space(tmp_path, monkeypatch, capsys):
+    install, underlay, overlay = make_layers(tmp_path)
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", overlay)
+    assert cli.main(["app", "--transitive-deps", "--underlay", underlay, "--install-space", install]) == 0
+    out = capsys.readouterr().out
+    assert "Loaded 3 layers, 4 packages (1 shadowed by a higher layer)." in out
+    assert "  driver\n" in out and "  rcl (external)\n" in out
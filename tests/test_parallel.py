@@ -0,0 +1,58 @@
+from rosdepviz import parallel
+from rosdepviz.scanner import gather_package_xml_files
+from rosdepviz.workspace import WorkspaceIndex
+
+import rosdepviz.cli as cli
+from test_cli import write_package_xml
+
+
+def make_chain(base, count):
+    for i in range(count):
+        deps = [f"pkg{i + 1}"] if i + 1 < count else ["roscpp"]
+        write_package_xml(base / f"group{i % 7}" / f"pkg{i}" / "package.xml", f"pkg{i}", deps=deps)
+    # Same name twice: the first manifest in walk order must win for every job count
+    write_package_xml(base / "zz_dup" / "package.xml", "pkg0", deps=["other"])
+
+
+def test_parse_manifests_matches_sequential(tmp_path, monkeypatch):
+    base = tmp_path / "src"
+    make_chain(base, parallel.MIN_PARALLEL_MANIFESTS + 10)
+    paths = gather_package_xml_files(str(base))
+
+    sequential = parallel.parse_manifests(paths, jobs=1)
+    assert parallel.parse_manifests(paths, jobs=3) == sequential
+
+    monkeypatch.setattr(parallel, "MIN_PARALLEL_MANIFESTS", 1)
+    assert parallel.parse_manifests(paths[:5], jobs=2) == sequential[:5]
+
+
+def test_index_is_independent_of_jobs(tmp_path):
+    base = tmp_path / "src"
+    make_chain(base, parallel.MIN_PARALLEL_MANIFESTS + 10)
+
+    one = WorkspaceIndex.scan(str(base), jobs=1)
+    many = WorkspaceIndex.scan(str(base), jobs=4)
+    assert one.packages == many.packages
+    assert one.dependencies == many.dependencies
+    assert one.get_dependencies("pkg0") == ["pkg1"]
+
+
+def test_default_jobs_is_positive():
+    assert parallel.default_jobs() >= 1
+
+
+def test_cli_jobs_argument(tmp_path, monkeypatch, capsys):
+    base = tmp_path / "src"
+    make_chain(base, 3)
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+    monkeypatch.setattr(cli, "generate_dot_graph", lambda tree, **kwargs: None)
+
+    assert cli.main(["pkg0", "--jobs", "2"]) == 0
+    assert "pkg0: pkg1" in capsys.readouterr().out
+
+    try:
+        cli.parse_args(["pkg0", "--jobs", "0"])
+    except SystemExit as exc:
+        assert exc.code == 2
+    else:
+        raise AssertionError("--jobs 0 must be rejected")
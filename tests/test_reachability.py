@@ -0,0 +1,90 @@
+import random
+
+from rosdepviz.graph import DependencyGraph
+from rosdepviz.reachability import ReachabilityIndex
+
+import rosdepviz.cli as cli
+from test_cli import write_package_xml
+
+
+def build(dependencies):
+    packages = {name: f"{name}/package.xml" for name in dependencies}
+    return ReachabilityIndex(DependencyGraph(packages, dependencies))
+
+
+def naive_closure(dependencies, start):
+    seen, stack = set(), [start]
+    while stack:
+        for dep in dependencies.get(stack.pop(), []):
+            if dep not in seen:
+                seen.add(dep)
+                stack.append(dep)
+    seen.discard(start)
+    return seen
+
+
+def test_closure_with_cycles_and_self_loops():
+    deps = {"a": ["b", "roscpp"], "b": ["c"], "c": ["a", "d"], "d": ["d"], "e": ["a"]}
+    reach = build(deps)
+
+    assert reach.dependencies_of("a") == ["b", "c", "d", "roscpp"]
+    assert reach.dependencies_of("e", internal_only=True) == ["a", "b", "c", "d"]
+    assert reach.dependents_of("d") == ["a", "b", "c", "e"]
+    assert reach.dependents_of("roscpp") == ["a", "b", "c", "e"]
+    assert reach.dependents_of("e") == []
+    assert reach.depends_on("e", "d") and not reach.depends_on("d", "e")
+    assert reach.depends_on("d", "d")  # Self-loop
+    assert not reach.depends_on("a", "missing") and not reach.depends_on("missing", "a")
+    assert reach.count_dependencies("e") == 5
+    assert reach.count_dependents("a") == 3
+    assert reach.dependencies_of("missing") == [] and reach.count_dependents("missing") == 0
+
+
+def test_matches_naive_closure_on_random_graph():
+    rng = random.Random(7)
+    names = [f"p{i:02d}" for i in range(40)]
+    deps = {name: rng.sample(names, 3) + [f"ext{rng.randrange(5)}"] for name in names}
+    reach = build(deps)
+
+    for name in names:
+        expected = naive_closure(deps, name)
+        assert set(reach.dependencies_of(name)) == expected
+        assert reach.count_dependencies(name) == len(expected)
+        dependents = {other for other in names if name in naive_closure(deps, other) and other != name}
+        assert set(reach.dependents_of(name)) == dependents
+
+
+def test_deep_chain_does_not_recurse():
+    deps = {f"p{i}": [f"p{i + 1}"] for i in range(5000)}
+    deps["p5000"] = []
+    reach = build(deps)
+    assert reach.count_dependencies("p0") == 5000
+    assert reach.count_dependents("p5000") == 5000
+
+
+def test_cli_transitive_queries(tmp_path, monkeypatch, capsys):
+    base = tmp_path / "src"
+    write_package_xml(base / "A" / "package.xml", "A", deps=["B", "roscpp"])
+    write_package_xml(base / "B" / "package.xml", "B", deps=["C"])
+    write_package_xml(base / "C" / "package.xml", "C")
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+    monkeypatch.setattr(cli, "generate_dot_graph", lambda tree, **kwargs: pytest_fail())
+
+    assert cli.main(["B", "--transitive-deps", "--transitive-rdeps"]) == 0
+    out = capsys.readouterr().out
+    assert "Transitive dependencies of 'B' (1):\n  C\n" in out
+    assert "Transitive dependents of 'B' (1):\n  A\n" in out
+
+    cli.main(["A", "--transitive-deps"])
+    assert "  roscpp (external)" in capsys.readouterr().out
+
+    assert cli.main(["roscpp", "--transitive-rdeps"]) == 0
+    assert "Transitive dependents of 'roscpp' (1):\n  A\n" in capsys.readouterr().out
+    assert cli.main(["missing", "A", "--transitive-deps"]) == 1
+    captured = capsys.readouterr()
+    assert "Package 'missing' not found" in captured.err
+    assert "'missing'" not in captured.out and "Transitive dependencies of 'A'" in captured.out
+
+
+def pytest_fail():
+    raise AssertionError("transitive queries must not render a graph")
@@ -0,0 +1,75 @@
+import os
+
+import rosdepviz.render as render
+from rosdepviz.render import RenderCache, render_key, render_to_file
+
+
+def fake_graphviz(calls):
+    def run(source, fmt="png", engine="dot", process_started=None):
+        calls.append((source, fmt, engine))
+        return f"{engine}:{fmt}:{source}".encode("utf-8")
+    return run
+
+
+def test_render_key_depends_on_format_and_engine():
+    assert render_key("digraph {}") == render_key("digraph {}")
+    assert render_key("digraph {}", "png") != render_key("digraph {}", "svg")
+    assert render_key("digraph {}", engine="dot") != render_key("digraph {}", engine="sfdp")
+
+
+def test_render_to_file_uses_cache(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(render, "run_graphviz", fake_graphviz(calls))
+    cache = RenderCache(str(tmp_path / "renders"))
+
+    first = tmp_path / "first.png"
+    second = tmp_path / "second.png"
+    render_to_file("digraph { a -> b }", str(first), cache=cache)
+    render_to_file("digraph { a -> b }", str(second), cache=cache)
+    assert len(calls) == 1
+    assert first.read_bytes() == second.read_bytes() == b"dot:png:digraph { a -> b }"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    render_to_file("digraph { a -> b }", str(first), fmt="svg", cache=cache)
+    assert len(calls) == 2
+
+
+def test_render_cache_evicts_least_recently_used(tmp_path):
+    cache = RenderCache(str(tmp_path / "renders"), max_bytes=25)
+    cache.store("old", "png", b"x" * 10)
+    cache.store("used", "png", b"x" * 10)
+    os.utime(cache.path_for("old", "png"), ns=(1, 1))
+    os.utime(cache.path_for("used", "png"), ns=(2, 2))
+    assert cache.lookup("used", "png") is not None  # bumps it to most recently used
+
+    cache.store("new", "png", b"x" * 10)
+    assert cache.lookup("old", "png") is None
+    assert cache.lookup("used", "png") is not None
+    assert cache.lookup("new", "png") is not None
+
+
+def fake_engine(tmp_path, body):
+    engine = tmp_path / "fake-dot"
+    engine.write_text(f"#!/bin/sh\n{body}\n")
+    engine.chmod(0o755)
+    return str(engine)
+
+
+def test_run_graphviz_runs_engine_and_can_be_killed(tmp_path):
+    assert render.run_graphviz("digraph {}", engine=fake_engine(tmp_path, "cat")) == b"digraph {}"
+
+    sleeper = fake_engine(tmp_path, "exec sleep 30")
+    try:
+        render.run_graphviz("digraph {}", engine=sleeper, process_started=lambda process: process.kill())
+    except render.RenderCancelled:
+        pass
+    else:
+        raise AssertionError("expected RenderCancelled")
+
+    failing = fake_engine(tmp_path, "echo 'syntax error' >&2; exit 1")
+    try:
+        render.run_graphviz("digraph {", engine=failing)
+    except render.RenderError as exc:
+        assert "syntax error" in str(exc)
+    else:
+        raise AssertionError("expected RenderError")
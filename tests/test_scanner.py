@@ -0,0 +1,77 @@
+import os
+
+from rosdepviz.scanner import ScanStats, gather_package_xml_files
+
+import rosdepviz.cli as cli
+from test_cli import write_package_xml
+
+
+def rel(base, paths):
+    return [os.path.relpath(p, base) for p in paths]
+
+
+def test_scan_prunes_build_spaces_and_ignored_dirs(tmp_path):
+    base = tmp_path / "src"
+    write_package_xml(base / "stack" / "b_pkg" / "package.xml", "b_pkg")
+    write_package_xml(base / "stack" / "a_pkg" / "package.xml", "a_pkg")
+    # Nothing below a package root is scanned, not even another package.xml
+    write_package_xml(base / "stack" / "a_pkg" / "test" / "fixture" / "package.xml", "fixture")
+    for skipped in ("build", "devel", "install", "log", ".git"):
+        write_package_xml(base / skipped / "pkg" / "package.xml", f"{skipped}_pkg")
+    write_package_xml(base / "vendored" / "package.xml", "vendored")
+    (base / "vendored" / "CATKIN_IGNORE").write_text("")
+    write_package_xml(base / "colcon_off" / "inner" / "package.xml", "colcon_off")
+    (base / "colcon_off" / "COLCON_IGNORE").write_text("")
+    write_package_xml(base / "ament_off" / "package.xml", "ament_off")
+    (base / "ament_off" / "AMENT_IGNORE").write_text("")
+
+    stats = ScanStats()
+    found = gather_package_xml_files(str(base), stats=stats)
+
+    assert rel(base, found) == [os.path.join("stack", "a_pkg", "package.xml"),
+                                os.path.join("stack", "b_pkg", "package.xml")]
+    assert stats.manifests_found == 2
+    assert stats.dirs_excluded == 5
+    assert stats.dirs_ignored == 3
+    # src, stack, a_pkg, b_pkg and the three ignored directories
+    assert stats.dirs_visited == 7
+
+
+def test_scan_custom_excludes_and_relative_patterns(tmp_path):
+    base = tmp_path / "src"
+    write_package_xml(base / "third_party" / "x" / "package.xml", "x")
+    write_package_xml(base / "core" / "third_party" / "package.xml", "core_tp")
+    write_package_xml(base / "build" / "package.xml", "build_pkg")
+
+    assert rel(base, gather_package_xml_files(str(base), exclude=["third_party"])) == [
+        os.path.join("build", "package.xml")]
+    assert rel(base, gather_package_xml_files(str(base), exclude=["core/*"])) == [
+        os.path.join("build", "package.xml"), os.path.join("third_party", "x", "package.xml")]
+
+
+def test_scan_follows_symlinks_once(tmp_path):
+    base = tmp_path / "src"
+    write_package_xml(tmp_path / "elsewhere" / "linked" / "package.xml", "linked")
+    base.mkdir()
+    os.symlink(tmp_path / "elsewhere", base / "link")
+    os.symlink(base, base / "loop")
+
+    assert rel(base, gather_package_xml_files(str(base))) == [
+        os.path.join("link", "linked", "package.xml")]
+
+
+def test_scan_missing_directory(tmp_path):
+    assert gather_package_xml_files(str(tmp_path / "missing")) == []
+
+
+def test_cli_reports_scan_and_extra_excludes(tmp_path, monkeypatch, capsys):
+    base = tmp_path / "src"
+    write_package_xml(base / "A" / "package.xml", "A", deps=["B"])
+    write_package_xml(base / "skipme" / "B" / "package.xml", "B")
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+    monkeypatch.setattr(cli, "generate_dot_graph", lambda tree, **kwargs: None)
+
+    cli.main(["A", "--exclude", "skip*"])
+    out = capsys.readouterr().out
+    assert "found 1 package.xml files" in out
+    assert "Could not build dependency tree for 'A'" in out
@@ -0,0 +1,121 @@
+import pytest
+
+import rosdepviz.cli as cli
+from rosdepviz.transform import (GraphView, choose_engine, collapse_cycles, fold_external_leaves, simplify,
+                                 transitive_reduction)
+
+from test_cli import FakeDigraph, write_package_xml
+
+
+def test_collapse_cycles_merges_components():
+    # A -> B -> C -> B, C -> D
+    view = collapse_cycles(GraphView("A", {"A": ["B"], "B": ["C"], "C": ["B", "D"]}))
+    cycle = "__cycle_0"
+    assert view.groups[cycle] == ("cycle", ["B", "C"])
+    assert view.edges == {"A": [cycle], cycle: ["D"]}
+    assert view.node_count() == 3
+    assert "cycle of 2" in view.group_attributes(cycle)["label"]
+    assert view.group_attributes("A") is None
+
+
+def test_collapse_cycles_renames_root_in_cycle():
+    view = collapse_cycles(GraphView("A", {"A": ["B"], "B": ["A"]}))
+    assert view.root == "__cycle_0"
+    assert view.edges == {}
+
+
+def test_fold_external_leaves():
+    internal = {"A", "B"}
+    view = fold_external_leaves(GraphView("A", {"A": ["B", "roscpp", "std_msgs"], "B": ["rospy"]}),
+                                internal.__contains__)
+    assert view.edges == {"A": ["B", "__ext_A"], "B": ["rospy"]}
+    assert view.groups["__ext_A"] == ("external", ["roscpp", "std_msgs"])
+    assert view.group_attributes("__ext_A")["label"] == "2 external packages"
+
+
+def test_transitive_reduction_drops_implied_edges():
+    view = transitive_reduction(GraphView("A", {"A": ["B", "C", "D"], "B": ["C"], "C": ["D"]}))
+    assert view.edges == {"A": ["B"], "B": ["C"], "C": ["D"]}
+    assert view.removed_edges == [("A", "C"), ("A", "D")]
+
+
+def test_transitive_reduction_keeps_cycles():
+    # C and E form a cycle; A -> D is implied through it, the cycle edges are kept
+    view = transitive_reduction(GraphView("A", {"A": ["C", "D"], "C": ["D", "E"], "E": ["C"]}))
+    assert view.edges == {"A": ["C"], "C": ["D", "E"], "E": ["C"]}
+    assert view.removed_edges == [("A", "D")]
+
+
+def test_simplify_and_choose_engine():
+    view = simplify("A", {"A": ["B"], "B": ["A"]}, lambda name: True)
+    assert view.edges == {"A": ["B"], "B": ["A"]}
+    assert choose_engine(10) == "dot"
+    assert choose_engine(10, threshold=5) == "sfdp"
+
+
+def test_cli_collapse_and_fold(tmp_path, monkeypatch):
+    pytest.importorskip("graphviz")
+    base = tmp_path / "src"
+    write_package_xml(base / "A" / "package.xml", "A", deps=["B", "roscpp", "std_msgs"])
+    write_package_xml(base / "B" / "package.xml", "B", deps=["C"])
+    write_package_xml(base / "C" / "package.xml", "C", deps=["B"])
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+    monkeypatch.chdir(tmp_path)
+
+    # The real graphviz module: it reads "name:port" in edge endpoints
+    index = cli.load_workspace_index(cli.parse_args(["A", "--no-cache"]))
+    args = cli.parse_args(["A", "--collapse-cycles", "--fold-external"])
+    view, _ = cli.prepare_graph(args, index, cli.build_tree_for_args(args, index, "A"), "A")
+    source = cli.build_digraph(view.edges, node_attributes=view.group_attributes).source
+    assert "\tA -> __cycle_0\n" in source
+    assert "\tA -> __ext_A\n" in source
+    assert '\t__cycle_0 [label="cycle of 2:\\nB\\nC"' in source
+    assert "\troscpp" not in source  # Only in the tooltip of the summary node
+    assert ":" not in "".join(line for line in source.splitlines() if "->" in line)
+
+
+def test_cli_reduce_reports_removed_edges(tmp_path, monkeypatch, capsys):
+    base = tmp_path / "src"
+    write_package_xml(base / "A" / "package.xml", "A", deps=["B", "C"])
+    write_package_xml(base / "B" / "package.xml", "B", deps=["C"])
+    write_package_xml(base / "C" / "package.xml", "C", deps=[])
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+    monkeypatch.setattr(cli, "graphviz", type("M", (), {"Digraph": FakeDigraph}))
+    monkeypatch.chdir(tmp_path)
+
+    assert cli.main(["A", "--reduce", "--no-cache"]) == 0
+    assert "Transitive reduction removed 1 of 3 edges." in capsys.readouterr().out
+    source = (tmp_path / "dependency_tree.dot").read_text()
+    assert '"A" -> "B"' in source
+    assert '"A" -> "C"' not in source
+
+
+def test_reductions_rejected_with_format():
+    for argv in (["A", "--format", "json", "--reduce"], ["A", "--reverse", "--format", "text", "--collapse-cycles"],
+                 ["A", "B", "--format", "dot", "--fold-external"]):
+        try:
+            cli.parse_args(argv)
+        except SystemExit as exc:
+            assert exc.code == 2
+        else:
+            raise AssertionError(f"{argv} must be rejected")
+    assert not cli.parse_args(["A", "B", "--reverse", "--reduce"]).format
+    assert not cli.parse_args(["A", "--reverse", "--reduce"]).format
+    assert cli.parse_args(["A", "--reverse"]).format == "text"
+
+
+def test_cli_reverse_reduce_renders_dependents(tmp_path, monkeypatch, capsys):
+    base = tmp_path / "src"
+    write_package_xml(base / "A" / "package.xml", "A", deps=["B", "C"])
+    write_package_xml(base / "B" / "package.xml", "B", deps=["C"])
+    write_package_xml(base / "C" / "package.xml", "C", deps=[])
+    monkeypatch.setattr(cli, "ROS_SRC_DIR", str(base))
+    monkeypatch.setattr(cli, "graphviz", type("M", (), {"Digraph": FakeDigraph}))
+    monkeypatch.chdir(tmp_path)
+
+    assert cli.main(["C", "--reverse", "--reduce", "--no-cache"]) == 0
+    assert "Transitive reduction removed 1 of 3 edges." in capsys.readouterr().out
+    source = (tmp_path / "dependency_tree.dot").read_text()
+    # Arrows still point at dependencies
+    assert '"A" -> "B"' in source and '"B" -> "C"' in source
+    assert '"A" -> "C"' not in source
@@ -0,0 +1,194 @@
+import rosdepviz.cli as cli
+from rosdepviz import manifest
+from rosdepviz.scanner import gather_package_xml_files
+from rosdepviz.workspace import WorkspaceIndex
+
+from test_cli import write_package_xml
+
+
+def test_workspace_index_scans_once(tmp_path, monkeypatch):
+    base = tmp_path / "src"
+    write_package_xml(base / "A" / "package.xml", "A", deps=["B", "std_msgs"])
+    write_package_xml(base / "nested" / "B" / "package.xml", "B", deps=["C"])
+    write_package_xml(base / "C" / "package.xml", "C")
+
+    calls = []
+    parse = manifest.parse_manifest
+
+    def counting_parse(path):
+        calls.append(path)
+        return parse(path)
+
+    monkeypatch.setattr("rosdepviz.parallel.parse_manifest", counting_parse)
+    index = WorkspaceIndex.scan(str(base))
+
+    assert len(calls) == 3
+    assert len(index) == 3
+    assert "A" in index and "std_msgs" not in index
+    assert index.find_package_xml("B") == str(base / "nested" / "B" / "package.xml")
+    assert index.find_package_xml("std_msgs") is None
+    assert index.get_dependencies("A") == ["B", "std_msgs"]
+    assert index.get_internal_dependencies("A") == ["B"]
+    assert index.get_dependencies("missing") == []
+
+    # Lookups afterwards never touch the filesystem again
+    index.find_package_xml("C")
+    index.get_internal_dependencies("B")
+    assert len(calls) == 3
+
+
+def test_cli_uses_empty_index_given(tmp_path, monkeypatch):
+    def scan_again(*args, **kwargs):
+        raise AssertionError("an empty index must not trigger a scan")
+
+    monkeypatch.setattr(cli, "get_workspace_index", scan_again)
+    empty = WorkspaceIndex.scan(str(tmp_path))
+    assert cli.find_package_xml("A", index=empty) is None
+    assert cli.build_dependency_tree("A", index=empty) == {}
+    assert cli.build_reverse_dependency_tree("A", index=empty) == {}
+
+
+def test_workspace_index_reverse_dependencies(tmp_path):
+    base = tmp_path / "src"
+    write_package_xml(base / "A" / "package.xml", "A", deps=["C", "roscpp"])
+    write_package_xml(base / "B" / "package.xml", "B", deps=["C"])
+    write_package_xml(base / "C" / "package.xml", "C")
+
+    reverse = WorkspaceIndex.scan(str(base)).build_reverse_dependencies()
+    assert sorted(reverse["C"]) == ["A", "B"]
+    assert "roscpp" not in reverse
+
+
+def test_duplicate_package_names_keep_first(tmp_path):
+    base = tmp_path / "src"
+    write_package_xml(base / "a" / "package.xml", "dup", deps=["x"])
+    write_package_xml(base / "b" / "package.xml", "dup", deps=["y"])
+
+    assert len(gather_package_xml_files(str(base))) == 2
+    index = WorkspaceIndex.scan(str(base))
+    assert index.find_package_xml("dup") == str(base / "a" / "package.xml")
+    assert index.get_dependencies("dup") == ["x"]
+
+
+def test_iter_load_manifests_reports_batches(tmp_path):
+    base = tmp_path / "src"
+    for i in range(5):
+        write_package_xml(base / f"p{i}" / "package.xml", f"p{i}")
+
+    index = WorkspaceIndex(str(base))
+    files = index.gather_package_xml_files()
+    steps = list(index.iter_load_manifests(files, batch_size=2))
+
+    assert [(done, total) for done, total, _ in steps] == [(2, 5), (4, 5), (5, 5)]
+    assert [names for _, _, names in steps] == [["p0", "p1"], ["p2", "p3"], ["p4"]]
+    assert len(index) == 5
+
+
+def test_iter_load_manifests_can_stop_early(tmp_path):
+    from rosdepviz.cache import ManifestCache
+
+    base = tmp_path / "src"
+    for i in range(4):
+        write_package_xml(base / f"p{i}" / "package.xml", f"p{i}")
+
+    index = WorkspaceIndex(str(base))
+    cache = ManifestCache.for_workspace(str(base))
+    loads = index.iter_load_manifests(index.gather_package_xml_files(), cache=cache, batch_size=1)
+    assert next(loads) == (1, 4, ["p0"])
+    loads.close()
+
+    # Partial results stay usable; the cache is not written for an aborted load
+    assert list(index.packages) == ["p0"]
+    assert ManifestCache.for_workspace(str(base)).entries == {}
+
+
+def test_refresh_only_rereads_changed_manifests(tmp_path, monkeypatch):
+    import os
+
+    base = tmp_path / "src"
+    write_package_xml(base / "A" / "package.xml", "A", deps=["B"])
+    write_package_xml(base / "B" / "package.xml", "B", deps=["roscpp"])
+    write_package_xml(base / "C" / "package.xml", "C", deps=["A"])
+    index = WorkspaceIndex.scan(str(base))
+    assert index.graph.dependents("B") == ["A"]
+
+    parsed = []
+    parse = manifest.parse_manifest
+    monkeypatch.setattr("rosdepviz.workspace.parse_manifest", lambda p: parsed.append(p) or parse(p))
+
+    assert index.refresh() == {}
+    assert parsed == []
+
+    # Modify B, delete C, add D which A now depends on
+    write_package_xml(base / "B" / "package.xml", "B", deps=["roscpp", "std_msgs"])
+    os.remove(base / "C" / "package.xml")
+    write_package_xml(base / "D" / "package.xml", "D", deps=["B"])
+    write_package_xml(base / "A" / "package.xml", "A", deps=["B", "D"])
+
+    changes = index.refresh()
+    assert sorted(parsed) == sorted(str(base / p / "package.xml") for p in ("A", "B", "D"))
+    assert changes == {"A": ["B"], "B": ["roscpp"], "C": ["A"], "D": None}
+    assert "C" not in index
+    assert index.get_dependencies("B") == ["roscpp", "std_msgs"]
+
+    # The graph is rebuilt from the updated index without re-parsing anything
+    assert index.graph.dependents("B") == ["A", "D"]
+    assert index.graph.dependents("D") == ["A"]
+    assert "C" not in index.graph
+
+
+def test_refresh_promotes_shadowed_duplicate(tmp_path):
+    import os
+
+    base = tmp_path / "src"
+    write_package_xml(base / "a" / "package.xml", "dup", deps=["x"])
+    write_package_xml(base / "b" / "package.xml", "dup", deps=["y"])
+    write_package_xml(base / "x" / "package.xml", "x")
+    write_package_xml(base / "y" / "package.xml", "y")
+    index = WorkspaceIndex.scan(str(base))
+    assert index.graph.dependents("x") == ["dup"]
+
+    os.remove(base / "a" / "package.xml")
+    changes = index.refresh()
+    assert changes == {"dup": ["x"]}
+    assert index.find_package_xml("dup") == str(base / "b" / "package.xml")
+    assert index.graph.dependents("x") == []
+    assert index.graph.dependents("y") == ["dup"]
+
+
+def test_scan_records_watch_dirs(tmp_path):
+    base = tmp_path / "src"
+    write_package_xml(base / "stack" / "A" / "package.xml", "A")
+    index = WorkspaceIndex.scan(str(base))
+    assert index.watch_dirs == [str(base), str(base / "stack"), str(base / "stack" / "A")]
+
+
+def test_dependency_types_and_conditions(tmp_path):
+    base = tmp_path / "src"
+    (base / "app").mkdir(parents=True)
+    (base / "app" / "package.xml").write_text("""<package format="3">
+  <name>app</name>
+  <buildtool_depend>ament_cmake</buildtool_depend>
+  <build_depend>msgs</build_depend>
+  <exec_depend>driver</exec_depend>
+  <test_depend>fixtures</test_depend>
+  <depend condition="$ROS_VERSION == 2">rclcpp</depend>
+</package>
+""")
+    write_package_xml(base / "msgs" / "package.xml", "msgs")
+    write_package_xml(base / "driver" / "package.xml", "driver", deps=["msgs"])
+    write_package_xml(base / "fixtures" / "package.xml", "fixtures")
+
+    index = WorkspaceIndex.scan(str(base), environment={"ROS_VERSION": "1"})
+    assert index.get_dependencies("app") == ["msgs", "driver"]
+    assert index.graph.dependency_types("app")["msgs"] == manifest.BUILD
+
+    # A runtime-only closure still follows exec dependencies of dependencies
+    index.set_types(manifest.EXEC)
+    assert index.get_dependencies("app") == ["driver"]
+    assert index.reachability.dependencies_of("app") == ["driver", "msgs"]
+    index.set_types(manifest.ALL_TYPES)
+    assert index.reachability.dependencies_of("app", internal_only=True) == ["driver", "fixtures", "msgs"]
+
+    ros2 = WorkspaceIndex.scan(str(base), environment={"ROS_VERSION": "2"})
+    assert "rclcpp" in ros2.get_dependencies("app")